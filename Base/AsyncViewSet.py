@@ -0,0 +1,361 @@
+"""
+异步视图集
+ASGI(daphne)部署下视图以协程运行，等待数据库、缓存时不占用线程池中的线程：
+
+- 列表/详情/新增/修改/删除使用Django异步ORM接口(aiterator/acount/aaggregate/aget/asave/adelete)与异步缓存接口
+- 字段校验(可能查询数据库的校验器)、自定义create/update、非快速序列化等同步逻辑通过sync_to_async执行
+- 权限/限流检查(initial)可能查询数据库，在线程中执行
+- 子类重写的perform_create/perform_update/perform_destroy在线程中调用，未重写时直接走异步ORM
+- 未改写为协程的动作(如 /bulk/、/export/ 及子类自定义的同步动作)在线程中执行
+
+响应格式、分页、响应缓存、协商缓存(304)与APIViewSet完全一致，子类只需把基类换成AsyncAPIViewSet
+注：Django 4.2的异步ORM内部仍在同步线程中执行SQL，视图改为协程后省去的是每个请求占用工作线程等待的开销
+"""
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.core.cache import cache
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.http.response import Http404
+from rest_framework import status
+from rest_framework.mixins import CreateModelMixin, UpdateModelMixin
+from rest_framework.serializers import ModelSerializer
+from core.exceptions import QueryInvalid
+from Base.Cache import (aget_cached_count, aget_cached_list_stats, aget_model_version, amake_versioned_key,
+                        get_estimated_count, get_queryset_signature, RESPONSE_CACHE_PREFIX)
+from Base.Pagination import CustomPagination
+from Base.Response import APIResponse
+from Base.ViewSet import APIViewSet
+
+
+class AsyncAPIViewSet(APIViewSet):
+    # 认证由TokenAuthMiddleware完成，不使用DRF默认的Session认证(会在协程中同步查询数据库)
+    authentication_classes = ()
+
+    @classmethod
+    def as_view(cls, actions=None, **initkwargs):
+        view = super().as_view(actions, **initkwargs)
+        # 标记为协程视图，Django在ASGI下直接await，不再放入线程池
+        return markcoroutinefunction(view)
+
+    async def dispatch(self, request, *args, **kwargs):
+        """与APIView.dispatch流程一致，处理方法为协程时直接await"""
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+        self.pending_cache_entry = None
+
+        try:
+            # 权限类(如HasPermission)可能同步查询数据库，协程中直接调用会抛出SynchronousOnlyOperation
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+            if iscoroutinefunction(handler):
+                response = await handler(request, *args, **kwargs)
+            else:
+                response = await sync_to_async(handler)(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        if self.pending_cache_entry is not None:
+            await cache.aset(self.response_cache_key, self.pending_cache_entry, timeout=self.get_cache_timeout())
+        return self.response
+
+    def store_cached_response(self, entry):
+        # finalize_response为同步方法，缓存由dispatch异步写入
+        self.pending_cache_entry = entry
+
+    async def aget_cached_response(self, request):
+        """get_cached_response的异步版本"""
+        self.response_cache_key = None
+        if not self.cache_response:
+            return None
+        models, parts = self.get_response_cache_parts(request)
+        self.response_cache_key = await amake_versioned_key(RESPONSE_CACHE_PREFIX, models, *parts)
+        return self.use_cached_response(request, await cache.aget(self.response_cache_key))
+
+    async def afilter_queryset(self):
+        """搜索后端可能查询数据库(建立索引、读取全文索引信息)，有搜索条件时在线程中构造查询集"""
+        if self.get_search_terms():
+            return await sync_to_async(lambda: self.filter_queryset(self.get_queryset()))()
+        return self.filter_queryset(self.get_queryset())
+
+    async def aget_object(self):
+        queryset = await self.afilter_queryset()
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            instance = await queryset.aget(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        except (queryset.model.DoesNotExist, TypeError, ValueError, DjangoValidationError):
+            raise Http404
+        self.check_object_permissions(self.request, instance)
+        return instance
+
+    async def aget_list_validators(self, queryset):
+        """get_list_validators的异步版本"""
+        if not self.conditional_get:
+            return None, None
+        model = queryset.model
+        signature = get_queryset_signature(queryset)
+        field = self.get_list_last_modified_field(model)
+        if signature is None:
+            return self.make_etag(model._meta.label_lower, 'empty'), None
+        if field is None:
+            return self.make_etag(model._meta.label_lower, signature, await aget_model_version(model)), None
+        stats = await aget_cached_list_stats(queryset, field, signature)
+        return self.build_list_validators(model, signature, stats)
+
+    async def aget_retrieve_validators(self, queryset):
+        """get_retrieve_validators的异步版本"""
+        if not self.conditional_get:
+            return None, None
+        model = queryset.model
+        pk = self.kwargs.get(self.lookup_url_kwarg or self.lookup_field)
+        field = self.get_last_modified_field(model)
+        if field is None:
+            return self.make_etag(model._meta.label_lower, pk, await aget_model_version(model)), None
+        try:
+            rows = [value async for value in
+                    queryset.filter(**{self.lookup_field: pk}).order_by().values_list(field, flat=True)[:1]]
+        except (TypeError, ValueError, DjangoValidationError):
+            return None, None
+        return self.build_retrieve_validators(model, pk, rows)
+
+    async def aserialize_many(self, rows, fast_serializer):
+        """序列化列表数据，快速序列化时异步读取行字典"""
+        if fast_serializer is not None:
+            return fast_serializer.to_representation_many(
+                [row async for row in rows.aiterator(chunk_size=self.export_chunk_size)]
+            )
+        return await sync_to_async(lambda: self.get_serializer(rows, many=True).data)()
+
+    async def aserialize_instance(self, instance, serializer=None):
+        """
+        序列化单个实例
+        可使用快速序列化时直接由实例属性转换(与DRF读取的值相同)，否则在线程中读取serializer.data
+        """
+        fast_serializer = self.get_fast_serializer(type(instance))
+        if fast_serializer is not None:
+            return fast_serializer.convert({column: getattr(instance, column) for column in fast_serializer.columns})
+        serializer = serializer if serializer is not None else self.get_serializer(instance)
+        return await sync_to_async(lambda: serializer.data)()
+
+    async def apaginate(self, queryset, fast_serializer):
+        """页码分页的异步实现，响应格式与CustomPagination一致，页码无效时抛出QueryInvalid"""
+        paginator = self.paginator
+        page_size = paginator.get_page_size(self.request)
+        try:
+            page_num = int(self.request.query_params.get(paginator.page_query_param, 1))
+        except (TypeError, ValueError):
+            page_num = 0
+        if paginator.get_estimate(self):
+            total, approximate = await sync_to_async(get_estimated_count)(queryset)
+        else:
+            total, approximate = await aget_cached_count(queryset), False
+        # 与Django分页器一致：第一页始终有效
+        if page_num < 1 or (page_num > 1 and (page_num - 1) * page_size >= total):
+            raise QueryInvalid('页码无效')
+        offset = (page_num - 1) * page_size
+        data = await self.aserialize_many(queryset[offset:offset + page_size], fast_serializer)
+        return paginator.build_response(total, page_num, page_size, data, approximate)
+
+    async def aperform_save(self, serializer):
+        """
+        保存序列化器数据
+        子类重写了perform_create/perform_update时在线程中调用，保证钩子不被绕过；
+        序列化器未自定义create/update且不含多对多字段时直接asave，否则在线程中调用serializer.save()
+        """
+        if serializer.instance is None:
+            if type(self).perform_create is not CreateModelMixin.perform_create:
+                await sync_to_async(self.perform_create)(serializer)
+                return serializer.instance
+        elif type(self).perform_update is not UpdateModelMixin.perform_update:
+            await sync_to_async(self.perform_update)(serializer)
+            return serializer.instance
+
+        serializer_class = type(serializer)
+        model = serializer.Meta.model
+        attrs = serializer.validated_data
+        m2m_fields = {field.name for field in model._meta.many_to_many}
+        if serializer.instance is None:
+            custom = serializer_class.create is not ModelSerializer.create
+        else:
+            custom = serializer_class.update is not ModelSerializer.update
+        if custom or m2m_fields & attrs.keys():
+            return await sync_to_async(serializer.save)()
+
+        instance = serializer.instance if serializer.instance is not None else model()
+        for name, value in attrs.items():
+            setattr(instance, name, value)
+        await instance.asave(force_insert=serializer.instance is None)
+        serializer.instance = instance
+        return instance
+
+    async def aperform_destroy(self, instance):
+        """perform_destroy的异步版本，支持软删除，子类重写了perform_destroy时在线程中调用"""
+        if type(self).perform_destroy is not APIViewSet.perform_destroy:
+            return await sync_to_async(self.perform_destroy)(instance)
+        if hasattr(instance, 'is_deleted'):
+            # 软删除
+            instance.is_deleted = True
+            await instance.asave()
+        elif hasattr(instance, 'status'):
+            # 状态删除
+            instance.status = 0
+            await instance.asave()
+        else:
+            # 物理删除
+            await instance.adelete()
+
+    async def list(self, request, *args, **kwargs):
+        """对应 GET / - 获取所有数据"""
+        cached = await self.aget_cached_response(request)
+        if cached is not None:
+            return cached
+        try:
+            queryset = await self.afilter_queryset()
+            if self.needs_full_scan_check(queryset):
+                # 需要读取表统计信息
+                await sync_to_async(self.check_full_scan)(queryset)
+            # 数据未变化时直接返回304，不做分页与序列化
+            not_modified = self.check_not_modified(request, *await self.aget_list_validators(queryset))
+            if not_modified is not None:
+                return not_modified
+            # 快速序列化：只查询输出需要的列，直接由行字典生成结果
+            fast_serializer = self.get_fast_serializer(queryset.model)
+            if fast_serializer is not None:
+                queryset = queryset.values(*fast_serializer.columns, *self.get_extra_value_columns())
+
+            if isinstance(self.paginator, CustomPagination):
+                return await self.apaginate(queryset, fast_serializer)
+            elif self.paginator is not None:
+                # 其他分页器(如游标分页)在线程中分页
+                page = await sync_to_async(self.paginate_queryset)(queryset)
+                if fast_serializer is not None:
+                    return self.get_paginated_response(fast_serializer.to_representation_many(page))
+                return self.get_paginated_response(await self.aserialize_many(page, None))
+
+            return APIResponse.success(await self.aserialize_many(queryset, fast_serializer))
+
+        except QueryInvalid as e:
+            return APIResponse.fail(message=e.message, code=e.code)
+        except Exception as e:
+            return APIResponse.fail(
+                message=str(e),
+                code=status.HTTP_400_BAD_REQUEST
+            )
+
+    async def create(self, request, *args, **kwargs):
+        """对应 POST / - 添加新数据"""
+        try:
+            serializer = self.get_serializer(data=request.data)
+            # 唯一性等校验器会查询数据库
+            if await sync_to_async(serializer.is_valid)():
+                instance = await self.aperform_save(serializer)
+                data = await self.aserialize_instance(instance, serializer)
+                return APIResponse.success(
+                    data=data,
+                    message="创建成功",
+                    code=status.HTTP_201_CREATED,
+                    headers=self.get_success_headers(data)
+                )
+            return APIResponse.fail(
+                message="数据验证失败",
+                errors=serializer.errors,
+                code=status.HTTP_400_BAD_REQUEST
+            )
+        except Exception as e:
+            return APIResponse.fail(
+                message=f"创建失败: {str(e)}",
+                code=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+    async def retrieve(self, request, *args, **kwargs):
+        """对应 GET /{id} - 获取单个数据"""
+        cached = await self.aget_cached_response(request)
+        if cached is not None:
+            return cached
+        try:
+            queryset = await self.afilter_queryset()
+            not_modified = self.check_not_modified(request, *await self.aget_retrieve_validators(queryset))
+            if not_modified is not None:
+                return not_modified
+            fast_serializer = self.get_fast_serializer(queryset.model)
+            if fast_serializer is None:
+                instance = await self.aget_object()
+                return APIResponse.success(await self.aserialize_instance(instance))
+            lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+            try:
+                row = await queryset.values(*fast_serializer.columns).aget(
+                    **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+                )
+            except (queryset.model.DoesNotExist, TypeError, ValueError, DjangoValidationError):
+                raise Http404
+            return APIResponse.success(fast_serializer.convert(row))
+        except Http404:
+            return APIResponse.fail(
+                message="数据不存在",
+                code=status.HTTP_404_NOT_FOUND
+            )
+        except Exception as e:
+            return APIResponse.fail(
+                message=f"获取数据失败: {str(e)}",
+                code=status.HTTP_404_NOT_FOUND
+            )
+
+    async def update(self, request, *args, **kwargs):
+        """对应 PUT /{id} - 更新单个数据"""
+        try:
+            partial = kwargs.pop('partial', False)
+            instance = await self.aget_object()
+            serializer = self.get_serializer(
+                instance,
+                data=request.data,
+                partial=partial
+            )
+
+            if await sync_to_async(serializer.is_valid)():
+                instance = await self.aperform_save(serializer)
+                return APIResponse.success(
+                    data=await self.aserialize_instance(instance, serializer),
+                    message="更新成功"
+                )
+
+            return APIResponse.fail(
+                message=serializer.errors,
+                code=status.HTTP_400_BAD_REQUEST
+            )
+        except Http404:
+            return APIResponse.fail(
+                message="数据不存在",
+                code=status.HTTP_404_NOT_FOUND
+            )
+        except Exception as e:
+            return APIResponse.fail(
+                message=f"更新失败: {str(e)}",
+                code=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+    async def partial_update(self, request, *args, **kwargs):
+        """对应 PATCH /{id} - 部分更新"""
+        kwargs['partial'] = True
+        return await self.update(request, *args, **kwargs)
+
+    async def destroy(self, request, *args, **kwargs):
+        """对应 DELETE /{id} - 删除单个数据"""
+        try:
+            instance = await self.aget_object()
+            await self.aperform_destroy(instance)
+            return APIResponse.success(message="删除成功")
+        except Http404:
+            return APIResponse.fail(
+                message="数据不存在",
+                code=status.HTTP_404_NOT_FOUND
+            )
+        except Exception as e:
+            return APIResponse.fail(
+                message=f"删除失败: {str(e)}",
+                code=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
@@ -0,0 +1,219 @@
+"""
+缓存工具
+
+- 模型版本号：登记过的模型(track_model_versions)写入(post_save/post_delete)后自增，缓存键带上版本号即可在写入后
+  自动失效，版本号存放在django缓存(Redis)中，多个worker进程间保持一致；事务中的写入在提交后才自增
+- 查询总数缓存：按 模型 + 版本号 + 过滤条件签名 缓存COUNT(*)结果，列表协商缓存的 max(更新时间)+行数 同样缓存
+- 大表行数估算：读取数据库的表统计信息，代替精确COUNT(*)
+- 响应缓存键：按 依赖模型版本号 + 请求参数 生成，依赖模型写入后旧缓存不再命中，按超时自然淘汰
+"""
+import hashlib
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.db import connections, transaction
+from django.db.models import Count, Max
+from django.db.models.signals import post_save, post_delete
+
+MODEL_VERSION_PREFIX = 'model_version:'
+COUNT_CACHE_PREFIX = 'count:'
+LIST_STATS_PREFIX = 'list_stats:'
+TABLE_ROWS_PREFIX = 'table_rows:'
+RESPONSE_CACHE_PREFIX = 'response:'
+
+
+def _version_key(model):
+    return f'{MODEL_VERSION_PREFIX}{model._meta.label_lower}'
+
+
+def get_model_version(model) -> int:
+    """获取模型当前版本号"""
+    key = _version_key(model)
+    version = cache.get(key)
+    if version is None:
+        # 以时间戳作为初始值，避免版本号被淘汰后回到旧值导致读到过期缓存
+        cache.add(key, int(time.time() * 1000), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+async def aget_model_version(model) -> int:
+    """get_model_version的异步版本"""
+    key = _version_key(model)
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, int(time.time() * 1000), timeout=None)
+        version = await cache.aget(key)
+    return version
+
+
+def bump_model_version(model, using=None):
+    """
+    模型数据变化后自增版本号(bulk_create/update等不触发信号的写操作需手动调用)
+    在事务中调用时延迟到事务提交后执行：提交前自增的话，其他请求会把未提交前的旧数据写入新版本号的缓存
+    """
+    transaction.on_commit(lambda: _incr_model_version(model), using=using)
+
+
+def _incr_model_version(model):
+    key = _version_key(model)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # 版本号不存在时重新初始化
+        cache.set(key, int(time.time() * 1000), timeout=None)
+
+
+def _versioned_key(prefix, models, versions, parts):
+    versions = ':'.join(f'{model._meta.label_lower}@{version}' for model, version in zip(models, versions))
+    digest = hashlib.md5('|'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+    return f'{prefix}{versions}:{digest}'
+
+
+def make_versioned_key(prefix, models, *parts):
+    """生成带模型版本号的缓存键，任一模型写入后键随之变化"""
+    return _versioned_key(prefix, models, [get_model_version(model) for model in models], parts)
+
+
+async def amake_versioned_key(prefix, models, *parts):
+    """make_versioned_key的异步版本"""
+    return _versioned_key(prefix, models, [await aget_model_version(model) for model in models], parts)
+
+
+def get_queryset_signature(queryset):
+    """
+    获取查询集过滤条件的签名
+    去掉排序与查询列后的SQL与参数，相同过滤条件得到相同签名；条件恒为空时返回None
+    """
+    try:
+        sql, params = queryset.order_by().values('pk').query.get_compiler(queryset.db).as_sql()
+    except EmptyResultSet:
+        return None
+    return hashlib.md5(f'{sql}|{params!r}'.encode('utf-8')).hexdigest()
+
+
+def _count_key(model, version, signature):
+    return f'{COUNT_CACHE_PREFIX}{model._meta.label_lower}:{version}:{signature}'
+
+
+def get_cached_count(queryset) -> int:
+    """带缓存的COUNT(*)，模型写入后版本号变化自动失效"""
+    signature = get_queryset_signature(queryset)
+    if signature is None:
+        return 0
+    model = queryset.model
+    key = _count_key(model, get_model_version(model), signature)
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, timeout=getattr(settings, 'PAGINATION_COUNT_CACHE_TIMEOUT', 60))
+    return count
+
+
+async def aget_cached_count(queryset) -> int:
+    """get_cached_count的异步版本"""
+    signature = get_queryset_signature(queryset)
+    if signature is None:
+        return 0
+    model = queryset.model
+    key = _count_key(model, await aget_model_version(model), signature)
+    count = await cache.aget(key)
+    if count is None:
+        count = await queryset.acount()
+        await cache.aset(key, count, timeout=getattr(settings, 'PAGINATION_COUNT_CACHE_TIMEOUT', 60))
+    return count
+
+
+def _list_stats_key(model, version, signature, field):
+    return f'{LIST_STATS_PREFIX}{model._meta.label_lower}:{version}:{signature}:{field}'
+
+
+def _list_stats_timeout():
+    return getattr(settings, 'PAGINATION_COUNT_CACHE_TIMEOUT', 60)
+
+
+def get_cached_list_stats(queryset, field, signature):
+    """
+    带缓存的 max(field) + 行数，返回 {'last_modified': ..., 'total': ...}
+    缓存键与总数缓存一样带模型版本号，行数同时写入总数缓存，分页时不再COUNT
+    """
+    model = queryset.model
+    version = get_model_version(model)
+    key = _list_stats_key(model, version, signature, field)
+    stats = cache.get(key)
+    if stats is None:
+        stats = queryset.order_by().aggregate(last_modified=Max(field), total=Count('pk'))
+        cache.set_many({key: stats, _count_key(model, version, signature): stats['total']},
+                       timeout=_list_stats_timeout())
+    return stats
+
+
+async def aget_cached_list_stats(queryset, field, signature):
+    """get_cached_list_stats的异步版本"""
+    model = queryset.model
+    version = await aget_model_version(model)
+    key = _list_stats_key(model, version, signature, field)
+    stats = await cache.aget(key)
+    if stats is None:
+        stats = await queryset.order_by().aaggregate(last_modified=Max(field), total=Count('pk'))
+        await cache.aset_many({key: stats, _count_key(model, version, signature): stats['total']},
+                              timeout=_list_stats_timeout())
+    return stats
+
+
+def get_table_rows_estimate(model):
+    """
+    读取表统计信息估算行数(仅MySQL)，其他数据库返回None
+    统计信息本身也会缓存一段时间，避免频繁查询information_schema
+    """
+    connection = connections[model.objects.db]
+    if connection.vendor != 'mysql':
+        return None
+    table = model._meta.db_table
+    key = f'{TABLE_ROWS_PREFIX}{table}'
+    rows = cache.get(key)
+    if rows is None:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT TABLE_ROWS FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s',
+                [table]
+            )
+            row = cursor.fetchone()
+        rows = int(row[0] or 0) if row else 0
+        cache.set(key, rows, timeout=getattr(settings, 'TABLE_ROWS_CACHE_TIMEOUT', 300))
+    return rows
+
+
+def get_estimated_count(queryset):
+    """
+    估算总数，返回(总数, 是否为估算值)
+    只有无过滤条件且表行数超过阈值时才使用统计信息，否则退回带缓存的精确计数
+    """
+    if not queryset.query.where:
+        rows = get_table_rows_estimate(queryset.model)
+        if rows is not None and rows >= getattr(settings, 'PAGINATION_ESTIMATE_THRESHOLD', 100000):
+            return rows, True
+    return get_cached_count(queryset), False
+
+
+def _on_model_changed(sender, using=None, **kwargs):
+    bump_model_version(sender, using=using)
+
+
+_tracked_models = set()
+
+
+def track_model_versions(*models):
+    """
+    登记有缓存依赖的模型，其post_save/post_delete时自增版本号
+    只为登记的模型连接信号：其他模型(日志、会话等)写入时不访问Redis，QuerySet.delete()也仍可使用快速删除
+    APIViewSet子类定义时自动登记其模型与cache_dependencies，其他缓存(权限、菜单等)在使用处登记
+    """
+    for model in models:
+        if model is None or model in _tracked_models:
+            continue
+        _tracked_models.add(model)
+        label = model._meta.label_lower
+        post_save.connect(_on_model_changed, sender=model, dispatch_uid=f'base_cache_model_version_save:{label}')
+        post_delete.connect(_on_model_changed, sender=model, dispatch_uid=f'base_cache_model_version_delete:{label}')
@@ -0,0 +1,133 @@
+"""
+只读快速序列化
+对 fields='__all__' 这类没有自定义逻辑的ModelSerializer，按字段类型预先生成 行字典 -> 输出字典 的转换函数，
+列表接口直接转换 .values() 的结果，跳过模型实例构造与DRF逐字段的get_attribute/to_representation，
+输出(字段顺序、取值格式)与DRF序列化结果完全一致
+
+不满足条件(自定义to_representation、SerializerMethodField、跨表source、文件字段等)时返回None，继续使用DRF序列化
+"""
+import threading
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import fields as drf_fields, serializers
+from rest_framework.relations import PrimaryKeyRelatedField
+from rest_framework.settings import api_settings
+
+BigIntegerField = getattr(drf_fields, 'BigIntegerField', None)  # 旧版本DRF没有该字段
+
+
+def _is_iso(field, default):
+    output_format = getattr(field, 'format', default)
+    return output_format is not None and output_format.lower() == drf_fields.ISO_8601
+
+
+def _uses(field, cls):
+    """字段的to_representation未被子类改写"""
+    return isinstance(field, cls) and type(field).to_representation is cls.to_representation
+
+
+def _expression(field):
+    """
+    返回字段非空值的转换表达式模板({v}为取值)，需调用字段自身方法时返回(表达式, 方法)，不支持的字段返回None
+    与DRF一致：取值为None时直接输出None，不调用to_representation
+    """
+    if _uses(field, PrimaryKeyRelatedField):
+        # values()中外键列即为主键值，等同于DRF的value.pk
+        return '{v}' if field.pk_field is None else None
+    if _uses(field, drf_fields.ReadOnlyField):
+        return '{v}'
+    if BigIntegerField is not None and _uses(field, BigIntegerField):
+        # BigAutoField主键，DRF 3.15+ 可配置输出为字符串
+        if getattr(field, 'coerce_to_string', getattr(api_settings, 'COERCE_BIGINT_TO_STRING', False)):
+            return 'str({v})'
+        return 'int({v})'
+    if _uses(field, drf_fields.IntegerField):
+        return 'int({v})'
+    if _uses(field, drf_fields.FloatField):
+        return 'float({v})'
+    if _uses(field, drf_fields.CharField):
+        return 'str({v})'
+    if _uses(field, drf_fields.DateTimeField):
+        # 不开启时区时enforce_timezone不改变数据库返回的naive时间
+        if _is_iso(field, api_settings.DATETIME_FORMAT) and not settings.USE_TZ:
+            return '{v}.isoformat()'
+        return '{f}({v})', field.to_representation
+    if _uses(field, drf_fields.DateField):
+        if _is_iso(field, api_settings.DATE_FORMAT):
+            return '{v}.isoformat()'
+        return '{f}({v})', field.to_representation
+    if _uses(field, drf_fields.TimeField):
+        if _is_iso(field, api_settings.TIME_FORMAT):
+            return '{v}.isoformat()'
+        return '{f}({v})', field.to_representation
+    if (_uses(field, drf_fields.DecimalField) or _uses(field, drf_fields.ChoiceField)
+            or _uses(field, drf_fields.BooleanField)):
+        # 量化/选项映射等逻辑直接复用字段自身方法
+        return '{f}({v})', field.to_representation
+    return None
+
+
+class FastSerializer:
+    """预编译的只读序列化器"""
+
+    def __init__(self, columns, convert):
+        self.columns = columns  # .values()需要查询的列
+        self.convert = convert  # 行字典 -> 输出字典
+
+    def to_representation_many(self, rows):
+        convert = self.convert
+        return [convert(row) for row in rows]
+
+
+def compile_serializer(serializer, model):
+    """为序列化器生成转换函数，不满足条件时返回None"""
+    if not isinstance(serializer, serializers.ModelSerializer):
+        return None
+    if type(serializer).to_representation is not serializers.Serializer.to_representation:
+        return None
+
+    columns = []
+    lines = []
+    items = []
+    namespace = {}
+    for index, field in enumerate(f for f in serializer.fields.values() if not f.write_only):
+        if field.source == '*' or '.' in field.source:
+            return None
+        try:
+            model_field = model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            return None
+        if not model_field.concrete or model_field.many_to_many:
+            return None
+        if model_field.is_relation != isinstance(field, PrimaryKeyRelatedField):
+            return None
+        expression = _expression(field)
+        if expression is None:
+            return None
+        if isinstance(expression, tuple):
+            expression, method = expression
+            namespace[f'f{index}'] = method
+        expression = expression.format(v=f'v{index}', f=f'f{index}')
+
+        columns.append(model_field.attname)
+        lines.append(f'    v{index} = row[{model_field.attname!r}]')
+        items.append(f'        {field.field_name!r}: None if v{index} is None else {expression},')
+
+    source = '\n'.join(['def convert(row):', *lines, '    return {', *items, '    }'])
+    exec(compile(source, f'<fast serializer {type(serializer).__name__}>', 'exec'), namespace)
+    return FastSerializer(columns, namespace['convert'])
+
+
+_compiled = {}
+_lock = threading.Lock()
+
+
+def get_fast_serializer(serializer, model):
+    """按 序列化器类 + 输出字段 缓存编译结果(含不支持的结果)"""
+    serializer = getattr(serializer, 'child', serializer)
+    key = (type(serializer), model, tuple(serializer.fields.keys()))
+    if key not in _compiled:
+        fast_serializer = compile_serializer(serializer, model)
+        with _lock:
+            _compiled[key] = fast_serializer
+    return _compiled[key]
@@ -0,0 +1,133 @@
+"""
+声明式过滤与排序
+APIViewSet.filter_spec 声明可过滤字段及允许的运算符，ordering_fields 声明可排序字段，例如
+
+    filter_spec = {'exam_date': ['gte', 'lte'], 'course': ['exact', 'in']}
+    ordering_fields = ['exam_date', 'id']
+
+对应请求 ?exam_date__gte=2024-06-01&exam_date__lte=2024-07-01&course__in=1,2&ordering=-exam_date,id
+
+- 只有带索引的列(主键、唯一、db_index、外键、Meta.indexes的首列)可以声明，视图类定义时校验，
+  配置错误在启动(加载URL配置)时抛出ImproperlyConfigured
+- 参数按模型字段类型转换，格式错误、已声明字段使用未声明的运算符时抛出QueryInvalid，未声明字段的参数不处理
+- 表数据量超过 FILTER_FULL_SCAN_THRESHOLD 时，带过滤条件但没有一个条件落在索引列上的请求会被拒绝
+"""
+from functools import lru_cache
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured, ValidationError
+from django.db.models import Q
+from core.exceptions import QueryInvalid
+from Base.Cache import get_table_rows_estimate
+
+LOOKUPS = ('exact', 'gt', 'gte', 'lt', 'lte', 'in')
+
+
+@lru_cache(maxsize=None)
+def get_indexed_fields(model):
+    """可以走索引的字段名：主键、唯一、db_index(含外键)，以及联合索引/唯一约束的首列"""
+    opts = model._meta
+    names = {field.name for field in opts.concrete_fields if field.primary_key or field.unique or field.db_index}
+    leading = [index.fields[0] for index in opts.indexes if index.fields]
+    leading += [fields[0] for fields in opts.unique_together if fields]
+    leading += [fields[0] for fields in getattr(opts, 'index_together', ()) if fields]
+    leading += [constraint.fields[0] for constraint in opts.constraints if getattr(constraint, 'fields', None)]
+    names.update(name.lstrip('-') for name in leading)
+    return frozenset(names)
+
+
+def _check_indexed_field(view_class, model, name):
+    try:
+        model._meta.get_field(name)
+    except FieldDoesNotExist:
+        raise ImproperlyConfigured(f'{view_class.__name__}: {model.__name__}没有字段{name}')
+    if name not in get_indexed_fields(model):
+        raise ImproperlyConfigured(f'{view_class.__name__}: {model.__name__}.{name}没有索引，不能用于过滤或排序')
+
+
+def validate_filter_config(view_class, model):
+    """校验视图的filter_spec与ordering_fields，在视图类定义时调用"""
+    for name, lookups in view_class.filter_spec.items():
+        _check_indexed_field(view_class, model, name)
+        unknown = set(lookups) - set(LOOKUPS)
+        if isinstance(lookups, str) or unknown:
+            raise ImproperlyConfigured(
+                f'{view_class.__name__}: filter_spec[{name!r}]需为运算符列表，可选{", ".join(LOOKUPS)}'
+            )
+    for name in view_class.ordering_fields:
+        _check_indexed_field(view_class, model, name.lstrip('-'))
+
+
+def _to_python(field, param, value):
+    try:
+        return field.to_python(value)
+    except ValidationError:
+        raise QueryInvalid(f'参数{param}格式错误')
+
+
+def build_filter(view, model, query_params):
+    """按filter_spec解析查询参数，返回(查询条件, 使用到的字段集合)"""
+    condition = Q()
+    used = set()
+    spec = view.filter_spec
+    for param, value in query_params.items():
+        name, _, lookup = param.partition('__')
+        if name not in spec:
+            # 未声明的字段交给其他过滤方式(filter_fields等)或忽略
+            continue
+        lookup = lookup or 'exact'
+        if lookup not in spec[name]:
+            raise QueryInvalid(f'不支持的过滤条件: {param}')
+        if value == '':
+            continue
+        field = model._meta.get_field(name)
+        if lookup == 'in':
+            values = [v for v in value.split(',') if v]
+            if len(values) > view.filter_in_limit:
+                raise QueryInvalid(f'参数{param}最多{view.filter_in_limit}个值')
+            value = [_to_python(field, param, v) for v in values]
+        else:
+            value = _to_python(field, param, value)
+        condition &= Q(**{f'{name}__{lookup}': value})
+        used.add(name)
+    return condition, used
+
+
+def build_ordering(view, model, query_params):
+    """解析ordering参数，返回order_by列表(末尾补主键保证顺序稳定)，未指定时返回None"""
+    value = query_params.get(view.ordering_query_param)
+    if not value:
+        return None
+    ordering = []
+    for item in value.split(','):
+        item = item.strip()
+        name = item.lstrip('-')
+        if not name:
+            continue
+        if name not in view.ordering_fields:
+            raise QueryInvalid(f'不支持的排序字段: {name}')
+        ordering.append(item)
+    if not ordering:
+        return None
+    pk_name = model._meta.pk.name
+    if not any(item.lstrip('-') in (pk_name, 'pk') for item in ordering):
+        ordering.append(pk_name)
+    return ordering
+
+
+def needs_full_scan_check(model, used):
+    """有过滤条件但没有一个在索引列上"""
+    return bool(used) and not (used & get_indexed_fields(model))
+
+
+def check_full_scan(view, model):
+    """
+    表行数(估算)超过阈值时拒绝没有索引条件的过滤，避免大表全表扫描
+    无过滤条件的请求由分页限制读取行数，不做限制；无法估算行数的数据库不做限制
+    """
+    threshold = view.full_scan_threshold
+    if threshold is None:
+        threshold = getattr(settings, 'FILTER_FULL_SCAN_THRESHOLD', 100000)
+    rows = get_table_rows_estimate(model)
+    if rows is not None and rows >= threshold:
+        fields = ', '.join(sorted(get_indexed_fields(model) & (set(view.filter_spec) | {model._meta.pk.name})))
+        raise QueryInvalid(f'数据量过大，请至少使用一个索引字段过滤: {fields}')
@@ -1,6 +1,34 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import json
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination, BasePagination
 from rest_framework import status
 from Base.Response import APIResponse
+from Base.Cache import get_cached_count, get_estimated_count
+from core.exceptions import QueryInvalid
+
+
+class CountPaginator(Paginator):
+    """总数走缓存的分页器，开启估算时大表直接读取统计信息"""
+
+    def __init__(self, *args, estimate=False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.estimate = estimate
+        self.approximate = False  # 总数是否为估算值
+
+    @cached_property
+    def count(self):
+        if not hasattr(self.object_list, 'query'):
+            return super().count
+        if self.estimate:
+            count, self.approximate = get_estimated_count(self.object_list)
+            return count
+        return get_cached_count(self.object_list)
 
 
 class CustomPagination(PageNumberPagination):
@@ -8,22 +36,174 @@ class CustomPagination(PageNumberPagination):
     page_size = 10  # 默认每页数量
     page_size_query_param = 'page_size'  # 允许客户端通过参数指定每页数量
     max_page_size = 20  # 每页最大数量限制
+    estimate = False  # 是否估算总数
+
+    def django_paginator_class(self, object_list, per_page):
+        """构造分页器，带上总数估算配置"""
+        return CountPaginator(object_list, per_page, estimate=self.estimate)
+
+    @staticmethod
+    def get_estimate(view):
+        """视图的count_estimate优先，未配置时使用全局配置"""
+        estimate = getattr(view, 'count_estimate', None)
+        return getattr(settings, 'PAGINATION_COUNT_ESTIMATE', False) if estimate is None else estimate
 
     def paginate_queryset(self, queryset, request, view=None):
+        self.estimate = self.get_estimate(view)
         try:
             return super().paginate_queryset(queryset, request, view)
-        except Exception as e:
-            # 捕获所有分页错误,阻止自带的返回NOTFOUND错误
-            return None
+        except NotFound:
+            # 页码无效或超出范围时返回400，不退回为不分页的完整列表
+            raise QueryInvalid('页码无效')
 
     def get_paginated_response(self, data):
         """重写响应格式"""
         if data is None:
             return APIResponse(data=None, code=404, msg='数据不存在', status=status.HTTP_404_NOT_FOUND)
             # return APIResponse(data=None, code=400, msg="请求的页码不存在或无效", status=status.HTTP_400_BAD_REQUEST)
+        return self.build_response(self.page.paginator.count, self.page.number, self.page.paginator.per_page,
+                                   data, self.page.paginator.approximate)
+
+    @staticmethod
+    def build_response(total, page_num, page_size, data, approximate=False):
+        return APIResponse({
+            'total': total,
+            'page_num': page_num,
+            'page_size': page_size,
+            'list': data,
+            'approximate': approximate  # 总数是否为估算值
+        })
+
+
+class KeysetPagination(BasePagination):
+    """
+    游标分页(keyset)
+    按 (排序字段, 主键) 组合定位，不做 OFFSET 扫描也不统计总数，深分页与首页开销一致
+    视图通过 pagination_class = KeysetPagination 启用，通过 cursor_ordering 指定排序字段(需有索引)
+    """
+    cursor_query_param = 'cursor'  # 游标参数
+    page_size = 10  # 默认每页数量
+    page_size_query_param = 'page_size'  # 允许客户端通过参数指定每页数量
+    max_page_size = 20  # 每页最大数量限制
+    ordering = '-id'  # 默认排序，视图的cursor_ordering优先
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.field, self.descending = self.get_ordering(view)
+        self.model = queryset.model
+        self.has_next = self.has_previous = False
+        self.next_position = self.previous_position = None
+
+        cursor = self.decode_cursor(request)
+        reverse = bool(cursor and cursor['r'])  # 是否向前翻页
+
+        # 向前翻页时反转排序方向，取完再翻转回来
+        descending = self.descending != reverse
+        prefix = '-' if descending else ''
+        order_by = [f'{prefix}{self.field}'] if self.field == 'pk' else [f'{prefix}{self.field}', f'{prefix}pk']
+        queryset = queryset.order_by(*order_by)
+
+        if cursor:
+            queryset = queryset.filter(self.build_condition(cursor, descending))
+
+        # 多取一条用于判断是否还有下一页
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+
+        if reverse:
+            results.reverse()
+            self.has_previous = has_more
+            self.has_next = True
+        else:
+            self.has_next = has_more
+            self.has_previous = cursor is not None
+
+        if results:
+            self.previous_position = self.get_position(results[0])
+            self.next_position = self.get_position(results[-1])
+        return results
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_ordering(self, view):
+        """解析排序字段，返回(字段名, 是否倒序)"""
+        ordering = getattr(view, 'cursor_ordering', None) or self.ordering
+        descending = ordering.startswith('-')
+        field = ordering.lstrip('-')
+        if field in ('id', 'pk'):
+            field = 'pk'
+        return field, descending
+
+    def build_condition(self, cursor, descending):
+        """构造游标之后的查询条件"""
+        lookup = 'lt' if descending else 'gt'
+        if self.field == 'pk':
+            return Q(**{f'pk__{lookup}': cursor['id']})
+        value = cursor['v']
+        return Q(**{f'{self.field}__{lookup}': value}) | Q(**{self.field: value, f'pk__{lookup}': cursor['id']})
+
+    def get_position(self, item):
+        """获取记录在排序中的位置(排序值, 主键)"""
+        if isinstance(item, dict):
+            pk = item.get('pk', item.get(self.model._meta.pk.attname))
+            value = item.get(self.field) if self.field != 'pk' else None
+        else:
+            pk = item.pk
+            value = getattr(item, self.field) if self.field != 'pk' else None
+        return value, pk
+
+    def encode_cursor(self, position, reverse):
+        value, pk = position
+        if value is not None and self.field != 'pk':
+            value = self.model._meta.get_field(self.field).value_to_string(self._wrap(value))
+        payload = json.dumps({'v': value, 'id': pk, 'r': int(reverse)}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            padding = '=' * (-len(encoded) % 4)
+            cursor = json.loads(base64.urlsafe_b64decode(encoded + padding).decode('utf-8'))
+            if self.field != 'pk':
+                cursor['v'] = self.model._meta.get_field(self.field).to_python(cursor['v'])
+            return {'v': cursor.get('v'), 'id': int(cursor['id']), 'r': bool(cursor.get('r'))}
+        except (TypeError, ValueError, KeyError, ValidationError, FieldDoesNotExist):
+            raise QueryInvalid('无效的游标')
+
+    def _wrap(self, value):
+        """value_to_string需要模型实例，构造一个只带排序字段的临时实例"""
+        instance = self.model()
+        setattr(instance, self.model._meta.get_field(self.field).attname, value)
+        return instance
+
+    def get_next_link(self):
+        if not self.has_next or self.next_position is None:
+            return None
+        return self.encode_cursor(self.next_position, reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or self.previous_position is None:
+            return None
+        return self.encode_cursor(self.previous_position, reverse=True)
+
+    def get_paginated_response(self, data):
+        """沿用CustomPagination的响应结构，total与page_num置空，额外返回前后游标"""
         return APIResponse({
-            'total': self.page.paginator.count,
-            'page_num': self.page.number,
+            'total': None,
+            'page_num': None,
             'page_size': self.page_size,
-            'list': data
+            'list': data,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link()
         })
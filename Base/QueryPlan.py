@@ -0,0 +1,108 @@
+"""
+关联查询规划
+根据序列化器的关联字段、嵌套序列化器与source路径，推导需要的select_related/prefetch_related，避免N+1查询
+"""
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.serializers import BaseSerializer, ListSerializer
+from rest_framework.relations import RelatedField, ManyRelatedField
+
+
+class QueryPlan:
+    """关联查询计划"""
+
+    def __init__(self, select_related=None, prefetch_related=None):
+        self.select_related = set(select_related or [])
+        self.prefetch_related = set(prefetch_related or [])
+
+    def __bool__(self):
+        return bool(self.select_related or self.prefetch_related)
+
+    def __str__(self):
+        return f"select={','.join(sorted(self.select_related))}; prefetch={','.join(sorted(self.prefetch_related))}"
+
+    def add(self, path, many):
+        """添加关联路径，路径上存在多值关联时只能使用prefetch_related"""
+        if many:
+            self.prefetch_related.add(path)
+        else:
+            self.select_related.add(path)
+
+    def apply(self, queryset):
+        # 已被更长路径覆盖的前缀无需重复声明
+        select_related = [p for p in self.select_related
+                          if not any(o.startswith(f'{p}__') for o in self.select_related)]
+        if select_related:
+            queryset = queryset.select_related(*sorted(select_related))
+        if self.prefetch_related:
+            queryset = queryset.prefetch_related(*sorted(self.prefetch_related))
+        return queryset
+
+
+def _get_field(model, name):
+    """按字段名或反向关联的访问名(如 xxx_set)查找模型字段"""
+    try:
+        return model._meta.get_field(name)
+    except FieldDoesNotExist:
+        for rel in model._meta.related_objects:
+            if rel.get_accessor_name() == name:
+                return rel
+    return None
+
+
+def _resolve_relations(model, parts):
+    """
+    沿source路径解析关联字段
+    返回(关联路径列表, 路径终点模型, 是否经过多值关联)，遇到非关联字段或非模型属性即停止
+    """
+    relations = []
+    many = False
+    for part in parts:
+        field = _get_field(model, part)
+        if field is None or not field.is_relation or field.related_model is None:
+            break
+        relations.append(part)
+        many = many or field.many_to_many or field.one_to_many
+        model = field.related_model
+    return relations, model, many
+
+
+def _walk(fields, model, prefix, plan, in_many):
+    for field in fields.values():
+        if field.write_only:
+            continue
+
+        nested = None
+        if isinstance(field, ListSerializer):
+            nested = field.child
+        elif isinstance(field, BaseSerializer):
+            nested = field
+
+        if field.source == '*':
+            # source为整个对象的嵌套序列化器，沿用当前模型继续规划
+            if nested is not None and hasattr(nested, 'fields'):
+                _walk(nested.fields, model, prefix, plan, in_many)
+            continue
+
+        parts = field.source.split('.')
+        relations, related_model, many = _resolve_relations(model, parts)
+        if not relations:
+            continue
+
+        # 主键关联字段只读取外键列，无需关联查询
+        if isinstance(field, RelatedField) and len(parts) == 1 and not many and field.use_pk_only_optimization():
+            continue
+
+        path = '__'.join(prefix + relations)
+        many = many or in_many or isinstance(field, ManyRelatedField)
+        plan.add(path, many)
+
+        if nested is not None and hasattr(nested, 'fields') and len(relations) == len(parts):
+            _walk(nested.fields, related_model, prefix + relations, plan, many)
+
+
+def build_query_plan(serializer, model):
+    """根据序列化器生成关联查询计划"""
+    plan = QueryPlan()
+    serializer = getattr(serializer, 'child', serializer)
+    _walk(serializer.fields, model, [], plan, False)
+    return plan
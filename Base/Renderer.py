@@ -0,0 +1,17 @@
+from rest_framework.renderers import JSONRenderer
+from utils import fastjson
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSON渲染器
+    使用utils.fastjson(orjson)序列化，输出与JSONRenderer一致；需要缩进(如可浏览API)时仍使用JSONRenderer
+    例外：NaN/Infinity浮点数，JSONRenderer抛出ValueError，orjson输出为null(数据库中的FLOAT列不会出现这类值)
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        return fastjson.dumps(data)
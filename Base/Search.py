@@ -0,0 +1,304 @@
+"""
+搜索后端
+APIViewSet.search_fields 与 *field* 模糊查询统一交给搜索后端处理，通过 SEARCH_BACKEND 配置：
+
+- auto: MySQL使用全文索引，其他数据库(SQLite/测试)使用进程内n-gram倒排索引
+- Base.Search.IcontainsSearchBackend: 原有的 __icontains 全表扫描
+- Base.Search.MySQLFulltextSearchBackend: MATCH ... AGAINST，需要为搜索列建立ngram全文索引，例如
+    ALTER TABLE cp_library_book ADD FULLTEXT INDEX ft_title (title) WITH PARSER ngram;
+    ALTER TABLE ac_course ADD FULLTEXT INDEX ft_name (name) WITH PARSER ngram;
+    ALTER TABLE cp_notification ADD FULLTEXT INDEX ft_title (title) WITH PARSER ngram;
+    ALTER TABLE cp_notification ADD FULLTEXT INDEX ft_content (content) WITH PARSER ngram;
+    ALTER TABLE user ADD FULLTEXT INDEX ft_username (username) WITH PARSER ngram;
+    ALTER TABLE user ADD FULLTEXT INDEX ft_phone (phone) WITH PARSER ngram;
+  未建立全文索引的列自动退回 __icontains
+- Base.Search.NgramSearchBackend: 进程内 单字+双字 倒排索引，适合中文，只用于小表(开发/测试环境)：
+  任何写入(本进程、其他进程、批量写入)都会在提交后改变模型版本号，每隔 SEARCH_NGRAM_REFRESH_INTERVAL 秒
+  校验一次，版本号变化后整表重建；表行数超过 SEARCH_NGRAM_MAX_ROWS 时不建索引，
+  命中记录超过 SEARCH_NGRAM_MAX_CANDIDATES 时，均退回 __icontains
+
+两种索引后端都会按相关度排序结果
+"""
+import math
+import threading
+import time
+from collections import Counter
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db import connections
+from django.db.models import Q, Case, When, Value, IntegerField, FloatField
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+from Base.Cache import get_model_version, track_model_versions
+
+
+def _get_local_field(model, name):
+    """获取本表的文本字段，跨表路径或非字段返回None"""
+    if '__' in name:
+        return None
+    try:
+        field = model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return None
+    if not field.concrete or field.is_relation:
+        return None
+    return field
+
+
+class IcontainsSearchBackend:
+    """__icontains 模糊查询"""
+    uses_index = False  # 是否由索引处理搜索，否则为全表扫描，列表接口需要做全表扫描检查
+
+    def is_indexed(self, model, terms):
+        """本次搜索的全部字段是否都走索引"""
+        return self.uses_index
+
+    def search(self, queryset, terms):
+        conditions = Q()
+        for field, value in terms.items():
+            conditions &= Q(**{f'{field}__icontains': value})
+        return queryset.filter(conditions) if conditions else queryset
+
+
+class MySQLFulltextSearchBackend(IcontainsSearchBackend):
+    """MySQL全文索引(ngram解析器)搜索，按MATCH相关度倒序"""
+    uses_index = True
+    min_token_size = 2  # 与MySQL ngram_token_size保持一致，更短的关键词走__icontains
+    _fulltext_columns = {}  # 表名 -> 建有单列全文索引的列
+    _lock = threading.Lock()
+
+    def get_fulltext_columns(self, model):
+        """读取表上的单列全文索引，进程内缓存"""
+        table = model._meta.db_table
+        if table not in self._fulltext_columns:
+            connection = connections[model.objects.db]
+            with connection.cursor() as cursor:
+                cursor.execute(f'SHOW INDEX FROM {connection.ops.quote_name(table)}')
+                columns = [col[0] for col in cursor.description]
+                indexes = {}
+                for row in cursor.fetchall():
+                    info = dict(zip(columns, row))
+                    if info.get('Index_type') == 'FULLTEXT':
+                        indexes.setdefault(info['Key_name'], []).append(info['Column_name'])
+            with self._lock:
+                self._fulltext_columns[table] = {cols[0] for cols in indexes.values() if len(cols) == 1}
+        return self._fulltext_columns[table]
+
+    def is_indexed(self, model, terms):
+        """没有全文索引的列、过短的关键词退回__icontains"""
+        for field, value in terms.items():
+            model_field = _get_local_field(model, field)
+            if (model_field is None or len(value.replace('"', ' ').strip()) < self.min_token_size
+                    or model_field.column not in self.get_fulltext_columns(model)):
+                return False
+        return True
+
+    def search(self, queryset, terms):
+        model = queryset.model
+        connection = connections[queryset.db]
+        fallback = {}
+        relevance = []
+        for field, value in terms.items():
+            model_field = _get_local_field(model, field)
+            keyword = value.replace('"', ' ').strip()
+            if (model_field is None or len(keyword) < self.min_token_size
+                    or model_field.column not in self.get_fulltext_columns(model)):
+                fallback[field] = value
+                continue
+            column = f'{connection.ops.quote_name(model._meta.db_table)}.{connection.ops.quote_name(model_field.column)}'
+            # 短语匹配，ngram解析器下等价于子串匹配
+            alias = f'_search_rank_{len(relevance)}'
+            queryset = queryset.annotate(**{
+                alias: RawSQL(f'MATCH ({column}) AGAINST (%s IN BOOLEAN MODE)', [f'"{keyword}"'],
+                              output_field=FloatField())
+            }).filter(**{f'{alias}__gt': 0})
+            relevance.append(alias)
+
+        queryset = super().search(queryset, fallback)
+        if relevance:
+            queryset = queryset.order_by(*[f'-{alias}' for alias in relevance])
+        return queryset
+
+
+def tokenize(text):
+    """切分为 单字 + 相邻双字，中文无需分词，英文/数字同样可做子串匹配"""
+    grams = Counter()
+    for segment in str(text).lower().split():
+        grams.update(segment)
+        grams.update(segment[i:i + 2] for i in range(len(segment) - 1))
+    return grams
+
+
+def query_grams(keyword):
+    """关键词对应的检索项：长度大于1时只用双字，否则用单字"""
+    grams = set()
+    for segment in keyword.lower().split():
+        if len(segment) == 1:
+            grams.add(segment)
+        else:
+            grams.update(segment[i:i + 2] for i in range(len(segment) - 1))
+    return grams
+
+
+class NgramIndex:
+    """
+    单个模型字段的倒排索引
+    以模型版本号判断是否过期，版本号变化后整表重建，因此限制表行数(max_rows)；
+    重建时先构建新索引再整体替换，重建期间的检索使用旧索引
+    """
+    oversized_interval = 300  # 超过max_rows的表，重新统计行数的最短间隔(秒)
+
+    def __init__(self, model, field, max_rows=50000, refresh_interval=1.0):
+        self.model = model
+        self.field = field
+        self.max_rows = max_rows
+        self.refresh_interval = refresh_interval  # 校验版本号的最短间隔(秒)
+        self.version = None
+        self.oversized = False  # 表行数超过max_rows，不建立索引
+        self.postings = {}  # gram -> {pk: 词频}
+        self.documents = {}  # pk -> Counter(gram)
+        self.lock = threading.Lock()  # 保护postings/documents的读取与替换
+        self.build_lock = threading.Lock()  # 同一时间只有一个线程重建
+        self._checked_at = 0.0
+
+    def build(self):
+        """读取整表重建索引"""
+        # 先读版本号再读数据，读取期间的写入会让版本号再次变化，下次校验时重建
+        version = get_model_version(self.model)
+        manager = self.model._default_manager
+        oversized = manager.count() > self.max_rows
+        postings = {}
+        documents = {}
+        if not oversized:
+            for pk, text in manager.values_list('pk', self.field).iterator(chunk_size=2000):
+                if not text:
+                    continue
+                grams = tokenize(text)
+                documents[pk] = grams
+                for gram, tf in grams.items():
+                    postings.setdefault(gram, {})[pk] = tf
+        with self.lock:
+            self.version = version
+            self.oversized = oversized
+            self.postings = postings
+            self.documents = documents
+
+    def ensure_current(self):
+        """
+        每隔refresh_interval秒校验一次版本号，与当前模型版本不一致时重建；超过max_rows的表按oversized_interval
+        重新统计行数，表变小后恢复索引。间隔内新写入的记录可能搜不到，已删除/修改的记录由调用方用原条件校验排除
+        """
+        interval = self.oversized_interval if self.oversized else self.refresh_interval
+        if self.version is not None and time.monotonic() - self._checked_at < interval:
+            return
+        # 已有索引时不等待其他线程的重建，先使用旧索引
+        if not self.build_lock.acquire(blocking=self.version is None):
+            return
+        try:
+            now = time.monotonic()
+            if self.version is not None and now - self._checked_at < interval:
+                return
+            self._checked_at = now
+            if self.version != get_model_version(self.model):
+                self.build()
+        finally:
+            self.build_lock.release()
+
+    def search(self, keyword):
+        """返回 {pk: 相关度}"""
+        grams = query_grams(keyword)
+        if not grams:
+            return {}
+        with self.lock:
+            postings = [self.postings.get(gram) for gram in grams]
+            if not all(postings):
+                return {}
+            total = len(self.documents) or 1
+            postings.sort(key=len)
+            candidates = set(postings[0])
+            for posting in postings[1:]:
+                candidates &= posting.keys()
+            scores = {}
+            for pk in candidates:
+                length = sum(self.documents[pk].values())
+                score = sum(posting[pk] * math.log(1 + total / len(posting)) for posting in postings)
+                scores[pk] = score / math.sqrt(length)
+            return scores
+
+
+class NgramSearchBackend(IcontainsSearchBackend):
+    """进程内n-gram倒排索引搜索"""
+    uses_index = True
+    max_ranked = 100  # 参与相关度排序的最大记录数，其余排在后面
+    _indexes = {}  # (模型label, 字段) -> NgramIndex
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_index(cls, model, field):
+        key = (model._meta.label_lower, field)
+        index = cls._indexes.get(key)
+        if index is None:
+            with cls._lock:
+                index = cls._indexes.get(key)
+                if index is None:
+                    index = NgramIndex(
+                        model, field,
+                        max_rows=getattr(settings, 'SEARCH_NGRAM_MAX_ROWS', 50000),
+                        refresh_interval=getattr(settings, 'SEARCH_NGRAM_REFRESH_INTERVAL', 1.0),
+                    )
+                    cls._indexes[key] = index
+                    # 索引以模型版本号判断是否过期
+                    track_model_versions(model)
+        index.ensure_current()
+        return index
+
+    def is_indexed(self, model, terms):
+        """跨表字段、超过行数上限的表退回__icontains"""
+        for field in terms:
+            if _get_local_field(model, field) is None or self.get_index(model, field).oversized:
+                return False
+        return True
+
+    def search(self, queryset, terms):
+        model = queryset.model
+        fallback = {}
+        scores = None
+        for field, value in terms.items():
+            index = None if _get_local_field(model, field) is None else self.get_index(model, field)
+            if index is None or index.oversized:
+                fallback[field] = value
+                continue
+            matched = index.search(value)
+            if scores is None:
+                scores = matched
+            else:
+                scores = {pk: scores[pk] + score for pk, score in matched.items() if pk in scores}
+            # 倒排索引按字切分，再用原条件在候选集内精确校验
+            fallback[field] = value
+
+        if scores is None:
+            return super().search(queryset, fallback)
+        if not scores:
+            return queryset.none()
+        if len(scores) > getattr(settings, 'SEARCH_NGRAM_MAX_CANDIDATES', 1000):
+            # 常见词命中过多，不把主键列表带入SQL，直接用原条件查询(不排序)
+            return super().search(queryset, fallback)
+
+        queryset = super().search(queryset.filter(pk__in=list(scores)), fallback)
+        ranked = sorted(scores, key=scores.get, reverse=True)[:self.max_ranked]
+        rank = Case(*[When(pk=pk, then=Value(i)) for i, pk in enumerate(ranked)],
+                    default=Value(len(ranked)), output_field=IntegerField())
+        return queryset.annotate(_search_rank=rank).order_by('_search_rank', 'pk')
+
+
+def get_search_backend(backend=None):
+    """获取搜索后端实例，backend可为类或导入路径，默认读取SEARCH_BACKEND配置"""
+    backend = backend or getattr(settings, 'SEARCH_BACKEND', 'auto')
+    if backend == 'auto':
+        if connections['default'].vendor == 'mysql':
+            return MySQLFulltextSearchBackend()
+        return NgramSearchBackend()
+    if isinstance(backend, str):
+        backend = import_string(backend)
+    return backend()
+
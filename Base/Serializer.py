@@ -0,0 +1,33 @@
+from rest_framework import serializers
+
+
+class BulkUpdateListSerializer(serializers.ListSerializer):
+    """
+    批量更新用的列表序列化器
+    按每条数据的id匹配实例后再校验，校验结果与输入一一对应
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.instance_map = {str(obj.pk): obj for obj in (self.instance or [])}
+
+    def get_child_instance(self, data):
+        pk = data.get('id') if isinstance(data, dict) else None
+        return self.instance_map.get(str(pk)) if pk is not None else None
+
+    def run_child_validation(self, data):
+        instance = self.get_child_instance(data)
+        if instance is None:
+            raise serializers.ValidationError({'id': '缺少id字段或数据不存在'})
+        self.child.instance = instance
+        self.child.initial_data = data
+        return super().run_child_validation(data)
+
+    def get_ordered_instances(self):
+        """与validated_data顺序一致的实例列表"""
+        return [self.get_child_instance(data) for data in self.initial_data]
+
+    def update(self, instances, validated_data):
+        """逐条调用子序列化器的update(子序列化器自定义了update时使用)"""
+        return [self.child.update(instance, attrs)
+                for instance, attrs in zip(self.get_ordered_instances(), validated_data)]
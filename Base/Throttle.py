@@ -0,0 +1,220 @@
+"""
+滑动窗口限流
+    class LoginView(APIView):
+        throttle_classes = [IPRateThrottle, AccountRateThrottle]
+        throttle_scope = 'login'  # 使用 DEFAULT_THROTTLE_RATES 中的 login_ip / login_account
+
+- 窗口内的请求时间记录在Redis有序集合中，清理过期记录、计数、写入在一段Lua脚本内原子完成，多进程共享同一计数
+- 被拒绝的key在本进程内记住到可以再次请求的时间，窗口内的后续请求直接拒绝，不再访问Redis(攻击流量集中在被拒绝的key上)
+- 缓存后端不是django-redis时退回django缓存保存时间列表(非原子，仅用于开发环境)
+"""
+import logging
+import math
+import re
+import threading
+import time
+import uuid
+from django.core.cache import cache
+from rest_framework import exceptions
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+from Base.Response import APIResponse
+
+logger = logging.getLogger(__name__)
+
+THROTTLE_PREFIX = 'throttle:'
+RATE = re.compile(r'^(\d+)/(\d*)([smhd])')
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+# KEYS[1]: 有序集合；ARGV: 窗口(毫秒)、上限、本次请求的成员。返回0表示放行，否则为需要等待的毫秒数
+SLIDING_WINDOW = """
+local now = redis.call('TIME')
+now = tonumber(now[1]) * 1000 + math.floor(tonumber(now[2]) / 1000)
+local window = tonumber(ARGV[1])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], 0, now - window)
+if redis.call('ZCARD', KEYS[1]) < tonumber(ARGV[2]) then
+    redis.call('ZADD', KEYS[1], now, ARGV[3])
+    redis.call('PEXPIRE', KEYS[1], window)
+    return 0
+end
+local oldest = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+return math.max(tonumber(oldest[2]) + window - now, 1)
+"""
+
+
+def parse_rate(rate):
+    """'5/min'、'10/hour'、'3/10s' -> (次数, 窗口秒数)，None表示不限流"""
+    if rate is None:
+        return None
+    match = RATE.match(rate)
+    if not match:
+        raise ValueError(f'限流频率格式错误：{rate}')
+    count, multiple, unit = match.groups()
+    return int(count), int(multiple or 1) * PERIODS[unit]
+
+
+class SlidingWindowLimiter:
+    """滑动窗口计数器，供各限流类共用"""
+
+    def __init__(self, max_blocked=10000):
+        self.max_blocked = max_blocked
+        self.allowed = 0  # 放行次数
+        self.denied = 0  # Redis判定拒绝的次数
+        self.local_denied = 0  # 本进程直接拒绝(未访问Redis)的次数
+        self._blocked = {}  # key -> 可以再次请求的时间(time.monotonic)
+        self._script = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def get_connection():
+        """原生Redis连接，缓存后端不是django-redis时返回None"""
+        try:
+            from django_redis import get_redis_connection
+            return get_redis_connection('default')
+        except (ImportError, NotImplementedError):
+            return None
+
+    def hit(self, key, limit, window) -> float:
+        """记录一次请求，返回0表示放行，否则为需要等待的秒数"""
+        now = time.monotonic()
+        until = self._blocked.get(key)
+        if until is not None:
+            if now < until:
+                self.local_denied += 1
+                return until - now
+            self._blocked.pop(key, None)
+
+        try:
+            connection = self.get_connection()
+            if connection is None:
+                wait = self._hit_cache(key, limit, window)
+            else:
+                wait = self._hit_redis(connection, key, limit, window)
+        except Exception as e:
+            # 限流存储不可用时放行，不影响登录
+            logger.warning(f'限流计数失败，本次放行：{e}')
+            return 0
+        if wait:
+            self.denied += 1
+            self.block(key, now + wait)
+        else:
+            self.allowed += 1
+        return wait
+
+    def block(self, key, until):
+        with self._lock:
+            if len(self._blocked) >= self.max_blocked:
+                # 清理已过期的记录，仍然过多时全部清空(最多多访问一次Redis)
+                now = time.monotonic()
+                self._blocked = {k: v for k, v in self._blocked.items() if v > now}
+                if len(self._blocked) >= self.max_blocked:
+                    self._blocked = {}
+            self._blocked[key] = until
+
+    def _hit_redis(self, connection, key, limit, window):
+        if self._script is None:
+            self._script = connection.register_script(SLIDING_WINDOW)
+        wait = self._script(keys=[cache.client.make_key(THROTTLE_PREFIX + key)],
+                            args=[window * 1000, limit, uuid.uuid4().hex], client=connection)
+        return int(wait) / 1000
+
+    @staticmethod
+    def _hit_cache(key, limit, window):
+        key = THROTTLE_PREFIX + key
+        now = time.time()
+        history = [t for t in cache.get(key, []) if t > now - window]
+        if len(history) >= limit:
+            return history[0] + window - now
+        history.append(now)
+        cache.set(key, history, timeout=window)
+        return 0
+
+    def stats(self):
+        return {
+            'allowed': self.allowed,
+            'denied': self.denied,
+            'local_denied': self.local_denied,
+            'blocked_keys': len(self._blocked),
+        }
+
+
+limiter = SlidingWindowLimiter()
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    """
+    滑动窗口限流基类
+    频率取自 DEFAULT_THROTTLE_RATES['<视图的throttle_scope>_<kind>']，未配置或取不到标识时不限流
+    """
+    kind = None  # 限流维度，与throttle_scope拼成频率配置名
+
+    def get_ident_value(self, request, view):
+        """限流标识(IP/账号/手机号)"""
+        raise NotImplementedError
+
+    def get_rate(self, view):
+        scope = getattr(view, 'throttle_scope', None)
+        if not scope:
+            return None, None
+        scope = f'{scope}_{self.kind}'
+        return scope, parse_rate(api_settings.DEFAULT_THROTTLE_RATES.get(scope))
+
+    def allow_request(self, request, view):
+        self.wait_seconds = None
+        scope, rate = self.get_rate(view)
+        if rate is None:
+            return True
+        ident = self.get_ident_value(request, view)
+        if not ident:
+            return True
+        limit, window = rate
+        wait = limiter.hit(f'{scope}:{ident}', limit, window)
+        if wait:
+            self.wait_seconds = wait
+            return False
+        return True
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class IPRateThrottle(SlidingWindowThrottle):
+    """按客户端IP限流(NUM_PROXIES配置代理层数)"""
+    kind = 'ip'
+
+    def get_ident_value(self, request, view):
+        return self.get_ident(request)
+
+
+class AccountRateThrottle(SlidingWindowThrottle):
+    """按登录账号限流"""
+    kind = 'account'
+    field = 'username'
+
+    def get_ident_value(self, request, view):
+        value = request.data.get(self.field) if hasattr(request.data, 'get') else None
+        return str(value).strip().lower() if value else None
+
+
+class PhoneRateThrottle(SlidingWindowThrottle):
+    """按手机号限流，手机号取自URL参数或请求体"""
+    kind = 'phone'
+    field = 'phone'
+
+    def get_ident_value(self, request, view):
+        value = view.kwargs.get(self.field)
+        if value is None and hasattr(request.data, 'get'):
+            value = request.data.get(self.field)
+        return str(value).strip() if value else None
+
+
+def throttled_response(exc):
+    """把DRF的Throttled异常转换为统一的响应格式，其他异常返回None"""
+    if not isinstance(exc, exceptions.Throttled):
+        return None
+    wait = math.ceil(exc.wait) if exc.wait else None
+    response = APIResponse(message=f'请求过于频繁，请{wait}秒后再试' if wait else '请求过于频繁，请稍后再试',
+                           status=exc.status_code)
+    if wait:
+        response['Retry-After'] = str(wait)
+    return response
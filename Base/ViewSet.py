@@ -1,23 +1,88 @@
+import csv
+import datetime
+import hashlib
+from decimal import Decimal
+from django.conf import settings
+from django.core.cache import cache
 from rest_framework.viewsets import ModelViewSet
-from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from rest_framework.serializers import ModelSerializer
+from rest_framework import status, exceptions
+from django.core.exceptions import FieldDoesNotExist, ValidationError as DjangoValidationError
+from django.db import connections, transaction
 from django.db.models import Q, Model
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from django.http import StreamingHttpResponse
 from django.http.response import Http404
-from Base.Pagination import CustomPagination
+from core.exceptions import QueryInvalid
+from Base.Pagination import CustomPagination, KeysetPagination
+from Base.Filter import build_filter, build_ordering, check_full_scan, needs_full_scan_check, validate_filter_config
+from Base.FastSerializer import get_fast_serializer
 from Base.Response import APIResponse
+from Base.QueryPlan import QueryPlan, build_query_plan
+from Base.Search import get_search_backend
+from Base.Throttle import throttled_response
+from Base.Serializer import BulkUpdateListSerializer
+from utils import fastjson
+from Base.Cache import (bump_model_version, get_cached_list_stats, get_model_version, get_queryset_signature,
+                        make_versioned_key, track_model_versions, RESPONSE_CACHE_PREFIX)
+
+CSV_FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')  # 导出CSV时需要转义的单元格开头字符
 
 
 class APIViewSet(ModelViewSet):
     pagination_class = CustomPagination
     http_method_names = ['get', 'post', 'delete', 'put', 'head', 'options', 'patch']
 
-    # throttle_classes = None # 限流
+    # throttle_classes = None # 限流，可选Base.Throttle中的滑动窗口限流，配合throttle_scope使用
     # authentication_classes = None # 认证
-    # permission_classes = None # 权限
+    # permission_classes = None # 权限，默认使用REST_FRAMEWORK中的HasPermission
+    required_permissions = None  # 需要的权限编码，可按动作声明，如 {'create': 'system:user:add'}
 
     # 新增配置项，让子类可以更灵活地配置
     filter_fields = []  # 可过滤的字段列表
     search_fields = []  # 支持模糊搜索的字段列表
+    search_backend = None  # 搜索后端(类或导入路径)，None时使用全局配置SEARCH_BACKEND
     exact_fields = []  # 需要精确匹配的字段列表
+    cursor_ordering = '-id'  # 游标分页(KeysetPagination)的排序字段，需为非空且带索引的列
+    count_estimate = None  # 分页总数是否使用表统计信息估算，None时使用全局配置PAGINATION_COUNT_ESTIMATE
+    fields_query_param = 'fields'  # 指定返回字段，如 ?fields=id,name
+    exclude_query_param = 'exclude'  # 排除返回字段，如 ?exclude=description
+    read_actions = ('list', 'retrieve')  # 只读动作，字段选择与关联预加载只作用于这些动作
+    auto_related = True  # 是否根据序列化器自动规划select_related/prefetch_related
+    select_related_fields = None  # 手动指定select_related，与prefetch_related_fields任一设置后不再自动规划
+    prefetch_related_fields = None  # 手动指定prefetch_related
+    allow_bulk = True  # 是否开放批量接口 /bulk/
+    bulk_batch_size = 500  # 批量写入每批数量
+    bulk_max_items = 1000  # 单次批量请求最多条数，超过时拒绝
+    allow_export = False  # 是否开放导出接口 /export/(导出整表数据，按需在子类开启)
+    export_fields = None  # 导出列，None时按序列化器中对应本表列的字段导出
+    export_chunk_size = 2000  # 导出时每批读取的行数
+    export_format_query_param = 'export_format'  # 导出格式参数，ndjson(默认)或csv
+    conditional_get = True  # 列表/详情是否支持ETag/Last-Modified协商缓存(304)
+    last_modified_field = None  # 更新时间字段，None时自动识别update_time/updated_time
+    cache_response = False  # 是否缓存列表/详情响应(适合读多写少的数据)
+    cache_timeout = None  # 响应缓存时间(秒)，None时使用全局配置RESPONSE_CACHE_TIMEOUT
+    cache_dependencies = ()  # 响应中还依赖的其他模型(如嵌套序列化的关联模型)，其写入同样使缓存失效
+    query_budget = None  # 单个请求允许的最大SQL查询次数，None时使用全局配置QUERY_BUDGET
+    fast_serialize = True  # 列表接口对无自定义逻辑的序列化器使用快速序列化(直接转换.values()结果)
+    filter_spec = {}  # 声明式过滤 {字段: [运算符]}，运算符可选exact/gt/gte/lt/lte/in，字段需有索引
+    filter_in_limit = 100  # __in 过滤最多允许的值个数
+    ordering_fields = ()  # 允许 ?ordering= 排序的字段(需有索引)，支持多列，如 ?ordering=-exam_date,id
+    ordering_query_param = 'ordering'  # 排序参数
+    full_scan_threshold = None  # 表行数超过该值时拒绝无索引条件的过滤，None时使用全局配置FILTER_FULL_SCAN_THRESHOLD
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        model = getattr(cls.queryset, 'model', None)
+        # 分页总数、协商缓存、响应缓存依赖模型版本号，登记模型使其写入时自增版本号
+        track_model_versions(model, *cls.cache_dependencies)
+        if model is not None:
+            # 过滤/排序配置在启动时校验，配置错误不会拖到请求时才变成400
+            validate_filter_config(cls, model)
 
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -25,49 +90,322 @@ class APIViewSet(ModelViewSet):
 
         # 状态过滤
         status = query_params.get('status')
+        used_fields = set()  # 过滤条件用到的字段，用于全表扫描检查
         if status and hasattr(queryset.model, 'status'):
             status_list = status.split(',')
             queryset = queryset.filter(status__in=status_list)
+            used_fields.add('status')
 
         # 构建查询条件
         query_conditions = Q()
 
         for field in self.get_custom_query_fields():
-            # 模糊查询（支持通配符）
+            # 模糊查询（支持通配符），交给搜索后端处理
             if field.startswith('*') and field.endswith('*'):
-                field_name = field[1:-1]
-                search_value = query_params.get(field_name)
-                if search_value:
-                    query_conditions &= Q(**{f"{field_name}__icontains": search_value})
+                continue
             # 精确查询
             else:
                 value = query_params.get(field)
                 if value:
                     query_conditions &= Q(**{field: value})
+                    used_fields.add(field)
 
         # 处理配置的过滤字段
         for field in self.filter_fields:
             value = query_params.get(field)
             if value:
                 query_conditions &= Q(**{field: value})
-
-        # 处理模糊搜索字段
-        for field in self.search_fields:
-            value = query_params.get(field)
-            if value:
-                query_conditions &= Q(**{f"{field}__icontains": value})
+                used_fields.add(field)
 
         # 处理精确匹配字段
         for field in self.exact_fields:
             value = query_params.get(field)
             if value:
                 query_conditions &= Q(**{field: value})
+                used_fields.add(field)
+
+        # 声明式过滤(范围/IN)
+        if self.filter_spec:
+            spec_conditions, spec_fields = build_filter(self, queryset.model, query_params)
+            query_conditions &= spec_conditions
+            used_fields |= spec_fields
 
         if query_conditions:
             queryset = queryset.filter(query_conditions)
 
+        # 处理模糊搜索字段，结果按相关度排序
+        search_terms = self.get_search_terms()
+        if search_terms:
+            backend = get_search_backend(self.search_backend)
+            queryset = backend.search(queryset, search_terms)
+            if backend.is_indexed(queryset.model, search_terms):
+                # 搜索由搜索后端的索引处理，不做全表扫描检查
+                used_fields = set()
+            else:
+                # __icontains 为全表扫描，搜索字段同样计入过滤条件
+                used_fields |= set(search_terms)
+        self.used_filter_fields = used_fields
+
+        # 多列排序，只允许ordering_fields中带索引的列
+        ordering = build_ordering(self, queryset.model, query_params) if self.ordering_fields else None
+        if ordering:
+            if isinstance(self.paginator, KeysetPagination):
+                raise QueryInvalid('游标分页按固定字段排序，不支持ordering参数')
+            queryset = queryset.order_by(*ordering)
+
+        # 字段选择下推到SQL，未选择的列不查询
+        columns = self.get_sparse_columns(queryset.model)
+        if columns:
+            queryset = queryset.only(*columns)
+
+        # 关联字段预加载
+        if getattr(self, 'action', None) in self.read_actions:
+            self.query_plan = self.get_query_plan(queryset.model)
+            queryset = self.query_plan.apply(queryset)
+
         return queryset
 
+    def get_query_plan(self, model):
+        """
+        生成关联查询计划
+        子类设置select_related_fields/prefetch_related_fields时使用手动配置，否则按序列化器自动推导
+        """
+        if self.select_related_fields is not None or self.prefetch_related_fields is not None:
+            return QueryPlan(self.select_related_fields, self.prefetch_related_fields)
+        if not self.auto_related:
+            return QueryPlan()
+        return build_query_plan(self.get_serializer(), model)
+
+    def handle_exception(self, exc):
+        # 权限校验失败、被限流时返回统一的响应格式
+        if isinstance(exc, exceptions.PermissionDenied):
+            return APIResponse(message=str(exc.detail), status=exc.status_code)
+        return throttled_response(exc) or super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        # 写入响应缓存
+        entry = self.get_response_cache_entry(response)
+        if entry is not None:
+            self.store_cached_response(entry)
+        # 协商缓存校验值
+        validators = getattr(self, 'conditional_validators', None)
+        if validators and response.status_code in (200, 304):
+            etag, last_modified = validators
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+        # 调试模式下通过响应头输出关联查询计划
+        plan = getattr(self, 'query_plan', None)
+        if settings.DEBUG and plan:
+            response['X-Query-Plan'] = str(plan)
+        return response
+
+    def get_cache_timeout(self):
+        if self.cache_timeout is not None:
+            return self.cache_timeout
+        return getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 300)
+
+    def get_response_cache_parts(self, request):
+        """
+        响应缓存键的组成：模型(及依赖模型)版本号 + 角色 + 动作 + 路径参数 + 规范化后的查询参数
+        模型写入时版本号自增，所有进程的旧缓存立即失效
+        """
+        model = self.queryset.model if self.queryset is not None else self.get_queryset().model
+        params = sorted((key, sorted(values)) for key, values in request.query_params.lists())
+        parts = (getattr(request, 'role_id', None), self.action, sorted(self.kwargs.items()), params)
+        return [model, *self.cache_dependencies], parts
+
+    def get_cached_response(self, request):
+        """读取响应缓存，命中时同样支持304"""
+        self.response_cache_key = None
+        if not self.cache_response:
+            return None
+        models, parts = self.get_response_cache_parts(request)
+        self.response_cache_key = make_versioned_key(RESPONSE_CACHE_PREFIX, models, *parts)
+        return self.use_cached_response(request, cache.get(self.response_cache_key))
+
+    def use_cached_response(self, request, cached):
+        """由缓存内容生成响应，未命中返回None"""
+        if cached is None:
+            return None
+        self.response_cache_hit = True
+        if cached['validators']:
+            not_modified = self.check_not_modified(request, *cached['validators'])
+            if not_modified is not None:
+                return not_modified
+        return Response(cached['data'], status=status.HTTP_200_OK)
+
+    def get_response_cache_entry(self, response):
+        """需要写入缓存的内容，不需要缓存时返回None"""
+        key = getattr(self, 'response_cache_key', None)
+        if not key or response.status_code != 200 or getattr(self, 'response_cache_hit', False):
+            return None
+        return {
+            'data': response.data,
+            'validators': getattr(self, 'conditional_validators', None)
+        }
+
+    def store_cached_response(self, entry):
+        cache.set(self.response_cache_key, entry, timeout=self.get_cache_timeout())
+
+    def get_last_modified_field(self, model):
+        """获取模型的更新时间字段"""
+        names = [self.last_modified_field] if self.last_modified_field else ['update_time', 'updated_time']
+        for name in names:
+            try:
+                return model._meta.get_field(name).name
+            except FieldDoesNotExist:
+                continue
+        return None
+
+    def make_etag(self, *parts):
+        """由校验信息与请求参数生成弱ETag，分页、字段选择等参数不同则ETag不同"""
+        params = sorted(self.request.query_params.lists())
+        raw = '|'.join(str(p) for p in parts + (self.request.path, params))
+        return 'W/' + quote_etag(hashlib.md5(raw.encode('utf-8')).hexdigest())
+
+    def get_list_last_modified_field(self, model):
+        """
+        列表校验值使用的更新时间字段，返回None时只用模型版本号生成ETag(不查询数据库)
+        游标分页的大表不做 max(更新时间)+COUNT 聚合，否则每个新版本号都要扫描整个过滤结果
+        """
+        if isinstance(self.paginator, KeysetPagination):
+            return None
+        return self.get_last_modified_field(model)
+
+    def get_list_validators(self, queryset):
+        """
+        列表的校验值 (ETag, Last-Modified时间戳)
+        由 过滤条件签名 + max(更新时间) + 行数 得出，聚合结果按模型版本号缓存(行数同时供分页使用)；
+        模型没有更新时间字段或使用游标分页时使用模型版本号
+        """
+        if not self.conditional_get:
+            return None, None
+        model = queryset.model
+        signature = get_queryset_signature(queryset)
+        field = self.get_list_last_modified_field(model)
+        if signature is None:
+            return self.make_etag(model._meta.label_lower, 'empty'), None
+        if field is None:
+            return self.make_etag(model._meta.label_lower, signature, get_model_version(model)), None
+        stats = get_cached_list_stats(queryset, field, signature)
+        return self.build_list_validators(model, signature, stats)
+
+    def build_list_validators(self, model, signature, stats):
+        last_modified = int(stats['last_modified'].timestamp()) if stats['last_modified'] else None
+        return self.make_etag(model._meta.label_lower, signature, stats['last_modified'], stats['total']), last_modified
+
+    def get_retrieve_validators(self):
+        """详情的校验值，只查询该行的更新时间"""
+        if not self.conditional_get:
+            return None, None
+        queryset = self.filter_queryset(self.get_queryset())
+        model = queryset.model
+        pk = self.kwargs.get(self.lookup_url_kwarg or self.lookup_field)
+        field = self.get_last_modified_field(model)
+        if field is None:
+            return self.make_etag(model._meta.label_lower, pk, get_model_version(model)), None
+        rows = list(queryset.filter(**{self.lookup_field: pk}).order_by().values_list(field, flat=True)[:1])
+        return self.build_retrieve_validators(model, pk, rows)
+
+    def build_retrieve_validators(self, model, pk, rows):
+        if not rows:
+            # 数据不存在，交给正常流程返回404
+            return None, None
+        last_modified = int(rows[0].timestamp()) if rows[0] else None
+        return self.make_etag(model._meta.label_lower, pk, rows[0]), last_modified
+
+    def check_not_modified(self, request, etag, last_modified):
+        """请求头 If-None-Match / If-Modified-Since 与校验值匹配时返回304响应，否则返回None"""
+        if etag is None:
+            return None
+        self.conditional_validators = (etag, last_modified)
+        return get_conditional_response(request, etag=etag, last_modified=last_modified)
+
+    def get_fast_serializer(self, model):
+        """列表接口可用的快速序列化器，序列化器有自定义逻辑时返回None"""
+        if not self.fast_serialize:
+            return None
+        return get_fast_serializer(self.get_serializer(), model)
+
+    def get_extra_value_columns(self):
+        """快速序列化时分页额外需要的列(游标分页的排序字段)"""
+        if isinstance(self.paginator, KeysetPagination):
+            field = self.cursor_ordering.lstrip('-')
+            if field not in ('id', 'pk'):
+                return [field]
+        return []
+
+    def get_search_terms(self):
+        """收集模糊搜索条件(search_fields 与 *field* 通配字段)，返回 {字段: 关键词}"""
+        query_params = self.request.query_params
+        fields = [field[1:-1] for field in self.get_custom_query_fields()
+                  if field.startswith('*') and field.endswith('*')]
+        terms = {}
+        for field in fields + list(self.search_fields):
+            value = query_params.get(field)
+            if value:
+                terms[field] = value
+        return terms
+
+    def get_sparse_fields(self):
+        """
+        解析字段选择参数
+        返回(保留字段集合, 排除字段集合)，未指定时为None
+        """
+        if getattr(self, 'action', None) not in self.read_actions:
+            return None, None
+        return self.parse_field_params()
+
+    def parse_field_params(self):
+        """读取 ?fields= / ?exclude= 参数"""
+        query_params = self.request.query_params
+        include = query_params.get(self.fields_query_param)
+        exclude = query_params.get(self.exclude_query_param)
+        include = {f.strip() for f in include.split(',') if f.strip()} if include else None
+        exclude = {f.strip() for f in exclude.split(',') if f.strip()} if exclude else None
+        return include, exclude
+
+    def prune_serializer_fields(self, serializer):
+        """按字段选择裁剪序列化器字段"""
+        include, exclude = self.get_sparse_fields()
+        if not include and not exclude:
+            return serializer
+        fields = getattr(serializer, 'child', serializer).fields
+        for name in list(fields.keys()):
+            if (include and name not in include) or (exclude and name in exclude):
+                fields.pop(name)
+        return serializer
+
+    def get_sparse_columns(self, model):
+        """
+        根据裁剪后的序列化器字段计算需要查询的列
+        存在无法确定数据来源的字段(如SerializerMethodField)时返回None，不做列裁剪
+        """
+        include, exclude = self.get_sparse_fields()
+        if not include and not exclude:
+            return None
+        columns = {model._meta.pk.name}
+        for field in self.get_serializer().fields.values():
+            if field.write_only:
+                continue
+            if field.source == '*':
+                return None
+            name = field.source.split('.')[0]
+            try:
+                model_field = model._meta.get_field(name)
+            except FieldDoesNotExist:
+                return None
+            # 只处理本表的列，多对多和反向关联不在主查询中
+            if model_field.concrete and not model_field.many_to_many:
+                columns.add(model_field.name)
+        return columns
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        return self.prune_serializer_fields(serializer)
+
     def get_custom_query_fields(self):
         """
         获取自定义查询字段列表
@@ -75,19 +413,46 @@ class APIViewSet(ModelViewSet):
         """
         return []
 
+    def needs_full_scan_check(self, queryset):
+        """过滤条件都不在索引列上，需要按表行数判断是否拒绝(可能查询表统计信息)"""
+        return needs_full_scan_check(queryset.model, getattr(self, 'used_filter_fields', None))
+
+    def check_full_scan(self, queryset):
+        """大表上没有使用索引列过滤时抛出QueryInvalid"""
+        if self.needs_full_scan_check(queryset):
+            check_full_scan(self, queryset.model)
+
     def list(self, request, *args, **kwargs):
         """对应 GET / - 获取所有数据"""
+        cached = self.get_cached_response(request)
+        if cached is not None:
+            return cached
         try:
             queryset = self.filter_queryset(self.get_queryset())
+            self.check_full_scan(queryset)
+            # 数据未变化时直接返回304，不做分页与序列化
+            not_modified = self.check_not_modified(request, *self.get_list_validators(queryset))
+            if not_modified is not None:
+                return not_modified
+            # 快速序列化：只查询输出需要的列，直接由行字典生成结果
+            fast_serializer = self.get_fast_serializer(queryset.model)
+            if fast_serializer is not None:
+                queryset = queryset.values(*fast_serializer.columns, *self.get_extra_value_columns())
             page = self.paginate_queryset(queryset)
 
             if page is not None:
+                if fast_serializer is not None:
+                    return self.get_paginated_response(fast_serializer.to_representation_many(page))
                 serializer = self.get_serializer(page, many=True)
                 return self.get_paginated_response(serializer.data)
 
+            if fast_serializer is not None:
+                return APIResponse.success(fast_serializer.to_representation_many(queryset))
             serializer = self.get_serializer(queryset, many=True)
             return APIResponse.success(serializer.data)
 
+        except QueryInvalid as e:
+            return APIResponse.fail(message=e.message, code=e.code)
         except Exception as e:
             # 可以根据异常类型返回不同的错误信息
             return APIResponse.fail(
@@ -121,7 +486,13 @@ class APIViewSet(ModelViewSet):
 
     def retrieve(self, request, *args, **kwargs):
         """对应 GET /{id} - 获取单个数据"""
+        cached = self.get_cached_response(request)
+        if cached is not None:
+            return cached
         try:
+            not_modified = self.check_not_modified(request, *self.get_retrieve_validators())
+            if not_modified is not None:
+                return not_modified
             instance = self.get_object()
             serializer = self.get_serializer(instance)
             return APIResponse.success(serializer.data)
@@ -204,3 +575,270 @@ class APIViewSet(ModelViewSet):
         else:
             # 物理删除
             instance.delete()
+
+    @action(detail=False, methods=['post', 'patch', 'delete'], url_path='bulk')
+    def bulk(self, request, *args, **kwargs):
+        """对应 POST/PATCH/DELETE /bulk/ - 批量新增/修改/删除"""
+        if not self.allow_bulk:
+            return APIResponse.fail(message='不支持批量操作', code=status.HTTP_405_METHOD_NOT_ALLOWED)
+        handlers = {
+            'POST': self.bulk_create,
+            'PATCH': self.bulk_update,
+            'DELETE': self.bulk_destroy,
+        }
+        try:
+            return handlers[request.method](request)
+        except Exception as e:
+            return APIResponse.fail(
+                message=f"批量操作失败: {str(e)}",
+                code=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+    def bulk_create(self, request):
+        """批量新增，入参为数据列表"""
+        if not isinstance(request.data, list) or not request.data:
+            return APIResponse.fail(message='请求数据必须为非空列表', code=status.HTTP_400_BAD_REQUEST)
+        if len(request.data) > self.bulk_max_items:
+            return self.bulk_too_large()
+        serializer = self.get_serializer(data=request.data, many=True)
+        if not serializer.is_valid():
+            # errors与入参一一对应，校验通过的项为空
+            return APIResponse.fail(
+                message="数据验证失败",
+                errors=serializer.errors,
+                code=status.HTTP_400_BAD_REQUEST
+            )
+        with transaction.atomic():
+            self.perform_bulk_create(serializer)
+        return APIResponse.success(
+            data={'count': len(serializer.instance), 'list': serializer.data},
+            message="批量创建成功",
+            code=status.HTTP_201_CREATED
+        )
+
+    def bulk_update(self, request):
+        """批量修改(部分更新)，入参为带id的数据列表"""
+        if not isinstance(request.data, list) or not request.data:
+            return APIResponse.fail(message='请求数据必须为非空列表', code=status.HTTP_400_BAD_REQUEST)
+        if len(request.data) > self.bulk_max_items:
+            return self.bulk_too_large()
+        ids = [item.get('id') for item in request.data if isinstance(item, dict) and item.get('id') is not None]
+        try:
+            ids = self.parse_bulk_ids(ids)
+        except DjangoValidationError:
+            return APIResponse.fail(message='id格式错误', code=status.HTTP_400_BAD_REQUEST)
+        instances = list(self.get_queryset().filter(pk__in=ids))
+        serializer = BulkUpdateListSerializer(
+            instances,
+            data=request.data,
+            child=self.get_serializer_class()(partial=True, context=self.get_serializer_context()),
+            partial=True,
+            context=self.get_serializer_context()
+        )
+        if not serializer.is_valid():
+            return APIResponse.fail(
+                message="数据验证失败",
+                errors=serializer.errors,
+                code=status.HTTP_400_BAD_REQUEST
+            )
+        with transaction.atomic():
+            self.perform_bulk_update(serializer)
+        return APIResponse.success(
+            data={'count': len(serializer.instance), 'list': serializer.data},
+            message="批量更新成功"
+        )
+
+    def bulk_destroy(self, request):
+        """批量删除，入参为 {"ids": [...]} 或 ?ids=1,2,3"""
+        ids = request.data.get('ids') if isinstance(request.data, dict) else None
+        if ids is None and request.query_params.get('ids'):
+            ids = request.query_params.get('ids').split(',')
+        if not ids or not isinstance(ids, list):
+            return APIResponse.fail(message='缺少ids参数', code=status.HTTP_400_BAD_REQUEST)
+        if len(ids) > self.bulk_max_items:
+            return self.bulk_too_large()
+        try:
+            ids = self.parse_bulk_ids(ids)
+        except DjangoValidationError:
+            return APIResponse.fail(message='ids参数格式错误', code=status.HTTP_400_BAD_REQUEST)
+        with transaction.atomic():
+            count = self.perform_bulk_destroy(self.get_queryset().filter(pk__in=ids))
+        return APIResponse.success(data={'count': count}, message="删除成功")
+
+    def bulk_too_large(self):
+        return APIResponse.fail(message=f'单次批量操作最多{self.bulk_max_items}条', code=status.HTTP_400_BAD_REQUEST)
+
+    def parse_bulk_ids(self, ids):
+        """按主键字段类型转换批量接口的id，格式错误时抛出ValidationError"""
+        pk = self.get_queryset().model._meta.pk
+        return [pk.to_python(value) for value in ids]
+
+    def perform_bulk_create(self, serializer):
+        """
+        批量写入
+        序列化器自定义了create或包含多对多字段时逐条保存(仍在同一事务中)，否则使用bulk_create；
+        数据库不能在批量插入时返回主键(MySQL)时同样逐条保存，保证响应中带有新记录的id
+        """
+        child = serializer.child
+        model = child.Meta.model
+        many_to_many = {f.name for f in model._meta.many_to_many}
+        if (type(child).create is not ModelSerializer.create
+                or not connections[model.objects.db].features.can_return_rows_from_bulk_insert
+                or any(many_to_many & attrs.keys() for attrs in serializer.validated_data)):
+            serializer.save()
+            return
+        objs = [model(**attrs) for attrs in serializer.validated_data]
+        serializer.instance = model.objects.bulk_create(objs, batch_size=self.bulk_batch_size)
+        bump_model_version(model)
+
+    def perform_bulk_update(self, serializer):
+        """
+        批量更新
+        序列化器自定义了update或包含多对多字段时逐条保存，否则使用bulk_update
+        """
+        child = serializer.child
+        model = child.Meta.model
+        many_to_many = {f.name for f in model._meta.many_to_many}
+        if type(child).update is not ModelSerializer.update or any(
+                many_to_many & attrs.keys() for attrs in serializer.validated_data):
+            serializer.save()
+            return
+        instances = serializer.get_ordered_instances()
+        fields = set()
+        for instance, attrs in zip(instances, serializer.validated_data):
+            for name, value in attrs.items():
+                setattr(instance, name, value)
+            fields.update(attrs.keys())
+        # bulk_update不会触发auto_now，手动刷新更新时间
+        now = timezone.now()
+        for field in model._meta.concrete_fields:
+            if getattr(field, 'auto_now', False):
+                for instance in instances:
+                    setattr(instance, field.attname, now)
+                fields.add(field.name)
+        if fields:
+            model.objects.bulk_update(instances, list(fields), batch_size=self.bulk_batch_size)
+        serializer.instance = instances
+        bump_model_version(model)
+
+    def perform_bulk_destroy(self, queryset):
+        """批量删除，与perform_destroy一致支持软删除，软删除为一条UPDATE语句"""
+        model = queryset.model
+        names = {f.name for f in model._meta.concrete_fields}
+        values = {f.name: timezone.now() for f in model._meta.concrete_fields if getattr(f, 'auto_now', False)}
+        if 'is_deleted' in names:
+            # 软删除
+            count = queryset.update(is_deleted=True, **values)
+        elif 'status' in names:
+            # 状态删除
+            count = queryset.update(status=0, **values)
+        else:
+            # 物理删除
+            count = queryset.delete()[1].get(model._meta.label, 0)
+        bump_model_version(model)
+        return count
+
+    @action(detail=False, methods=['get'], url_path='export')
+    def export(self, request, *args, **kwargs):
+        """
+        对应 GET /export/ - 流式导出
+        过滤条件与列表接口一致，不分页，?export_format=csv 导出CSV，默认NDJSON(每行一个JSON对象)
+        """
+        if not self.allow_export:
+            return APIResponse.fail(message='不支持导出', code=status.HTTP_405_METHOD_NOT_ALLOWED)
+        export_format = request.query_params.get(self.export_format_query_param, 'ndjson').lower()
+        if export_format not in ('ndjson', 'csv'):
+            return APIResponse.fail(message='导出格式仅支持ndjson或csv', code=status.HTTP_400_BAD_REQUEST)
+        try:
+            queryset = self.filter_queryset(self.get_queryset())
+            self.check_full_scan(queryset)
+            columns = self.get_export_columns(queryset.model)
+        except QueryInvalid as e:
+            return APIResponse.fail(message=e.message, code=e.code)
+        except Exception as e:
+            return APIResponse.fail(message=str(e), code=status.HTTP_400_BAD_REQUEST)
+        if not columns:
+            return APIResponse.fail(message='没有可导出的字段', code=status.HTTP_400_BAD_REQUEST)
+
+        rows = self.iter_export_rows(queryset, columns)
+        if export_format == 'csv':
+            content, content_type = self.render_csv(rows, columns), 'text/csv; charset=utf-8'
+        else:
+            content, content_type = self.render_ndjson(rows), 'application/x-ndjson; charset=utf-8'
+        filename = f"{queryset.model._meta.db_table}_{timezone.now().strftime('%Y%m%d%H%M%S')}.{export_format}"
+        response = StreamingHttpResponse(content, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+    def get_export_columns(self, model):
+        """
+        导出列
+        默认取序列化器中可读且对应本表列的字段(write_only如密码、SerializerMethodField等不导出)，
+        外键导出为主键值，支持 ?fields= / ?exclude= 选择
+        """
+        if self.export_fields is not None:
+            columns = list(self.export_fields)
+        else:
+            columns = []
+            for field in self.get_serializer().fields.values():
+                if field.write_only or field.source == '*':
+                    continue
+                try:
+                    model_field = model._meta.get_field(field.source)
+                except FieldDoesNotExist:
+                    continue
+                if model_field.concrete and not model_field.many_to_many and field.source not in columns:
+                    columns.append(field.source)
+        include, exclude = self.parse_field_params()
+        return [c for c in columns if (not include or c in include) and (not exclude or c not in exclude)]
+
+    def iter_export_rows(self, queryset, columns):
+        """
+        按主键分批读取，每批使用iterator不缓存结果集
+        MySQL驱动会把整批结果读入客户端，按主键分批保证内存占用只与chunk_size有关
+        """
+        pk = queryset.model._meta.pk.name
+        queryset = queryset.order_by(pk)
+        last = None
+        while True:
+            batch = queryset if last is None else queryset.filter(**{f'{pk}__gt': last})
+            count = 0
+            for row in batch.values(pk, *columns)[:self.export_chunk_size].iterator(chunk_size=self.export_chunk_size):
+                count += 1
+                last = row.pop(pk) if pk not in columns else row[pk]
+                yield row
+            if count < self.export_chunk_size:
+                break
+
+    @staticmethod
+    def render_ndjson(rows):
+        for row in rows:
+            yield fastjson.dumps(row) + b'\n'
+
+    @staticmethod
+    def render_csv(rows, columns):
+        class Echo:
+            """csv.writer需要的伪文件对象，write直接返回写入的内容"""
+
+            def write(self, value):
+                return value
+
+        def to_cell(value):
+            if value is None:
+                return ''
+            if isinstance(value, bool):
+                return int(value)
+            if isinstance(value, datetime.datetime):
+                return value.strftime('%Y-%m-%d %H:%M:%S')
+            if isinstance(value, (datetime.date, datetime.time, Decimal)):
+                return str(value)
+            if isinstance(value, str) and value.startswith(CSV_FORMULA_PREFIXES):
+                # 防止公式注入：以 = + - @ 等开头的文本在Excel中会被当作公式执行
+                return "'" + value
+            return value
+
+        writer = csv.writer(Echo())
+        # BOM，Excel打开中文不乱码
+        yield '\ufeff' + writer.writerow(columns)
+        for row in rows:
+            yield writer.writerow([to_cell(row[c]) for c in columns])
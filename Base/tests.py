@@ -0,0 +1,623 @@
+import codecs
+import csv
+import datetime
+import io
+import json
+import time
+import uuid
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest import mock, skipIf
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.test import APIRequestFactory
+from rest_framework.views import APIView
+from Base.FastSerializer import get_fast_serializer
+from Base.Pagination import KeysetPagination
+from Base.Renderer import FastJSONRenderer
+from Base.Response import APIResponse
+from Base.Cache import get_model_version
+from Base.Search import NgramSearchBackend
+from Base.Throttle import AccountRateThrottle, IPRateThrottle, SlidingWindowLimiter, throttled_response
+from Base.ViewSet import APIViewSet
+from utils import fastjson
+
+try:
+    import fakeredis
+    import lupa  # noqa: F401  fakeredis执行Lua脚本需要
+except ImportError:
+    fakeredis = None
+from utils.testing import MissingTablesMixin, token_client
+from apps.academicManagement.models import Course, Classroom, Schedule, Exam
+from apps.campusServices.models import SportPlace, LibraryBook, TransportLine, Notification, WifiHotspot
+from apps.logisticalSupport.models import CanteenMenu, Facility, Maintenance, CleaningTask, SecurityEvent
+from apps.oauth.models import RoleModel, UserModel, UserRoleModel
+from apps.oauth.services.permission import ADMIN_ROLE_ID
+from apps.studentServer.models import Activity, Grade, Attendance
+from apps.systemMonitoring.models import LoginLog, OperationLog, OnlineUser, ServerMetric
+from apps.userManage.models import DepartmentModel
+from apps.academicManagement.views import CourseViewSet, ClassRoomViewSet, ScheduleViewSet, ExamViewSet
+from apps.campusServices.views import (SportPlaceViewSet, LibraryBookViewSet, TransportLineViewSet,
+                                       NotificationViewSet, WifiHotspotViewSet)
+from apps.logisticalSupport.views import (CanteenMenuViewSet, FacilityViewSet, MaintenanceViewSet,
+                                          CleaningTaskViewSet, SecurityEventViewSet)
+from apps.studentServer.views import ActivityViewSet, GradeViewSet, AttendanceViewSet
+from apps.systemMonitoring.views import (LoginLogViewSet, OperationLogViewSet, OnlineUserViewSet,
+                                         ServerMetricViewSet)
+
+# 使用快速序列化的业务列表接口
+FAST_VIEWSETS = [
+    CourseViewSet, ClassRoomViewSet, ScheduleViewSet, ExamViewSet,
+    SportPlaceViewSet, LibraryBookViewSet, TransportLineViewSet, NotificationViewSet, WifiHotspotViewSet,
+    CanteenMenuViewSet, FacilityViewSet, MaintenanceViewSet, CleaningTaskViewSet, SecurityEventViewSet,
+    ActivityViewSet, GradeViewSet, AttendanceViewSet,
+    LoginLogViewSet, OperationLogViewSet, OnlineUserViewSet, ServerMetricViewSet,
+]
+
+
+AT = datetime.datetime(2024, 9, 1, 8, 30, 15, 123456)  # 带微秒的时间，覆盖时间格式转换
+CLOCK = datetime.time(8, 0, 5, 250000)
+DAY = datetime.date(2024, 9, 1)
+
+
+def create_domain_fixtures():
+    """每个业务模型一条填满字段的记录、一条可空字段留空的记录"""
+    department = DepartmentModel.objects.create(name='计算机学院', code='cs')
+    teacher = UserModel.objects.create(account='teacher', username='teacher', password='x', nickname='老师',
+                                       phone='13800000001', email='t@example.com', description='', signature='')
+    student = UserModel.objects.create(account='student', username='student', password='x', nickname='学生',
+                                       phone='13800000002', email='s@example.com', description='', signature='')
+
+    course = Course.objects.create(code='CS101', name='数据结构 "一"\n\u2028', credit=Decimal('3.5'), hours=48,
+                                   course_type='elective', department=department, description='描述')
+    Course.objects.create(code='CS102', name='程序设计', department=None, description=None)
+    classroom = Classroom.objects.create(building='一教', room_no='101', capacity=120, classroom_type='lab',
+                                         equipment='投影仪', status=2)
+    Classroom.objects.create(building='二教', room_no='202', equipment=None)
+    Schedule.objects.create(course=course, teacher=teacher, classroom=classroom, week_day=3, start_time=CLOCK,
+                            end_time=datetime.time(9, 35), start_date=DAY, end_date=datetime.date(2025, 1, 10),
+                            semester='2024-2025-1')
+    Schedule.objects.create(course=course, teacher=teacher, classroom=classroom, week_day=7,
+                            start_time=datetime.time(14, 0), end_time=datetime.time(15, 35, 0, 1),
+                            start_date=DAY, end_date=DAY)
+    Exam.objects.create(course=course, exam_date=AT, classroom=classroom, exam_type='makeup', duration=90,
+                        supervisor=teacher, remark='闭卷')
+    Exam.objects.create(course=course, exam_date=AT, classroom=None, supervisor=None, remark=None)
+
+    SportPlace.objects.create(name='体育馆', type='篮球', open_time='08:00-22:00', status='open')
+    SportPlace.objects.create(name='操场', type='田径', open_time=None)
+    LibraryBook.objects.create(isbn='9787111000001', title='算法导论', author='Cormen', publisher='机械工业出版社',
+                               publish_date=DAY, stock=3)
+    LibraryBook.objects.create(isbn='9787111000002', title='编译原理', author=None, publisher=None,
+                               publish_date=None)
+    TransportLine.objects.create(line_name='1号线', start_point='东门', end_point='西门', first_time=CLOCK,
+                                 last_time=datetime.time(22, 30), interval_min=15)
+    TransportLine.objects.create(line_name='2号线', start_point='南门', end_point='北门', first_time=None,
+                                 last_time=None, interval_min=None)
+    Notification.objects.create(title='停电通知', content='<p>内容</p>', publisher='后勤处', publish_time=AT,
+                                type='notice')
+    Notification.objects.create(title='放假通知', content='', publisher=None, publish_time=AT, type=None)
+    WifiHotspot.objects.create(ssid='campus', building='图书馆', floor='3F', status='online')
+    WifiHotspot.objects.create(ssid='campus-guest', building=None, floor=None)
+
+    CanteenMenu.objects.create(canteen='一食堂', dish_name='红烧肉', price=Decimal('12.50'), tags='荤菜,招牌')
+    CanteenMenu.objects.create(canteen='二食堂', dish_name='米饭', price=Decimal('1'), tags=None)
+    facility = Facility.objects.create(name='空调', category='电器', location='一教101', status='broken')
+    Facility.objects.create(name='投影仪', category='电器', location=None)
+    Maintenance.objects.create(facility_id=facility, reporter='张三', description='不制冷', level='high',
+                               status='done')
+    Maintenance.objects.create(facility_id=facility, reporter=None, description=None)
+    CleaningTask.objects.create(area='一教', duty_time=AT, staff='李四', status='done')
+    CleaningTask.objects.create(area='二教', duty_time=AT, staff=None)
+    SecurityEvent.objects.create(title='门禁异常', event_time=AT, place='东门', level='high', description='刷卡失败')
+    SecurityEvent.objects.create(title='巡逻', event_time=AT, place=None, level='low', description=None)
+
+    Activity.objects.create(title='运动会', category='体育', place='操场', start_time=AT,
+                            end_time=AT + datetime.timedelta(hours=3), organizer='学生会', description='报名')
+    Activity.objects.create(title='讲座', category='学术', place=None, start_time=AT, end_time=AT, organizer=None,
+                            description=None)
+    Grade.objects.create(student=student, course=course, score=Decimal('91.50'), grade_point=Decimal('4.10'),
+                         term='2024-2025-1')
+    Grade.objects.create(student=student, course=course, score=Decimal('60'), grade_point=None, term='2024-2025-2')
+    Attendance.objects.create(student=student, course=course, check_date=DAY, status='present', remark='准时')
+    Attendance.objects.create(student=student, course=course, check_date=DAY, status='absent', remark=None)
+
+    LoginLog.objects.create(user_id='1', username='admin', ip='127.0.0.1', ua='Mozilla/5.0', status=1,
+                            message='登录成功')
+    LoginLog.objects.create(user_id=None, username=None, ip=None, ua=None, message=None)
+    OperationLog.objects.create(user_id='1', username='admin', module='用户管理', action='新增', status=1,
+                                message='ok', cost_ms=12)
+    OperationLog.objects.create(user_id=None, username=None, module=None, action=None, message=None, cost_ms=None)
+    OnlineUser.objects.create(user_id='1', username='admin', token='token', ip='127.0.0.1')
+    OnlineUser.objects.create(user_id='2', username='guest', token='token', ip=None)
+    ServerMetric.objects.create(cpu_usage=Decimal('12.34'), mem_total_mb=16384, mem_used_mb=8192,
+                                jvm_usage=Decimal('50'), os_name='Linux', os_arch='x86_64', disk_usage=Decimal('0.5'))
+    ServerMetric.objects.create(cpu_usage=Decimal('0'), mem_total_mb=0, mem_used_mb=0, jvm_usage=None, os_name=None,
+                                os_arch=None, disk_usage=None)
+
+
+class FastSerializerTests(MissingTablesMixin, TestCase):
+    """快速序列化与DRF序列化的输出逐字节一致"""
+
+    @classmethod
+    def setUpTestData(cls):
+        create_domain_fixtures()
+
+    def test_fixtures_cover_viewsets(self):
+        for viewset in FAST_VIEWSETS:
+            with self.subTest(viewset.__name__):
+                self.assertEqual(viewset.queryset.model.objects.count(), 2)
+
+    def test_domain_list_endpoints(self):
+        renderer = JSONRenderer()
+        for viewset in FAST_VIEWSETS:
+            with self.subTest(viewset.__name__):
+                model = viewset.queryset.model
+                serializer_class = viewset.serializer_class
+                fast_serializer = get_fast_serializer(serializer_class(), model)
+                self.assertIsNotNone(fast_serializer)
+                queryset = model.objects.order_by('pk')
+                expected = serializer_class(queryset, many=True).data
+                actual = fast_serializer.to_representation_many(queryset.values(*fast_serializer.columns))
+                self.assertEqual(renderer.render(actual), renderer.render(expected))
+
+    def test_sparse_fields(self):
+        """?fields= 裁剪后的序列化器同样一致"""
+        serializer = CourseViewSet.serializer_class()
+        for name in list(serializer.fields):
+            if name not in ('id', 'credit', 'create_time'):
+                serializer.fields.pop(name)
+        model = CourseViewSet.queryset.model
+        fast_serializer = get_fast_serializer(serializer, model)
+        queryset = model.objects.order_by('pk')
+        self.assertEqual(
+            fast_serializer.to_representation_many(queryset.values(*fast_serializer.columns)),
+            [serializer.to_representation(instance) for instance in queryset]
+        )
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    """FastJSONRenderer与JSONRenderer的输出对比，两种JSON后端分别校验"""
+    data = {
+        'code': 200,
+        'message': gettext_lazy('成功'),
+        'data': {
+            'list': [
+                {'id': 1, 'name': '课程 "一"\n\u2028', 'credit': Decimal('3.50'), 'score': 91.5, 'active': True,
+                 'remark': None, 'tags': ('a', 'b'), 'uid': uuid.UUID(int=1)},
+            ],
+            'time': datetime.datetime(2024, 9, 1, 8, 30, 15, 123456),
+            'utc': datetime.datetime(2024, 9, 1, 8, 30, 15, tzinfo=datetime.timezone.utc),
+            'date': datetime.date(2024, 9, 1),
+            'clock': datetime.time(8, 0, 5, 250000),
+            'empty': {},
+        },
+    }
+
+    def render_with(self, backend, data):
+        with mock.patch.object(fastjson, '_backend', backend):
+            return FastJSONRenderer().render(data)
+
+    def test_json_backend_matches_drf(self):
+        self.assertEqual(self.render_with('json', self.data), JSONRenderer().render(self.data))
+
+    @skipIf(fastjson.orjson is None, '未安装orjson')
+    def test_orjson_backend_matches_drf(self):
+        self.assertEqual(self.render_with('orjson', self.data), JSONRenderer().render(self.data))
+        # 超过64位的整数orjson不支持，退回标准库
+        data = {'big': 2 ** 70}
+        self.assertEqual(self.render_with('orjson', data), JSONRenderer().render(data))
+
+    def test_non_finite_floats(self):
+        """NaN/Infinity：JSONRenderer与json后端拒绝，orjson后端输出null(见FastJSONRenderer说明)"""
+        for value in (float('nan'), float('inf'), float('-inf')):
+            data = {'value': value}
+            with self.subTest(value=value):
+                with self.assertRaises(ValueError):
+                    JSONRenderer().render(data)
+                with self.assertRaises(ValueError):
+                    self.render_with('json', data)
+                if fastjson.orjson is not None:
+                    self.assertEqual(self.render_with('orjson', data), b'{"value":null}')
+
+
+class ExportTests(MissingTablesMixin, TestCase):
+    """流式导出：NDJSON/CSV、CSV公式转义、未开启时405"""
+
+    @classmethod
+    def setUpTestData(cls):
+        role = RoleModel.objects.create(id=ADMIN_ROLE_ID, name='管理员', code='admin', description='')
+        cls.user = UserModel.objects.create(account='admin', username='admin', password='x', nickname='admin',
+                                            phone='13800000000', email='a@example.com', description='',
+                                            signature='')
+        UserRoleModel.objects.create(user=cls.user, role=role)
+        LoginLog.objects.create(user_id='1', username='=HYPERLINK("http://x")', ip='127.0.0.1', ua='@SUM(A1)',
+                                status=1, message='-2+3')
+        LoginLog.objects.create(user_id='2', username='张三', ip=None, ua=None, status=0, message='密码错误')
+
+    def setUp(self):
+        cache.clear()
+        self.client = token_client(self.user.id)
+
+    def export(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content)
+
+    def test_ndjson(self):
+        content = self.export('/api/monitor/loginLog/export/')
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual([row['username'] for row in rows], ['=HYPERLINK("http://x")', '张三'])
+        self.assertEqual(rows[1]['ip'], None)
+
+    def test_csv_escapes_formulas(self):
+        content = self.export('/api/monitor/loginLog/export/?export_format=csv&fields=username,ip,ua,message')
+        self.assertTrue(content.startswith(codecs.BOM_UTF8))
+        rows = list(csv.reader(io.StringIO(content.decode('utf-8-sig'))))
+        self.assertEqual(rows, [
+            ['username', 'ip', 'ua', 'message'],
+            ["'=HYPERLINK(\"http://x\")", '127.0.0.1', "'@SUM(A1)", "'-2+3"],
+            ['张三', '', '', '密码错误'],
+        ])
+
+    def test_invalid_format(self):
+        response = self.client.get('/api/monitor/loginLog/export/?export_format=xlsx')
+        self.assertEqual(response.json()['code'], 400)
+
+    def test_not_enabled(self):
+        response = self.client.get('/api/academic/course/export/')
+        self.assertEqual(response.status_code, 405)
+        self.assertFalse(response.streaming)
+
+
+@override_settings(SEARCH_NGRAM_REFRESH_INTERVAL=0)
+class NgramSearchTests(MissingTablesMixin, TestCase):
+    """n-gram搜索后端：写入提交后按版本号重建索引"""
+
+    def setUp(self):
+        cache.clear()
+        NgramSearchBackend._indexes.clear()
+
+    def write(self, func, *args, **kwargs):
+        # 版本号在事务提交后更新
+        with self.captureOnCommitCallbacks(execute=True):
+            return func(*args, **kwargs)
+
+    def search(self, keyword):
+        queryset = NgramSearchBackend().search(Course.objects.all(), {'name': keyword})
+        return list(queryset.values_list('code', flat=True))
+
+    def test_insert_update_delete(self):
+        self.write(Course.objects.create, code='C1', name='数据结构')
+        database = self.write(Course.objects.create, code='C2', name='数据库原理与数据库设计')
+        os_course = self.write(Course.objects.create, code='C3', name='操作系统')
+        self.assertEqual(self.search('数据'), ['C2', 'C1'])
+        self.assertEqual(self.search('系统'), ['C3'])
+        self.assertEqual(self.search('网络'), [])
+
+        self.write(Course.objects.create, code='C4', name='大数据导论')
+        self.assertEqual(sorted(self.search('数据')), ['C1', 'C2', 'C4'])
+
+        os_course.name = '数据挖掘'
+        self.write(os_course.save)
+        self.assertEqual(self.search('系统'), [])
+        self.assertIn('C3', self.search('数据'))
+
+        self.write(database.delete)
+        self.assertEqual(sorted(self.search('数据')), ['C1', 'C3', 'C4'])
+
+    def test_stale_index_is_filtered(self):
+        """索引未重建时，已修改的记录仍由原条件排除"""
+        course = self.write(Course.objects.create, code='C1', name='数据结构')
+        self.assertEqual(self.search('数据'), ['C1'])
+        with override_settings(SEARCH_NGRAM_REFRESH_INTERVAL=3600):
+            NgramSearchBackend._indexes.clear()
+            self.assertEqual(self.search('数据'), ['C1'])
+            Course.objects.filter(pk=course.pk).update(name='编译原理')
+            self.assertEqual(self.search('数据'), [])
+
+    @override_settings(SEARCH_NGRAM_MAX_ROWS=1)
+    def test_oversized_table(self):
+        self.write(Course.objects.create, code='C1', name='数据结构')
+        second = self.write(Course.objects.create, code='C2', name='数据库原理')
+        self.assertEqual(sorted(self.search('数据')), ['C1', 'C2'])
+        index = NgramSearchBackend.get_index(Course, 'name')
+        self.assertTrue(index.oversized)
+        self.assertEqual(index.documents, {})
+
+        # 表变小后重新统计行数，恢复索引
+        self.write(second.delete)
+        index.oversized_interval = 0
+        self.assertEqual(self.search('数据'), ['C1'])
+        self.assertFalse(index.oversized)
+        self.assertEqual(len(index.documents), 1)
+
+
+class FullScanGuardTests(MissingTablesMixin, TestCase):
+    """大表上没有走索引的过滤/搜索被拒绝"""
+
+    @classmethod
+    def setUpTestData(cls):
+        Course.objects.create(code='C1', name='数据结构')
+
+    def setUp(self):
+        cache.clear()
+        NgramSearchBackend._indexes.clear()
+        self.client = token_client(1)
+        patcher = mock.patch('Base.Filter.get_table_rows_estimate', return_value=10 ** 6)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @override_settings(SEARCH_BACKEND='Base.Search.IcontainsSearchBackend')
+    def test_icontains_search_is_checked(self):
+        response = self.client.get('/api/academic/course/?name=数据')
+        self.assertEqual(response.json()['code'], 400)
+
+    @override_settings(SEARCH_BACKEND='Base.Search.NgramSearchBackend')
+    def test_indexed_search_is_allowed(self):
+        response = self.client.get('/api/academic/course/?name=数据')
+        self.assertEqual(response.json()['code'], 200)
+        self.assertEqual([row['code'] for row in response.json()['data']['list']], ['C1'])
+
+    @override_settings(SEARCH_BACKEND='Base.Search.NgramSearchBackend', SEARCH_NGRAM_MAX_ROWS=0)
+    def test_oversized_ngram_search_is_checked(self):
+        """超过行数上限的表退回__icontains，同样做检查"""
+        response = self.client.get('/api/academic/course/?name=数据')
+        self.assertEqual(response.json()['code'], 400)
+
+    def test_unfiltered_list_is_allowed(self):
+        response = self.client.get('/api/academic/course/')
+        self.assertEqual(response.json()['code'], 200)
+
+
+class FilterConfigTests(MissingTablesMixin, TestCase):
+    """filter_spec/ordering_fields在视图类定义时校验，未声明字段的参数不处理"""
+
+    def define(self, **attrs):
+        return type('ExamTestViewSet', (APIViewSet,), {
+            'queryset': Exam.objects.all(), 'serializer_class': ExamViewSet.serializer_class, **attrs
+        })
+
+    def test_invalid_config_fails_at_definition(self):
+        self.define(filter_spec={'exam_date': ['gte', 'lte']}, ordering_fields=['-exam_date', 'id'])
+        for attrs in ({'filter_spec': {'remark': ['exact']}},  # 没有索引
+                      {'filter_spec': {'missing': ['exact']}},  # 没有字段
+                      {'filter_spec': {'exam_date': ['contains']}},  # 不支持的运算符
+                      {'filter_spec': {'exam_date': 'gte'}},
+                      {'ordering_fields': ['remark']}):
+            with self.subTest(attrs), self.assertRaises(ImproperlyConfigured):
+                self.define(**attrs)
+
+    def test_query_params(self):
+        cache.clear()
+        client = token_client(1)
+        # 未声明字段带运算符后缀的参数不处理
+        self.assertEqual(client.get('/api/academic/exam/?remark__in=a,b&duration__gt=1').json()['code'], 200)
+        # 已声明字段使用未声明的运算符、参数格式错误时拒绝
+        self.assertEqual(client.get('/api/academic/exam/?exam_date__gt=2024-01-01').json()['code'], 400)
+        self.assertEqual(client.get('/api/academic/exam/?exam_date__gte=bad').json()['code'], 400)
+        self.assertEqual(client.get('/api/academic/exam/?ordering=remark').json()['code'], 400)
+
+
+class ThrottledView(APIView):
+    authentication_classes = []
+    permission_classes = []
+    throttle_classes = [IPRateThrottle, AccountRateThrottle]
+    throttle_scope = 'test'
+
+    def handle_exception(self, exc):
+        return throttled_response(exc) or super().handle_exception(exc)
+
+    def post(self, request):
+        return APIResponse()
+
+
+THROTTLE_RATES = {'test_ip': '2/1s'}  # 未配置test_account，账号维度不限流
+
+
+class ThrottleTests(SimpleTestCase):
+    """滑动窗口限流，默认使用django缓存保存请求时间"""
+
+    def setUp(self):
+        cache.clear()
+        self.limiter = SlidingWindowLimiter()
+        patcher = mock.patch('Base.Throttle.limiter', self.limiter)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        rates = mock.patch.dict(api_settings.DEFAULT_THROTTLE_RATES, THROTTLE_RATES)
+        rates.start()
+        self.addCleanup(rates.stop)
+        self.factory = APIRequestFactory()
+
+    def request(self, ip='10.0.0.1', **data):
+        request = self.factory.post('/', data, format='json', REMOTE_ADDR=ip)
+        return ThrottledView.as_view()(request)
+
+    def test_limit_and_window(self):
+        self.assertEqual([self.request().status_code for _ in range(2)], [200, 200])
+        response = self.request()
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '1')
+        # 其他IP不受影响
+        self.assertEqual(self.request(ip='10.0.0.2').status_code, 200)
+        # 窗口滑过后再次放行
+        time.sleep(1.05)
+        self.assertEqual(self.request().status_code, 200)
+
+    def test_blocked_key_skips_storage(self):
+        for _ in range(3):
+            self.request()
+        with mock.patch.object(self.limiter, 'get_connection', side_effect=AssertionError) as get_connection:
+            self.assertEqual(self.request().status_code, 429)
+        get_connection.assert_not_called()
+        self.assertEqual(self.limiter.stats()['local_denied'], 1)
+        self.assertEqual(self.limiter.stats()['denied'], 1)
+
+    def test_unconfigured_rate_and_missing_ident(self):
+        with mock.patch.dict(api_settings.DEFAULT_THROTTLE_RATES, {'test_ip': None}):
+            # 未配置频率、账号维度未配置，都不限流
+            self.assertEqual({self.request(username='admin').status_code for _ in range(5)}, {200})
+        with mock.patch.dict(api_settings.DEFAULT_THROTTLE_RATES, {'test_ip': None, 'test_account': '1/1m'}):
+            # 请求体没有账号时取不到标识，不限流
+            self.assertEqual({self.request().status_code for _ in range(3)}, {200})
+            self.assertEqual(self.request(username='Admin').status_code, 200)
+            self.assertEqual(self.request(username='admin ').status_code, 429)
+        self.assertEqual(self.limiter.stats()['allowed'], 1)
+
+
+@skipIf(fakeredis is None, '需要fakeredis与lupa')
+class RedisThrottleTests(ThrottleTests):
+    """使用django-redis时由Lua脚本在Redis内计数"""
+
+    def setUp(self):
+        caches = {'default': {
+            'BACKEND': 'django_redis.cache.RedisCache',
+            'LOCATION': 'redis://throttle-test:6379',
+            'OPTIONS': {'CONNECTION_POOL_KWARGS': {'connection_class': fakeredis.FakeConnection}},
+        }}
+        override = override_settings(CACHES=caches)
+        override.enable()
+        self.addCleanup(override.disable)
+        super().setUp()
+
+    def test_lua_script(self):
+        self.assertIsNotNone(self.limiter.get_connection())
+        self.assertEqual(self.limiter.hit('lua', 1, 60), 0)
+        self.assertGreater(self.limiter.hit('lua', 1, 60), 59)
+        self.assertIsNotNone(self.limiter._script)
+
+
+class KeysetPaginationTests(MissingTablesMixin, TestCase):
+    """游标分页：前后翻页往返、排序值相同时按主键定位、游标或页码无效时返回400"""
+
+    @classmethod
+    def setUpTestData(cls):
+        # 5条记录只有2个不同的创建时间，第2页与第3页之间的记录创建时间相同
+        cls.logs = [OperationLog.objects.create(module='test', message=str(i)) for i in range(5)]
+        for log, at in zip(cls.logs, [DAY, DAY, AT, AT, AT]):
+            OperationLog.objects.filter(pk=log.pk).update(create_time=at)
+
+    def paginate(self, ordering, **params):
+        paginator = KeysetPagination()
+        request = Request(APIRequestFactory().get('/', {'page_size': 2, **params}))
+        view = SimpleNamespace(cursor_ordering=ordering)
+        page = paginator.paginate_queryset(OperationLog.objects.all(), request, view)
+        return [log.message for log in page], paginator.get_next_link(), paginator.get_previous_link()
+
+    def walk(self, ordering):
+        """向后翻到最后一页，再向前翻回第一页"""
+        pages, cursor, previous = [], None, None
+        while True:
+            page, cursor, previous = self.paginate(ordering, **({'cursor': cursor} if cursor else {}))
+            pages.append(page)
+            if cursor is None:
+                break
+        backward = [pages[-1]]
+        while previous:
+            page, _, previous = self.paginate(ordering, cursor=previous)
+            backward.insert(0, page)
+        return pages, backward
+
+    def test_round_trip_by_pk(self):
+        pages, backward = self.walk('-id')
+        self.assertEqual(pages, [['4', '3'], ['2', '1'], ['0']])
+        self.assertEqual(backward, pages)
+
+    def test_ties_on_ordering_value(self):
+        # 创建时间相同的记录按主键排序，翻页时不重复、不遗漏
+        pages, backward = self.walk('create_time')
+        self.assertEqual(pages, [['0', '1'], ['2', '3'], ['4']])
+        self.assertEqual(backward, pages)
+        pages, backward = self.walk('-create_time')
+        self.assertEqual(pages, [['4', '3'], ['2', '1'], ['0']])
+        self.assertEqual(backward, pages)
+
+    def test_invalid_cursor(self):
+        cache.clear()
+        client = token_client(1)
+        response = client.get('/api/monitor/operationLog/', {'page_size': 2})
+        self.assertEqual([item['message'] for item in response.json()['data']['list']], ['4', '3'])
+        for cursor in ('bad', 'e30', '!!!'):  # e30 即 {}
+            with self.subTest(cursor):
+                response = client.get('/api/monitor/operationLog/', {'cursor': cursor})
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json()['message'], '无效的游标')
+
+    def test_invalid_page(self):
+        """页码分页的页码无效时返回400，不退回为完整列表"""
+        cache.clear()
+        client = token_client(1)
+        self.assertEqual(client.get('/api/academic/exam/', {'page': 1}).status_code, 200)
+        for page in ('abc', 0, 999):
+            with self.subTest(page):
+                response = client.get('/api/academic/exam/', {'page': page})
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json()['message'], '页码无效')
+
+
+class BulkTests(MissingTablesMixin, TestCase):
+    """批量接口：任一条校验失败时整批不写入、条数上限、写入后模型版本号自增"""
+    url = '/api/academic/course/bulk/'
+
+    def setUp(self):
+        cache.clear()
+        self.client = token_client(1)
+        self.first = Course.objects.create(code='B1', name='数据结构')
+        self.second = Course.objects.create(code='B2', name='操作系统')
+
+    def test_partial_validation_failure(self):
+        response = self.client.post(self.url, [{'code': 'B3', 'name': '编译原理'}, {'code': 'B4'}], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['errors'][0], {})
+        self.assertIn('name', response.json()['errors'][1])
+        self.assertFalse(Course.objects.filter(code='B3').exists())
+
+        response = self.client.patch(self.url, [{'id': self.first.pk, 'name': '新名称'},
+                                                {'id': self.second.pk, 'hours': 'abc'}], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.first.refresh_from_db()
+        self.assertEqual(self.first.name, '数据结构')
+
+    def test_max_items(self):
+        with mock.patch.object(CourseViewSet, 'bulk_max_items', 1):
+            response = self.client.post(self.url, [{'code': 'B3', 'name': 'a'}, {'code': 'B4', 'name': 'b'}],
+                                        format='json')
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.json()['message'], '单次批量操作最多1条')
+            response = self.client.patch(self.url, [{'id': self.first.pk, 'name': 'a'},
+                                                    {'id': self.second.pk, 'name': 'b'}], format='json')
+            self.assertEqual(response.status_code, 400)
+            response = self.client.delete(self.url, {'ids': [self.first.pk, self.second.pk]}, format='json')
+            self.assertEqual(response.status_code, 400)
+            # 未超过上限时正常执行
+            response = self.client.delete(self.url, {'ids': [self.first.pk]}, format='json')
+            self.assertEqual(response.json()['data']['count'], 1)
+        self.assertEqual(list(Course.objects.values_list('code', flat=True)), ['B2'])
+
+    def test_version_bumped_after_commit(self):
+        version = get_model_version(Course)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, [{'code': 'B3', 'name': 'a'}, {'code': 'B4', 'name': 'b'}],
+                                        format='json')
+            self.assertEqual(response.json()['data']['count'], 2)
+            # 事务提交前版本号不变
+            self.assertEqual(get_model_version(Course), version)
+        self.assertEqual(get_model_version(Course), version + 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(self.url, [{'id': self.first.pk, 'name': '新名称'}], format='json')
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(get_model_version(Course), version + 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(self.url, {'ids': [self.first.pk, self.second.pk]}, format='json')
+            self.assertEqual(response.json()['data']['count'], 2)
+        # 物理删除时post_delete信号也会自增版本号
+        self.assertGreater(get_model_version(Course), version + 2)
+        self.assertEqual(sorted(Course.objects.values_list('code', flat=True)), ['B3', 'B4'])
@@ -57,6 +57,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'middleware.query_middleware.QueryBudgetMiddleware',  # SQL查询统计与N+1检测
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -64,6 +65,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'middleware.operation_log_middleware.OperationLogMiddleware',  # 操作日志(异步批量写入)
     'middleware.auth_middleware.TokenAuthMiddleware',
 ]
 
@@ -118,6 +120,75 @@ CACHES = {
         }
     }
 }
+# 分页总数配置
+PAGINATION_COUNT_CACHE_TIMEOUT = 60  # 总数缓存时间(秒)，模型写入后按版本号自动失效
+PAGINATION_COUNT_ESTIMATE = False  # 是否对大表使用统计信息估算总数(仅MySQL)
+PAGINATION_ESTIMATE_THRESHOLD = 100000  # 表行数超过该阈值才使用估算值
+TABLE_ROWS_CACHE_TIMEOUT = 300  # 表统计信息缓存时间(秒)
+FILTER_FULL_SCAN_THRESHOLD = 100000  # 表行数超过该值时，过滤条件都不在索引列上的列表请求会被拒绝
+# 搜索后端：auto(MySQL全文索引/其他数据库使用进程内n-gram索引)，也可指定Base.Search中的后端类路径
+SEARCH_BACKEND = 'auto'
+# n-gram索引只用于小表：表行数超过MAX_ROWS不建索引，命中超过MAX_CANDIDATES条退回__icontains，每隔REFRESH_INTERVAL秒校验版本号
+SEARCH_NGRAM_MAX_ROWS = 50000
+SEARCH_NGRAM_MAX_CANDIDATES = 1000
+SEARCH_NGRAM_REFRESH_INTERVAL = 1
+# 响应缓存时间(秒)，视图设置cache_response = True后生效，数据写入后按模型版本号自动失效
+RESPONSE_CACHE_TIMEOUT = 300
+# SQL查询预算：单个请求查询次数超过预算(视图可通过query_budget单独设置)或同一SQL重复执行达到阈值时记录警告
+QUERY_BUDGET = 30
+QUERY_DUPLICATE_THRESHOLD = 5
+# 操作日志：请求记录放入有界队列，后台线程每隔FLUSH_INTERVAL毫秒或攒够BATCH_SIZE条批量写入，队列满时丢弃
+OPERATION_LOG_ENABLED = True
+OPERATION_LOG_QUEUE_SIZE = 10000
+OPERATION_LOG_BATCH_SIZE = 200
+OPERATION_LOG_FLUSH_INTERVAL = 1000
+OPERATION_LOG_EXCLUDE = ['/media', '/static', '/swagger', '/redoc']
+# JSON编解码后端：auto(安装了orjson时使用orjson)、orjson、json
+JSON_BACKEND = 'auto'
+# 免认证的路径前缀(按完整路径段匹配)；接口视图通过 auth_exempt = True 声明免认证
+AUTH_WHITE_LIST = ['/media/', '/static/']
+# 已验证Token的进程内缓存条数(LRU，条目在Token过期时失效)，0表示不缓存
+TOKEN_CACHE_SIZE = 10000
+# 登录会话表：登录/退出通过Redis发布事件实时同步到各进程，并每隔RESYNC_INTERVAL秒全量同步一次
+SESSION_CHANNEL = 'auth:session'
+SESSION_RESYNC_INTERVAL = 30
+# 角色权限表：进程内缓存每隔VERSION_INTERVAL秒校验一次版本号，Redis中的角色权限缓存CACHE_TIMEOUT秒
+PERMISSION_VERSION_INTERVAL = 1
+PERMISSION_CACHE_TIMEOUT = 3600
+PERMISSION_USER_TTL = 60  # 进程内缓存的用户角色有效期(秒)
+MENU_CACHE_TIMEOUT = 3600  # 角色菜单树缓存时间(秒)，菜单/角色菜单写入后按版本号自动失效
+# 用户最后活动时间延迟写入：每隔FLUSH_INTERVAL毫秒合并写入一次Redis与数据库
+ACTIVITY_FLUSH_INTERVAL = 5000
+ACTIVITY_BATCH_SIZE = 500
+ACTIVITY_CACHE_TIMEOUT = 7 * 24 * 3600  # Redis中活动时间的保存时间(秒)，不短于滑动过期窗口
+# 短信发送：请求只入队，工作线程按批提交给网关，失败按RETRY_BACKOFF毫秒指数退避重试
+SMS_GATEWAY = 'apps.oauth.services.sms.FakeSmsGateway'  # 短信网关类，需实现SmsGateway.send_batch
+SMS_CODE_EXPIRE = 300  # 验证码有效期(秒)，有效期内重复请求沿用同一验证码
+SMS_WORKERS = 2  # 工作线程数
+SMS_QUEUE_SIZE = 10000
+SMS_BATCH_SIZE = 50  # 每批最多条数
+SMS_BATCH_WAIT = 50  # 凑批最长等待(毫秒)
+SMS_MAX_RETRIES = 3
+SMS_RETRY_BACKOFF = 1000
+SMS_DEDUPE_WINDOW = 60  # 受理后多少秒内同一手机号、同一内容的短信不重复发送，0表示只在排队期间去重
+REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': [
+        'Base.Renderer.FastJSONRenderer',  # orjson渲染，输出与JSONRenderer一致(NaN/Infinity除外，见类说明)
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PERMISSION_CLASSES': [
+        'apps.oauth.permissions.HasPermission',  # 按视图的required_permissions校验权限编码
+    ],
+    # 滑动窗口限流频率(Base.Throttle)，键为 视图的throttle_scope_限流维度
+    'DEFAULT_THROTTLE_RATES': {
+        'login_ip': '30/min',  # 同一IP每分钟最多登录30次
+        'login_account': '10/5m',  # 同一账号每5分钟最多登录10次
+        'login_phone': '10/5m',  # 同一手机号每5分钟最多登录10次
+        'send_code_ip': '20/h',  # 同一IP每小时最多发送20条验证码
+        'send_code_phone': '1/min',  # 同一手机号每分钟最多发送1条验证码
+        'refresh_ip': '120/min',  # 同一IP每分钟最多刷新120次
+    },
+}
 # Channels 层配置 (使用 Redis 作为后端)
 CHANNEL_LAYERS = {
     "default": {
@@ -21,6 +21,7 @@ from django.conf.urls.static import static
 from rest_framework import permissions
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
+from utils.route_trie import auth_exempt
 
 # 配置 API 文档基本信息
 schema_view = get_schema_view(
@@ -37,11 +38,11 @@ schema_view = get_schema_view(
 )
 urlpatterns = [
     # 文档 JSON/YAML 下载
-    path('swagger<format>/', schema_view.without_ui(cache_timeout=0), name='schema-json'),
+    path('swagger<format>/', auth_exempt(schema_view.without_ui(cache_timeout=0)), name='schema-json'),
     # Swagger UI 页面
-    path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
+    path('swagger/', auth_exempt(schema_view.with_ui('swagger', cache_timeout=0)), name='schema-swagger-ui'),
     # ReDoc 页面
-    path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
+    path('redoc/', auth_exempt(schema_view.with_ui('redoc', cache_timeout=0)), name='schema-redoc'),
     # path('api/admin/', admin.site.urls),
     path('api/auth/', include('apps.oauth.urls')),  # 两端的认证系统
     path('api/as/', include('apps.userManage.urls')),  # adminServer的URL配置
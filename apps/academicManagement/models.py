@@ -57,7 +57,8 @@ from apps.userManage.models import DepartmentModel
 #   remark        VARCHAR(255) NULL,
 #   created_at    DATETIME     NOT NULL DEFAULT CURRENT_TIMESTAMP,
 #   updated_at    DATETIME     NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-#   INDEX idx_course (course_id)
+#   INDEX idx_course (course_id),
+#   INDEX idx_date (exam_date)
 # ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
 # -- 课程
@@ -207,6 +208,7 @@ class Exam(BaseModel):
         verbose_name_plural = verbose_name
         indexes = [
             models.Index(fields=['course', 'exam_date']),
+            models.Index(fields=['exam_date']),
         ]
 
     def __str__(self):
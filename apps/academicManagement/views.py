@@ -10,12 +10,15 @@ class CourseViewSet(APIViewSet):
     """课程管理"""
     queryset = Course.objects.all()
     serializer_class = CourseSerializer
+    cache_response = True  # 读多写少，缓存列表/详情响应
+    search_fields = ['name']
 
 
 class ClassRoomViewSet(APIViewSet):
     """教室管理"""
     queryset = Classroom.objects.all()
     serializer_class = ClassroomSerializer
+    cache_response = True  # 读多写少，缓存列表/详情响应
 
 
 class ScheduleViewSet(APIViewSet):
@@ -28,3 +31,5 @@ class ExamViewSet(APIViewSet):
     """考试管理"""
     queryset = Exam.objects.all()
     serializer_class = ExamSerializer
+    filter_spec = {'exam_date': ['gte', 'lte'], 'course': ['exact', 'in'], 'classroom': ['exact']}  # 按考试时间范围/课程/考场过滤
+    ordering_fields = ['exam_date', 'id']  # 支持 ?ordering=-exam_date
@@ -1,3 +1,4 @@
+from Base.AsyncViewSet import AsyncAPIViewSet
 from Base.ViewSet import APIViewSet
 from apps.campusServices.models import SportPlace, LibraryBook, TransportLine, Notification, WifiHotspot
 from apps.campusServices.serializers import SportPlaceSerializer, LibraryBookSerializer, TransportLineSerializer, \
@@ -14,18 +15,22 @@ class LibraryBookViewSet(APIViewSet):
     """图书馆管理"""
     queryset = LibraryBook.objects.all()
     serializer_class = LibraryBookSerializer
+    search_fields = ['title']
 
 
-class TransportLineViewSet(APIViewSet):
+class TransportLineViewSet(AsyncAPIViewSet):
     """交通管理"""
     queryset = TransportLine.objects.all()
     serializer_class = TransportLineSerializer
+    cache_response = True  # 读多写少，缓存列表/详情响应
 
 
-class NotificationViewSet(APIViewSet):
+class NotificationViewSet(AsyncAPIViewSet):
     """通知公告"""
     queryset = Notification.objects.all()
     serializer_class = NotificationSerializer
+    cache_response = True  # 读多写少，缓存列表/详情响应
+    search_fields = ['title', 'content']
 
 
 class WifiHotspotViewSet(APIViewSet):
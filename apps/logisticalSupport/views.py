@@ -1,3 +1,4 @@
+from Base.AsyncViewSet import AsyncAPIViewSet
 from Base.ViewSet import APIViewSet
 from apps.logisticalSupport.models import Facility, Maintenance, CleaningTask, CanteenMenu, SecurityEvent
 from apps.logisticalSupport.serializers import FacilitySerializer, MaintenanceSerializer, CleaningTaskSerializer, \
@@ -22,10 +23,11 @@ class CleaningTaskViewSet(APIViewSet):
     serializer_class = CleaningTaskSerializer
 
 
-class CanteenMenuViewSet(APIViewSet):
+class CanteenMenuViewSet(AsyncAPIViewSet):
     """食堂菜单管理"""
     queryset = CanteenMenu.objects.all()
     serializer_class = CanteenMenuSerializer
+    cache_response = True  # 读多写少，缓存列表/详情响应
 
 
 class SecurityEventViewSet(APIViewSet):
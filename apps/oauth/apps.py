@@ -1,6 +1,24 @@
 from django.apps import AppConfig
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
 
 
 class AuthsystemConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.oauth'
+
+    def ready(self):
+        from Base.Cache import track_model_versions
+        from apps.oauth.models import MenuModel, PermissionModel, RoleMenuModel, RolePermissionModel, UserRoleModel
+        from apps.oauth.services.permission import permission_registry
+
+        # 角色权限、菜单缓存依赖这些模型的版本号
+        track_model_versions(PermissionModel, RolePermissionModel, UserRoleModel, MenuModel, RoleMenuModel)
+
+        # 权限数据写入提交后本进程立即生效(提交前清空会重新加载到未提交前的旧数据)，其他进程按版本号失效
+        def invalidate(sender, using=None, **kwargs):
+            transaction.on_commit(permission_registry.invalidate, using=using)
+
+        for model in (PermissionModel, RolePermissionModel, UserRoleModel):
+            post_save.connect(invalidate, sender=model, weak=False, dispatch_uid=f'permission_registry_{model.__name__}_save')
+            post_delete.connect(invalidate, sender=model, weak=False, dispatch_uid=f'permission_registry_{model.__name__}_delete')
@@ -3,7 +3,15 @@
 """
 from django.contrib.auth.backends import ModelBackend
 from .models import UserModel
-from django.db.models import Q
+from django.db.models import F, Q
+
+
+def user_with_role():
+    """用户查询集，关联查询出角色ID与名称(role_pk/role_name)，登录时不再单独查询角色"""
+    return UserModel.objects.annotate(
+        role_pk=F('userrolemodel__role_id'),
+        role_name=F('userrolemodel__role__name'),
+    ).order_by('userrolemodel__id')
 
 
 class CustomAuthBackend(ModelBackend):
@@ -13,12 +21,12 @@ class CustomAuthBackend(ModelBackend):
             user = None
             # 用户名登录
             if mode == 'account':
-                user = UserModel.objects.get(Q(username=username) | Q(account=username))
+                user = user_with_role().filter(Q(username=username) | Q(account=username))[:1].get()
                 if not user.check_password(password):
                     return None
             # 手机号登录
             elif mode == 'phone':
-                user = UserModel.objects.get(Q(phone=kwargs.get('phone')))
+                user = user_with_role().filter(Q(phone=kwargs.get('phone')))[:1].get()
                 # 这里应该添加验证码验证逻辑
             else:
                 return None
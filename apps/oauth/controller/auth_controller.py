@@ -3,8 +3,12 @@ from django.contrib.auth import authenticate
 from django.utils import timezone
 from django.core.cache import cache
 from apps.oauth.services.sms import SmsService
+from apps.oauth.services.activity import activity_tracker
+from apps.oauth.services.permission import permission_registry
+from apps.oauth.services.session import session_registry
 from core.exceptions import AuthFailed, TokenInvalid
-from apps.oauth.models import UserRoleModel, RolePermissionModel
+from apps.oauth.backends import user_with_role
+from apps.oauth.models import RoleModel, UserRoleModel
 from utils.token import generate_token, verify_token
 
 
@@ -49,9 +53,9 @@ class AuthController:
 
     def _generate_auth_result(self, user):
         """生成认证结果(双Token)"""
-        # 更新最后活动时间(用于滑动过期)
+        # 更新最后活动时间(用于滑动过期)，由后台线程合并后批量写入
         user.last_login_time = timezone.now()
-        user.save(update_fields=['last_login_time'])
+        activity_tracker.touch(user.id, user.last_login_time)
 
         # 获取用户权限信息
         user_info = self._get_user_info(user)
@@ -65,11 +69,15 @@ class AuthController:
         }
 
     def _get_user_role(self, user):
-        try:
-            user_role = UserRoleModel.objects.get(user=user.id)
-            role = user_role.role
-        except UserRoleModel.DoesNotExist:
-            role = None
+        if hasattr(user, 'role_pk'):
+            # 认证后端已关联查询出角色
+            role = RoleModel(id=user.role_pk, name=user.role_name) if user.role_pk else None
+        else:
+            try:
+                user_role = UserRoleModel.objects.select_related('role').get(user=user.id)
+                role = user_role.role
+            except UserRoleModel.DoesNotExist:
+                role = None
 
         # 将角色信息挂载到user中
         setattr(user, 'role', role)
@@ -79,10 +87,8 @@ class AuthController:
         """获取用户角色和权限信息"""
         role = self._get_user_role(user)
 
-        permissions = []
-        if role:
-            role_permissions = RolePermissionModel.objects.filter(role=role.id)
-            permissions = [rp.permission.code for rp in role_permissions]
+        # 权限编码从角色权限表读取，不再逐条查询权限
+        permissions = sorted(permission_registry.get_codes(role.id)) if role else []
 
         return {
             "avatar": user.avatar.url if user.avatar else None,
@@ -122,12 +128,8 @@ class AuthController:
             expire=self.REFRESH_TOKEN_EXPIRE
         )
 
-        # 将refresh_token存入缓存，用于校验和滑动过期控制
-        self.cache.set(
-            f'refresh_token:{user.id}',
-            refresh_token,
-            timeout=int(self.SLIDING_EXPIRE.total_seconds())
-        )
+        # 将refresh_token存入缓存(用于校验和滑动过期控制)并通知各进程的会话表
+        session_registry.login(user.id, refresh_token, timeout=int(self.SLIDING_EXPIRE.total_seconds()))
         return refresh_token
 
     def generate_tokens(self, user):
@@ -150,20 +152,21 @@ class AuthController:
 
             user_id = payload['user_id']
 
-            # 检查缓存中的refresh_token是否匹配(防止被盗用)
-            cached_refresh = self.cache.get(f'refresh_token:{user_id}')
-            if cached_refresh != refresh_token:
+            # 检查缓存中的refresh_token是否匹配(防止被盗用)，与最后活动时间一次读取
+            refresh_key, activity_key = f'refresh_token:{user_id}', activity_tracker.cache_key(user_id)
+            cached = self.cache.get_many([refresh_key, activity_key])
+            if cached.get(refresh_key) != refresh_token:
                 raise TokenInvalid('Refresh Token已失效')
 
-            # 检查用户最后活动时间是否在滑动窗口内
-            from ..models import UserModel
-            user = UserModel.objects.get(id=user_id)
-            if timezone.now() - user.last_login_time > self.SLIDING_EXPIRE:
+            # 检查用户最后活动时间是否在滑动窗口内(数据库中的值可能尚未写入，取最新的记录)
+            user = user_with_role().get(id=user_id)
+            last_activity = activity_tracker.last_activity(user, cached.get(activity_key))
+            if timezone.now() - last_activity > self.SLIDING_EXPIRE:
                 raise TokenInvalid('长时间未活动，请重新登录')
 
-            # 更新最后活动时间(实现滑动过期)
+            # 更新最后活动时间(实现滑动过期)，由后台线程合并后批量写入
             user.last_login_time = timezone.now()
-            user.save(update_fields=['last_login_time'])
+            activity_tracker.touch(user.id, user.last_login_time)
 
             # 更新redis缓存中的token过期时间
             self.cache.expire(f'refresh_token:{user.id}', self.REFRESH_TOKEN_EXPIRE)
@@ -178,6 +181,6 @@ class AuthController:
 
     def logout(self, user_id: int):
         """登出处理"""
-        # 清除refresh_token缓存
-        self.cache.delete(f'refresh_token:{user_id}')
+        # 清除refresh_token缓存并通知各进程的会话表
+        session_registry.logout(user_id)
         return True
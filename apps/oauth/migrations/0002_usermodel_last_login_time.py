@@ -0,0 +1,19 @@
+# Generated by Django 4.2.23 on 2026-10-18 22:54
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('oauth', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='usermodel',
+            name='last_login_time',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='上次登录时间'),
+        ),
+    ]
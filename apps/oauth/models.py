@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from Base.Model import BaseModel
 from utils.encrypt import AESHelper
 
@@ -30,7 +31,8 @@ class UserModel(BaseModel):
     description = models.TextField(verbose_name="个人简介", null=False)
     signature = models.TextField(verbose_name="个性签名", null=False)
     status = models.BooleanField(default=True, verbose_name="状态")
-    last_login_time = models.DateTimeField(auto_now=True, verbose_name="上次登录时间")
+    # 只在登录/刷新Token时由ActivityTracker批量写入，不随其他字段的保存更新(原auto_now会让任何保存都刷新活动时间)
+    last_login_time = models.DateTimeField(default=timezone.now, verbose_name="上次登录时间")
     update_time = models.DateTimeField(auto_now=True, verbose_name="更新时间", null=False)
 
     class Meta:
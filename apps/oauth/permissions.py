@@ -0,0 +1,27 @@
+from rest_framework.permissions import BasePermission
+from apps.oauth.services.permission import has_permission
+
+
+class HasPermission(BasePermission):
+    """
+    按权限编码校验
+    视图声明 required_permissions，可以是权限编码(列表)，也可以按动作分别声明：
+        required_permissions = 'system:user:list'
+        required_permissions = {'create': 'system:user:add', 'destroy': ['system:user:remove']}
+    需要同时拥有全部编码；未声明的动作不做限制，超级管理员拥有全部权限
+    权限判断可能读取数据库，AsyncAPIViewSet在线程中执行该检查
+    """
+    message = '无权限访问'
+
+    def has_permission(self, request, view):
+        codes = self.get_required_permissions(view)
+        return all(has_permission(request, code) for code in codes)
+
+    @staticmethod
+    def get_required_permissions(view):
+        required = getattr(view, 'required_permissions', None) or ()
+        if isinstance(required, dict):
+            required = required.get(getattr(view, 'action', None) or view.request.method.lower(), ())
+        if isinstance(required, str):
+            return (required,)
+        return required
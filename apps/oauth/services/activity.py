@@ -0,0 +1,122 @@
+import atexit
+import logging
+import os
+import threading
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+ACTIVITY_KEY = 'user_activity:{user_id}'
+
+
+class ActivityTracker:
+    """
+    用户最后活动时间(UserModel.last_login_time)延迟批量写入
+    登录/刷新Token时只把 用户ID -> 时间 记入内存，同一用户多次活动合并为一条；后台线程每隔flush_interval毫秒
+    先把攒下的记录写入Redis(user_activity:{user_id}，各进程可见)，再用bulk_update写入数据库，
+    热点user表不再每次登录/刷新都执行一条单行UPDATE
+
+    读取最后活动时间时取 本进程未写入的记录、Redis、数据库 中最新的一个(last_activity)
+    只写活动时间不更新UserModel的版本号，避免每次写入都让用户相关的列表/详情缓存失效
+    """
+
+    def __init__(self, flush_interval=5000, batch_size=500, cache_timeout=7 * 24 * 3600):
+        self.flush_interval = flush_interval / 1000
+        self.batch_size = batch_size
+        self.cache_timeout = cache_timeout  # Redis中活动时间的保存时间(秒)，不短于滑动过期窗口
+        self.touches = 0  # 记录的活动次数
+        self.written = 0  # 写入数据库的行数
+        self.failed = 0  # 写入失败的行数
+        self._pending = {}  # 用户ID -> 最后活动时间
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    @classmethod
+    def from_settings(cls):
+        return cls(
+            flush_interval=getattr(settings, 'ACTIVITY_FLUSH_INTERVAL', 5000),
+            batch_size=getattr(settings, 'ACTIVITY_BATCH_SIZE', 500),
+            cache_timeout=getattr(settings, 'ACTIVITY_CACHE_TIMEOUT', 7 * 24 * 3600),
+        )
+
+    @staticmethod
+    def cache_key(user_id):
+        return ACTIVITY_KEY.format(user_id=user_id)
+
+    def touch(self, user_id, when):
+        """记录用户活动时间"""
+        self.ensure_started()
+        with self._lock:
+            self._pending[user_id] = when
+            self.touches += 1
+
+    def last_activity(self, user, cached=None):
+        """
+        用户最后活动时间
+        cached为调用方已读取的Redis记录(可与其他缓存键一起get_many)，不传时读取一次Redis
+        """
+        if cached is None:
+            cached = cache.get(self.cache_key(user.id))
+        candidates = [when for when in (user.last_login_time, cached, self._pending.get(user.id)) if when is not None]
+        return max(candidates) if candidates else None
+
+    def ensure_started(self):
+        """首次记录时启动后台线程；多进程部署时每个worker进程fork后各自启动"""
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._pending = {}
+            self._thread = threading.Thread(target=self._run, name='activity-tracker', daemon=True)
+            self._thread.start()
+            atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    def flush(self):
+        """把攒下的活动时间立即写入"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if pending:
+            self._write(pending)
+
+    def _write(self, pending):
+        from apps.oauth.models import UserModel
+        try:
+            cache.set_many({self.cache_key(user_id): when for user_id, when in pending.items()},
+                           timeout=self.cache_timeout)
+        except Exception as e:
+            logger.warning(f"用户活动时间写入缓存失败：{str(e)}")
+        # 后台线程有独立的数据库连接，写入前清理失效连接
+        close_old_connections()
+        users = [UserModel(id=user_id, last_login_time=when) for user_id, when in pending.items()]
+        try:
+            UserModel.objects.bulk_update(users, ['last_login_time'], batch_size=self.batch_size)
+            self.written += len(users)
+        except Exception as e:
+            self.failed += len(users)
+            logger.error(f"用户活动时间写入失败({len(users)}条)：{str(e)}")
+            # 放回待写入，期间有更新的记录时保留更新的
+            with self._lock:
+                for user_id, when in pending.items():
+                    self._pending.setdefault(user_id, when)
+
+    def stats(self):
+        return {
+            'pending': len(self._pending),
+            'touches': self.touches,
+            'written': self.written,
+            'failed': self.failed,
+        }
+
+
+activity_tracker = ActivityTracker.from_settings()
@@ -0,0 +1,63 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef
+from Base.Cache import make_versioned_key
+from Base.Response import APIResponse
+from apps.oauth.models import MenuModel, RoleMenuModel
+from utils import fastjson
+
+MENU_CACHE_PREFIX = 'menu:'
+MENU_TYPES = dict(MenuModel.MENU_TYPE_CHOICES)
+BUTTON = 2
+
+
+def build_menu_tree(role_id):
+    """
+    一次查询取出全部菜单(标注角色是否拥有)，在内存中组装菜单树，输出与TreeMenuSerializer一致：
+    顶级菜单为角色拥有的可见菜单，子菜单包含全部下级，按order排序，按钮输出为None
+    """
+    rows = MenuModel.objects.annotate(
+        granted=Exists(RoleMenuModel.objects.filter(role_id=role_id, menu_id=OuterRef('pk')))
+    ).values(
+        'id', 'parent_id', 'path', 'name', 'component', 'title', 'icon', 'order', 'type', 'visible', 'granted'
+    ).order_by('order', 'id')
+
+    children = {}
+    for row in rows:
+        children.setdefault(row['parent_id'], []).append(row)
+
+    def to_node(row, path):
+        if row['type'] == BUTTON:
+            return None
+        node = {
+            'path': row['path'],
+            'name': row['name'],
+            'component': row['component'],
+            'meta': {
+                'title': row['title'] or row['name'],
+                'icon': row['icon'],
+                'hidden': not row['visible'],
+                'sort': row['order'],
+                'type': MENU_TYPES.get(row['type'], row['type']),
+            },
+        }
+        # 跳过指向祖先的子菜单，避免数据错误时无限递归
+        kids = [kid for kid in children.get(row['id'], ()) if kid['id'] not in path]
+        if kids:
+            node['children'] = [to_node(kid, path | {kid['id']}) for kid in kids]
+        return node
+
+    return [to_node(row, {row['id']}) for row in children.get(None, ()) if row['granted'] and row['visible']]
+
+
+def get_menu_response_content(role_id) -> bytes:
+    """
+    角色的菜单响应(已编码的JSON)
+    按角色缓存，键带MenuModel/RoleMenuModel版本号，菜单或角色菜单写入后自动失效
+    """
+    key = make_versioned_key(MENU_CACHE_PREFIX, [MenuModel, RoleMenuModel], role_id)
+    content = cache.get(key)
+    if content is None:
+        content = fastjson.dumps(APIResponse(data=build_menu_tree(role_id), message='成功获取菜单').data)
+        cache.set(key, content, timeout=getattr(settings, 'MENU_CACHE_TIMEOUT', 3600))
+    return content
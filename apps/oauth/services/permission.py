@@ -0,0 +1,138 @@
+import threading
+import time
+from django.conf import settings
+from django.core.cache import cache
+from Base.Cache import get_model_version, make_versioned_key
+from apps.oauth.models import PermissionModel, RolePermissionModel, UserRoleModel
+
+ADMIN_ROLE_ID = 1  # 超级管理员角色，拥有全部权限
+PERMISSION_CACHE_PREFIX = 'perm:'
+
+
+class PermissionRegistry:
+    """
+    角色权限表
+    把每个角色的权限编码编译为frozenset，权限判断为一次集合查找：
+
+    - 进程内缓存 角色 -> 权限编码集合、用户 -> 角色，未命中时读取Redis(角色权限)或数据库
+    - 缓存以 RolePermissionModel/PermissionModel/UserRoleModel 的版本号为准，任一表写入后版本号变化，
+      各进程在 PERMISSION_VERSION_INTERVAL 秒内丢弃旧数据；本进程内的写入在事务提交后通过信号立即生效
+    - 用户 -> 角色另有 PERMISSION_USER_TTL 秒的有效期，绕过ORM的写入(如直接执行SQL)最迟在有效期后生效
+    """
+
+    def __init__(self, version_interval=1.0, timeout=3600, user_ttl=60):
+        self.version_interval = version_interval
+        self.timeout = timeout  # Redis中角色权限的缓存时间(秒)
+        self.user_ttl = user_ttl  # 进程内用户角色的有效期(秒)
+        self.hits = 0
+        self.misses = 0
+        self._roles = {}  # 角色ID -> frozenset(权限编码)
+        self._users = {}  # 用户ID -> (角色ID, 过期时间)
+        self._version = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls):
+        return cls(
+            version_interval=getattr(settings, 'PERMISSION_VERSION_INTERVAL', 1.0),
+            timeout=getattr(settings, 'PERMISSION_CACHE_TIMEOUT', 3600),
+            user_ttl=getattr(settings, 'PERMISSION_USER_TTL', 60),
+        )
+
+    @staticmethod
+    def get_version():
+        return tuple(get_model_version(model) for model in (RolePermissionModel, PermissionModel, UserRoleModel))
+
+    def check_version(self):
+        """版本号变化时清空进程内缓存，间隔内不重复读取版本号"""
+        now = time.monotonic()
+        if now - self._checked_at < self.version_interval:
+            return
+        version = self.get_version()
+        with self._lock:
+            if version != self._version:
+                self._roles = {}
+                self._users = {}
+                self._version = version
+            self._checked_at = now
+
+    def invalidate(self):
+        """本进程内的权限数据写入后调用，下次访问时重新校验版本号"""
+        with self._lock:
+            self._roles = {}
+            self._users = {}
+            self._checked_at = 0.0
+
+    def get_codes(self, role_id) -> frozenset:
+        """角色拥有的权限编码"""
+        if not role_id:
+            return frozenset()
+        self.check_version()
+        codes = self._roles.get(role_id)
+        if codes is not None:
+            self.hits += 1
+            return codes
+        self.misses += 1
+        codes = self.load_codes(role_id)
+        self._roles[role_id] = codes
+        return codes
+
+    def load_codes(self, role_id) -> frozenset:
+        key = make_versioned_key(PERMISSION_CACHE_PREFIX, [RolePermissionModel, PermissionModel], 'role', role_id)
+        codes = cache.get(key)
+        if codes is None:
+            codes = list(
+                RolePermissionModel.objects.filter(role_id=role_id)
+                .order_by('id').values_list('permission__code', flat=True)
+            )
+            cache.set(key, codes, timeout=self.timeout)
+        return frozenset(codes)
+
+    def get_role_id(self, user_id):
+        """
+        用户当前的角色ID(以数据库为准，不读取Token中的角色)，无角色时返回None
+        角色变更提交后，本进程立即生效，其他进程在版本号校验间隔内生效
+        """
+        if not user_id:
+            return None
+        self.check_version()
+        now = time.monotonic()
+        entry = self._users.get(user_id)
+        if entry is not None and entry[1] > now:
+            return entry[0]
+        role_id = UserRoleModel.objects.filter(user_id=user_id).values_list('role_id', flat=True).first()
+        self._users[user_id] = (role_id, now + self.user_ttl)
+        return role_id
+
+    def has_permission(self, role_id, code) -> bool:
+        if role_id == ADMIN_ROLE_ID:
+            return True
+        return code in self.get_codes(role_id)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'roles': len(self._roles),
+            'users': len(self._users),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+permission_registry = PermissionRegistry.from_settings()
+
+
+def get_request_role_id(request):
+    """请求用户当前的角色ID"""
+    return permission_registry.get_role_id(getattr(request, 'user_id', None))
+
+
+def is_admin(request) -> bool:
+    return get_request_role_id(request) == ADMIN_ROLE_ID
+
+
+def has_permission(request, code) -> bool:
+    """请求用户是否拥有权限编码，超级管理员拥有全部权限"""
+    return permission_registry.has_permission(get_request_role_id(request), code)
@@ -0,0 +1,180 @@
+import logging
+import os
+import threading
+import time
+from django.conf import settings
+from django.core.cache import cache
+from utils import fastjson
+
+logger = logging.getLogger(__name__)
+
+SESSION_KEY = 'refresh_token:{user_id}'
+
+
+class SessionRegistry:
+    """
+    进程内的登录会话表
+    TokenAuthMiddleware 每个请求都要确认用户未退出登录(refresh_token:{user_id} 存在)，
+    会话表把这一步变成内存查找：
+
+    - 登录/退出时 AuthController 写入/删除refresh_token并通过Redis发布事件，各进程的监听线程实时更新本地会话表
+    - 每隔 SESSION_RESYNC_INTERVAL 秒扫描一次 refresh_token:* 全量同步，修正丢失的事件与自然过期的会话
+    - 监听线程未连上Redis(启动中、断线重连、缓存后端不是django-redis)时退回逐请求读取缓存，不会放过已退出的用户
+    """
+
+    def __init__(self, channel='auth:session', resync_interval=30, reconnect_delay=5):
+        self.channel = channel
+        self.resync_interval = resync_interval
+        self.reconnect_delay = reconnect_delay
+        self.resyncs = 0  # 全量同步次数
+        self.events = 0  # 收到的事件数
+        self.fallbacks = 0  # 退回读取缓存的次数
+        self._sessions = set()
+        self._journal = None  # 全量同步期间收到的事件，同步完成后重放
+        self._ready = False  # 已订阅并完成首次同步
+        self._lock = threading.Lock()
+        self._pid = None
+
+    @classmethod
+    def from_settings(cls):
+        return cls(
+            channel=getattr(settings, 'SESSION_CHANNEL', 'auth:session'),
+            resync_interval=getattr(settings, 'SESSION_RESYNC_INTERVAL', 30),
+        )
+
+    @staticmethod
+    def get_connection():
+        """原生Redis连接，缓存后端不是django-redis时返回None"""
+        try:
+            from django_redis import get_redis_connection
+            return get_redis_connection('default')
+        except (ImportError, NotImplementedError):
+            return None
+
+    # 写入端(AuthController)
+
+    def login(self, user_id, refresh_token, timeout):
+        """保存refresh_token并发布登录事件"""
+        key = SESSION_KEY.format(user_id=user_id)
+        self.publish('login', user_id, lambda pipe: pipe.set(
+            cache.client.make_key(key), cache.client.encode(refresh_token), ex=timeout
+        ), lambda: cache.set(key, refresh_token, timeout=timeout))
+
+    def logout(self, user_id):
+        """删除refresh_token并发布退出事件"""
+        key = SESSION_KEY.format(user_id=user_id)
+        self.publish('logout', user_id, lambda pipe: pipe.delete(cache.client.make_key(key)),
+                     lambda: cache.delete(key))
+
+    def publish(self, op, user_id, write, fallback):
+        """
+        写入会话缓存并发布事件，django-redis下两条命令通过pipeline一次往返发送
+        write(pipe)向pipeline添加写命令，fallback()为缓存后端不是django-redis时的写入
+        """
+        # 本进程立即生效，其他进程通过事件更新
+        self.apply(op, str(user_id))
+        connection = self.get_connection()
+        if connection is None:
+            fallback()
+            return
+        pipe = connection.pipeline(transaction=False)
+        write(pipe)
+        pipe.publish(self.channel, fastjson.dumps({'op': op, 'user_id': str(user_id)}))
+        # 写入失败时抛出异常(与直接写缓存一致)；只有发布失败时其他进程在下一次全量同步后更新
+        results = pipe.execute(raise_on_error=False)
+        if isinstance(results[0], Exception):
+            raise results[0]
+        if isinstance(results[1], Exception):
+            logger.warning(f'会话事件发布失败：{results[1]}')
+
+    # 读取端(TokenAuthMiddleware)
+
+    def is_active(self, user_id) -> bool:
+        """用户是否处于登录状态"""
+        if self.ensure_started():
+            return str(user_id) in self._sessions
+        self.fallbacks += 1
+        return bool(cache.get(SESSION_KEY.format(user_id=user_id)))
+
+    async def ais_active(self, user_id) -> bool:
+        """is_active的异步版本，退回读取缓存时使用异步接口"""
+        if self.ensure_started():
+            return str(user_id) in self._sessions
+        self.fallbacks += 1
+        return bool(await cache.aget(SESSION_KEY.format(user_id=user_id)))
+
+    def ensure_started(self) -> bool:
+        """首次调用时启动监听线程(多进程部署时每个进程各自启动)，返回会话表是否可用"""
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._ready = False
+                    if self.get_connection() is not None:
+                        threading.Thread(target=self._run, name='session-registry', daemon=True).start()
+                    self._pid = os.getpid()
+        return self._ready
+
+    def _run(self):
+        while True:
+            try:
+                pubsub = self.get_connection().pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                # 先订阅再同步，同步期间的事件不会丢失
+                self.resync()
+                self._ready = True
+                next_resync = time.monotonic() + self.resync_interval
+                while True:
+                    message = pubsub.get_message(timeout=1.0)
+                    if message and message['type'] == 'message':
+                        event = fastjson.loads(message['data'])
+                        self.events += 1
+                        self.apply(event['op'], event['user_id'])
+                    if time.monotonic() >= next_resync:
+                        self.resync()
+                        next_resync = time.monotonic() + self.resync_interval
+            except Exception as e:
+                self._ready = False
+                logger.warning(f'会话表同步中断，{self.reconnect_delay}秒后重连：{e}')
+                time.sleep(self.reconnect_delay)
+
+    def apply(self, op, user_id):
+        with self._lock:
+            if self._journal is not None:
+                self._journal.append((op, user_id))
+            if op == 'login':
+                self._sessions.add(user_id)
+            else:
+                self._sessions.discard(user_id)
+
+    def resync(self):
+        """扫描 refresh_token:* 重建会话表"""
+        with self._lock:
+            self._journal = []
+        try:
+            prefix = SESSION_KEY.format(user_id='')
+            sessions = {key[len(prefix):] for key in cache.iter_keys(f'{prefix}*')}
+        except Exception:
+            with self._lock:
+                self._journal = None
+            raise
+        with self._lock:
+            for op, user_id in self._journal:
+                if op == 'login':
+                    sessions.add(user_id)
+                else:
+                    sessions.discard(user_id)
+            self._sessions = sessions
+            self._journal = None
+        self.resyncs += 1
+
+    def stats(self):
+        return {
+            'ready': self._ready,
+            'sessions': len(self._sessions),
+            'events': self.events,
+            'resyncs': self.resyncs,
+            'fallbacks': self.fallbacks,
+        }
+
+
+session_registry = SessionRegistry.from_settings()
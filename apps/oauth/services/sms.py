@@ -1,22 +1,262 @@
+from django.conf import settings
 from django.core.cache import cache
+from django.utils.module_loading import import_string
+import atexit
+import os
+import queue
 import random
 import logging
+import threading
+import time
 
 logger = logging.getLogger(__name__)
 
 
+class SmsGateway:
+    """
+    短信网关接口
+    send_batch 一次提交多条短信，返回发送失败的短信(全部失败可直接抛出异常)，失败的短信由SmsDispatcher重试
+    每条短信为 {'phone': 手机号, 'params': 模板参数}
+    """
+
+    def send_batch(self, messages) -> list:
+        raise NotImplementedError
+
+
+class FakeSmsGateway(SmsGateway):
+    """本地模拟网关：不真正发送，记录在sent中并写日志，可模拟网关延迟与失败"""
+
+    def __init__(self, latency=0, fail_rate=0.0):
+        self.latency = latency  # 每批的模拟延迟(秒)
+        self.fail_rate = fail_rate  # 单条短信的模拟失败率
+        self.sent = []
+        self.batches = 0
+
+    def send_batch(self, messages) -> list:
+        if self.latency:
+            time.sleep(self.latency)
+        self.batches += 1
+        failed = []
+        for message in messages:
+            if self.fail_rate and random.random() < self.fail_rate:
+                failed.append(message)
+                continue
+            self.sent.append(message)
+            logger.info(f"模拟发送短信：{message['phone']} -> {message['params']}")
+        return failed
+
+
+class SmsDispatcher:
+    """
+    短信异步发送
+    请求线程只把短信放入有界队列，工作线程池按批提交给网关：攒够batch_size条或等待batch_wait毫秒即提交一批；
+    发送失败按 retry_backoff * 2^(n-1) 毫秒退避重试，最多max_retries次；
+    同一手机号已在队列中(或等待重试)时不重复入队，受理后dedupe_window秒内同一手机号、同一内容的短信也不再发送
+    (验证码有效期内重复请求沿用同一验证码，窗口内的重复请求只发一次)；最终发送失败或被丢弃的短信不计入窗口
+    """
+
+    def __init__(self, gateway=None, workers=2, queue_size=10000, batch_size=50, batch_wait=50,
+                 max_retries=3, retry_backoff=1000, dedupe_window=60):
+        self.gateway = gateway
+        self.workers = workers
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait / 1000
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff / 1000
+        self.dedupe_window = dedupe_window
+        self.sent = 0  # 发送成功的条数
+        self.retried = 0  # 重试次数
+        self.failed = 0  # 重试后仍失败(放弃)的条数
+        self.dropped = 0  # 队列满丢弃的条数
+        self.deduped = 0  # 重复短信被忽略的次数
+        self._pending = set()  # 队列中或等待重试的手机号
+        self._recent = {}  # (手机号, 内容) -> 受理时间(time.monotonic)
+        self._next_prune = 0
+        self._lock = threading.Lock()
+        self._threads = []
+        self._pid = None
+
+    @classmethod
+    def from_settings(cls):
+        return cls(
+            workers=getattr(settings, 'SMS_WORKERS', 2),
+            queue_size=getattr(settings, 'SMS_QUEUE_SIZE', 10000),
+            batch_size=getattr(settings, 'SMS_BATCH_SIZE', 50),
+            batch_wait=getattr(settings, 'SMS_BATCH_WAIT', 50),
+            max_retries=getattr(settings, 'SMS_MAX_RETRIES', 3),
+            retry_backoff=getattr(settings, 'SMS_RETRY_BACKOFF', 1000),
+            dedupe_window=getattr(settings, 'SMS_DEDUPE_WINDOW', 60),
+        )
+
+    def get_gateway(self):
+        if self.gateway is None:
+            self.gateway = import_string(getattr(settings, 'SMS_GATEWAY', 'apps.oauth.services.sms.FakeSmsGateway'))()
+        return self.gateway
+
+    def send(self, phone, params) -> bool:
+        """短信入队，返回是否已受理(队列已满时返回False)"""
+        self.ensure_started()
+        message = {'phone': phone, 'params': params, 'attempts': 0}
+        key = self.dedupe_key(message)
+        now = time.monotonic()
+        with self._lock:
+            sent_at = self._recent.get(key)
+            if phone in self._pending or (sent_at is not None and now - sent_at < self.dedupe_window):
+                self.deduped += 1
+                return True
+            self._pending.add(phone)
+            if self.dedupe_window:
+                self._prune(now)
+                self._recent[key] = now
+        try:
+            self.queue.put_nowait(message)
+        except queue.Full:
+            self._release(message)
+            with self._lock:
+                self.dropped += 1
+            logger.warning(f"短信队列已满，丢弃：{phone}")
+            return False
+        return True
+
+    @staticmethod
+    def dedupe_key(message):
+        return message['phone'], tuple(sorted(message['params'].items()))
+
+    def _prune(self, now):
+        """每个窗口周期清理一次过期的去重记录(调用方持有锁)"""
+        if now < self._next_prune:
+            return
+        self._recent = {k: v for k, v in self._recent.items() if now - v < self.dedupe_window}
+        self._next_prune = now + self.dedupe_window
+
+    def _release(self, message):
+        """短信最终未发出：移出等待集合与去重记录，允许再次发送"""
+        with self._lock:
+            self._pending.discard(message['phone'])
+            self._recent.pop(self.dedupe_key(message), None)
+
+    def ensure_started(self):
+        """首次发送时启动工作线程；多进程部署时每个worker进程fork后各自启动"""
+        if self._threads and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._threads and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._pending = set()
+            self._recent = {}
+            self._threads = [
+                threading.Thread(target=self._run, name=f'sms-dispatcher-{i}', daemon=True)
+                for i in range(self.workers)
+            ]
+            for thread in self._threads:
+                thread.start()
+            atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            self._deliver(self._collect())
+
+    def _collect(self):
+        """取出一批短信：攒够batch_size条或距离本批第一条超过batch_wait即返回"""
+        batch = [self.queue.get()]
+        deadline = time.monotonic() + self.batch_wait
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _deliver(self, batch):
+        try:
+            failed = self.get_gateway().send_batch(batch)
+        except Exception as e:
+            logger.warning(f"短信网关调用失败({len(batch)}条)：{str(e)}")
+            failed = batch
+        failed_phones = {message['phone'] for message in failed}
+        with self._lock:
+            for message in batch:
+                if message['phone'] not in failed_phones:
+                    self._pending.discard(message['phone'])
+                    self.sent += 1
+        for message in failed:
+            self._retry(message)
+
+    def _retry(self, message):
+        message['attempts'] += 1
+        if message['attempts'] > self.max_retries:
+            self._release(message)
+            with self._lock:
+                self.failed += 1
+            logger.error(f"短信发送失败，已重试{self.max_retries}次：{message['phone']}")
+            return
+        self.retried += 1
+        delay = self.retry_backoff * 2 ** (message['attempts'] - 1)
+        timer = threading.Timer(delay, self._requeue, args=(message,))
+        timer.daemon = True
+        timer.start()
+
+    def _requeue(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except queue.Full:
+            self._release(message)
+            with self._lock:
+                self.dropped += 1
+
+    def flush(self):
+        """把队列中剩余的短信立即发送一次(进程退出时调用，不再重试)"""
+        batch = []
+        while True:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        if batch:
+            try:
+                self.get_gateway().send_batch(batch)
+            except Exception as e:
+                logger.error(f"短信发送失败({len(batch)}条)：{str(e)}")
+
+    def stats(self):
+        return {
+            'queued': self.queue.qsize(),
+            'pending': len(self._pending),
+            'sent': self.sent,
+            'retried': self.retried,
+            'failed': self.failed,
+            'dropped': self.dropped,
+            'deduped': self.deduped,
+        }
+
+
+sms_dispatcher = SmsDispatcher.from_settings()
+
+
 class SmsService:
     def __init__(self):
         self.cache_prefix = "sms-code:"
 
     def send_sms_code(self, phone: str) -> bool:
-        """发送短信验证码（模拟实现）"""
+        """发送短信验证码：验证码有效期内重复请求沿用同一验证码，短信交给SmsDispatcher异步发送"""
+        expire = getattr(settings, 'SMS_CODE_EXPIRE', 300)
         code = self._generate_code()
-        if self.save_sms_code(phone, code):
-            print(code)
-            logger.info(f"模拟发送短信验证码：{phone} -> {code}")
-            return True
-        return False
+        try:
+            if not cache.add(f"{self.cache_prefix}{phone}", code, timeout=expire):
+                cached_code = cache.get(f"{self.cache_prefix}{phone}")
+                if cached_code:
+                    code = cached_code
+                else:
+                    cache.set(f"{self.cache_prefix}{phone}", code, timeout=expire)
+        except Exception as e:
+            logger.error(f"存储验证码失败：{str(e)}")
+            return False
+        return sms_dispatcher.send(phone, {'code': code, 'expire': expire // 60})
 
     def verify_sms_code(self, phone: str, code: str) -> bool:
         """验证短信验证码"""
@@ -35,4 +275,4 @@ class SmsService:
     @staticmethod
     def _generate_code(length: int = 6) -> str:
         """生成数字验证码"""
-        return ''.join(str(random.randint(0, 9)) for _ in range(length))
\ No newline at end of file
+        return ''.join(str(random.randint(0, 9)) for _ in range(length))
@@ -0,0 +1,231 @@
+import time
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import SimpleTestCase, TestCase
+from django.urls import include, path, re_path
+from rest_framework.test import APIClient
+from rest_framework.views import APIView
+from middleware.auth_middleware import TokenAuthMiddleware
+from utils.encrypt import AESHelper
+from utils.testing import assert_max_queries, assert_view_queries
+from apps.oauth.services.sms import FakeSmsGateway, SmsDispatcher
+from utils.route_trie import RouteTrie, auth_exempt
+from utils.token import generate_token
+from .models import RoleModel, UserModel, UserRoleModel, PermissionModel, RolePermissionModel
+
+
+class AuthQueryCountTests(TestCase):
+    """登录与菜单接口的查询次数"""
+
+    @classmethod
+    def setUpTestData(cls):
+        role = RoleModel.objects.create(name='管理员', code='admin', description='')
+        cls.user = UserModel.objects.create(
+            account='sc-admin', username='admin', password=AESHelper().aes_encrypt('admin123'),
+            nickname='admin', phone='13800000000', email='admin@example.com', description='', signature=''
+        )
+        UserRoleModel.objects.create(user=cls.user, role=role)
+        for i in range(3):
+            permission = PermissionModel.objects.create(code=f'perm:{i}', name=f'权限{i}', description='')
+            RolePermissionModel.objects.create(role=role, permission=permission)
+        cls.role = role
+
+    def setUp(self):
+        # TestCase内不会提交事务，版本号不变，清空缓存避免用例之间互相影响
+        cache.clear()
+
+    def authorized_client(self):
+        token = generate_token({'user_id': self.user.id, 'username': self.user.username,
+                                'role_id': self.role.id, 'token_type': 'access'}, 7200)
+        cache.set(f'refresh_token:{self.user.id}', token, 7200)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        return client
+
+    def test_login(self):
+        """查询用户及角色、加载权限编码，共两次"""
+        client = APIClient()
+        with assert_max_queries(2):
+            response = client.post('/api/auth/login', {'username': 'sc-admin', 'password': 'admin123'},
+                                   format='json')
+        self.assertEqual(response.status_code, 200)
+
+    def test_menus(self):
+        """首次请求一次查询，命中缓存后不再查询"""
+        client = self.authorized_client()
+        response = assert_view_queries(client, '/api/auth/menus', max_queries=1)
+        self.assertEqual(response.status_code, 200)
+        response = assert_view_queries(client, '/api/auth/menus', max_queries=0)
+        self.assertEqual(response.status_code, 200)
+
+
+class PublicView(APIView):
+    auth_exempt = True  # 无需登录
+
+
+class PrivateView(APIView):
+    pass
+
+
+def public_view(request, **kwargs):
+    return HttpResponse()
+
+
+class TrieURLConf:
+    """免认证路由测试用的URL配置"""
+    urlpatterns = [
+        path('api/', include([
+            path('login', PublicView.as_view()),
+            path('logout', PrivateView.as_view()),
+            path('send_code/<str:phone>', PublicView.as_view()),
+            path('item/<int:id>', auth_exempt(public_view)),
+            path('item/<int:id>/edit', PrivateView.as_view()),
+            path('file/<path:name>/raw', PublicView.as_view()),
+            re_path(r'^report/(?P<year>\d{4})/$', auth_exempt(public_view)),
+        ])),
+    ]
+
+
+class RouteTrieTests(SimpleTestCase):
+    """免认证路由只匹配声明的路由本身"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.trie = RouteTrie.build(['/media/'], urlconf=TrieURLConf)
+
+    def assertExempt(self, paths, expected):
+        for path_info in paths:
+            with self.subTest(path_info):
+                self.assertIs(self.trie.match(path_info), expected)
+
+    def test_exact_routes(self):
+        self.assertExempt(['/api/login'], True)
+        self.assertExempt(['/api', '/api/', '/api/login/extra', '/api/loginx', '/api/logout', '/login'], False)
+
+    def test_parameterised_routes(self):
+        self.assertExempt(['/api/send_code/13800000000', '/api/item/3', '/api/report/2024/'], True)
+        self.assertExempt([
+            '/api/send_code', '/api/send_code/138/x', '/api/item/x', '/api/item/3/edit', '/api/report/24/',
+            '/api/report/2024/x/',
+        ], False)
+
+    def test_path_converter(self):
+        """path转换器可以跨路径段，但只匹配该路由"""
+        self.assertExempt(['/api/file/a/raw', '/api/file/a/b/c/raw'], True)
+        self.assertExempt(['/api/file/a', '/api/file/a/b', '/api/file/a/raw/x'], False)
+
+    def test_prefixes(self):
+        self.assertExempt(['/media/avatars/a.png', '/media'], True)
+        self.assertExempt(['/mediax/a.png', '/api/media/a.png'], False)
+
+    def test_project_routes(self):
+        """项目中声明了auth_exempt的视图"""
+        trie = RouteTrie.build([])
+        for path_info in ('/api/auth/login', '/api/auth/register', '/api/auth/refresh',
+                          '/api/auth/send_code/13800000000', '/api/publicOpinion/test/1'):
+            with self.subTest(path_info):
+                self.assertTrue(trie.match(path_info))
+        for path_info in ('/api/auth/menus', '/api/auth/mine', '/api/auth/logout', '/api/auth/login/extra',
+                          '/api/as/user/', '/api/test'):
+            with self.subTest(path_info):
+                self.assertFalse(trie.match(path_info))
+
+
+class TokenAuthMiddlewareTests(SimpleTestCase):
+    """中间件启动时构建免认证路由，其他路由需要Token"""
+
+    def test_whitelist_built_on_init(self):
+        middleware = TokenAuthMiddleware(lambda request: HttpResponse())
+        self.assertIsInstance(middleware.whitelist, RouteTrie)
+        self.assertTrue(middleware.whitelist.match('/api/auth/login'))
+
+    def test_requests(self):
+        self.assertEqual(self.client.get('/api/auth/menus').status_code, 401)
+        self.assertEqual(self.client.get('/api/publicOpinion/test/1/extra').status_code, 401)
+        self.assertEqual(self.client.get('/api/auth/menus', HTTP_AUTHORIZATION='Bearer bad').status_code, 401)
+        self.assertEqual(self.client.get('/static/missing.css').status_code, 404)
+
+
+def wait_until(condition, timeout=2):
+    """等待工作线程处理完成"""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError('等待超时')
+        time.sleep(0.005)
+
+
+class SmsDispatcherTests(SimpleTestCase):
+    """短信异步发送：批量投递、失败重试、重复短信去重"""
+
+    def dispatcher(self, **kwargs):
+        options = {'gateway': FakeSmsGateway(), 'workers': 1, 'batch_wait': 20, 'max_retries': 2, 'retry_backoff': 1}
+        options.update(kwargs)
+        return SmsDispatcher(**options)
+
+    def test_delivery(self):
+        dispatcher = self.dispatcher()
+        self.assertTrue(dispatcher.send('13800000001', {'code': '111111'}))
+        self.assertTrue(dispatcher.send('13800000002', {'code': '222222'}))
+        wait_until(lambda: dispatcher.sent == 2)
+        self.assertEqual([m['phone'] for m in dispatcher.gateway.sent], ['13800000001', '13800000002'])
+        self.assertEqual(dispatcher.gateway.batches, 1)
+        self.assertEqual(dispatcher.stats()['pending'], 0)
+
+    def test_retry_and_failure(self):
+        dispatcher = self.dispatcher(gateway=FakeSmsGateway(fail_rate=1.0))
+        dispatcher.send('13800000001', {'code': '111111'})
+        wait_until(lambda: dispatcher.failed == 1)
+        self.assertEqual(dispatcher.retried, 2)
+        self.assertEqual(dispatcher.gateway.batches, 3)
+        self.assertEqual(dispatcher.sent, 0)
+        self.assertEqual(dispatcher.stats()['pending'], 0)
+        # 最终失败的短信不计入去重窗口，可以再次发送
+        dispatcher.gateway.fail_rate = 0
+        dispatcher.send('13800000001', {'code': '111111'})
+        wait_until(lambda: dispatcher.sent == 1)
+        self.assertEqual(dispatcher.deduped, 0)
+
+    def test_gateway_error_is_retried(self):
+        dispatcher = self.dispatcher()
+        send_batch = dispatcher.gateway.send_batch
+        calls = []
+
+        def flaky(messages):
+            calls.append(len(messages))
+            if len(calls) == 1:
+                raise ConnectionError('网关不可用')
+            return send_batch(messages)
+
+        dispatcher.gateway.send_batch = flaky
+        dispatcher.send('13800000001', {'code': '111111'})
+        wait_until(lambda: dispatcher.sent == 1)
+        self.assertEqual(dispatcher.retried, 1)
+        self.assertEqual(len(calls), 2)
+
+    def test_dedupe_while_queued(self):
+        dispatcher = self.dispatcher(gateway=FakeSmsGateway(latency=0.1), dedupe_window=0)
+        dispatcher.send('13800000001', {'code': '111111'})
+        dispatcher.send('13800000001', {'code': '222222'})
+        wait_until(lambda: dispatcher.sent == 1)
+        self.assertEqual(dispatcher.deduped, 1)
+        # 未开启去重窗口时，发送完成后可以再次发送
+        dispatcher.send('13800000001', {'code': '111111'})
+        wait_until(lambda: dispatcher.sent == 2)
+        self.assertEqual(dispatcher.deduped, 1)
+
+    def test_dedupe_window(self):
+        dispatcher = self.dispatcher(dedupe_window=0.2)
+        dispatcher.send('13800000001', {'code': '111111'})
+        wait_until(lambda: dispatcher.sent == 1)
+        dispatcher.send('13800000001', {'code': '111111'})
+        self.assertEqual(dispatcher.deduped, 1)
+        # 内容不同(验证码已更换)时照常发送
+        dispatcher.send('13800000001', {'code': '222222'})
+        wait_until(lambda: dispatcher.sent == 2)
+        time.sleep(0.2)
+        dispatcher.send('13800000001', {'code': '111111'})
+        wait_until(lambda: dispatcher.sent == 3)
+        self.assertEqual(dispatcher.deduped, 1)
+        self.assertEqual([m['params']['code'] for m in dispatcher.gateway.sent], ['111111', '222222', '111111'])
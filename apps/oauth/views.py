@@ -1,20 +1,35 @@
+from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.mixins import RetrieveModelMixin
+from rest_framework.renderers import JSONRenderer
 from rest_framework.request import Request
+from rest_framework.response import Response
 from rest_framework.generics import GenericAPIView
-from .serializers import RegisterSerializer, LoginSerializer, TreeMenuSerializer, UserDetailSerializer
+from .serializers import RegisterSerializer, LoginSerializer, UserDetailSerializer
 from apps.oauth.controller.auth_controller import AuthController
+from apps.oauth.services.menu import get_menu_response_content
 from apps.oauth.services.sms import SmsService
 from core.exceptions import APIError, AuthFailed
+from utils import fastjson
 from utils.rules import phone_validator
 from Base.Response import APIResponse
-from .models import MenuModel, RoleMenuModel, UserModel
+from Base.Throttle import AccountRateThrottle, IPRateThrottle, PhoneRateThrottle, throttled_response
+from .models import UserModel
+
+
+class ThrottledAPIView(APIView):
+    """限流的认证接口，被限流时返回统一的响应格式"""
+
+    def handle_exception(self, exc):
+        return throttled_response(exc) or super().handle_exception(exc)
 
 
 # Create your views here.
 class RegisterView(APIView):
+    auth_exempt = True  # 无需登录
+
     def post(self, request: Request, *args, **kwargs):
         """
         入参： {
@@ -39,7 +54,11 @@ class RegisterView(APIView):
         return APIResponse(message='注册成功')
 
 
-class SendCode(APIView):
+class SendCode(ThrottledAPIView):
+    auth_exempt = True  # 无需登录
+    throttle_classes = [IPRateThrottle, PhoneRateThrottle]  # 按IP、手机号限流
+    throttle_scope = 'send_code'
+
     def get(self, request, phone: str):
         """发送验证码"""
         if not phone_validator(phone):
@@ -48,8 +67,11 @@ class SendCode(APIView):
         return APIResponse()
 
 
-class LoginView(APIView):
+class LoginView(ThrottledAPIView):
     """登录接口 - 优化版"""
+    auth_exempt = True  # 无需登录
+    throttle_classes = [IPRateThrottle, AccountRateThrottle, PhoneRateThrottle]  # 按IP、账号、手机号限流
+    throttle_scope = 'login'
 
     def post(self, request, *args, **kwargs):
         try:
@@ -85,8 +107,11 @@ class LoginView(APIView):
             return APIResponse(code=e.code, message=e.message, status=status.HTTP_400_BAD_REQUEST)
 
 
-class TokenRefreshView(APIView):
+class TokenRefreshView(ThrottledAPIView):
     """Token刷新接口"""
+    auth_exempt = True  # 使用Cookie中的refresh_token，无需access_token
+    throttle_classes = [IPRateThrottle]  # 按IP限流
+    throttle_scope = 'refresh'
 
     def post(self, request, *args, **kwargs):
         try:
@@ -135,18 +160,11 @@ class MenuView(APIView):
     def get(self, request):
         try:
             # 直接从request中获取中间件解析的role_id
-            role_id = request.role_id
-            role_menus = RoleMenuModel.objects.filter(role=role_id)
-            menu_ids = [rm.menu.id for rm in role_menus]
-
-            menus = MenuModel.objects.filter(
-                id__in=menu_ids,
-                parent__isnull=True,
-                visible=True
-            ).order_by('order')
-
-            serializer = TreeMenuSerializer(menus, many=True)
-            return APIResponse(data=serializer.data, message='成功获取菜单')
+            content = get_menu_response_content(request.role_id)
+            if isinstance(request.accepted_renderer, JSONRenderer):
+                # 缓存的是编码好的响应，直接返回
+                return HttpResponse(content, content_type='application/json')
+            return Response(fastjson.loads(content))
 
         except APIError as e:
             return APIResponse(code=e.code, message='获取菜单失败', status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -7,6 +7,8 @@ from django.http.response import JsonResponse
 
 # Create your views here.
 class TestView(View):
+    auth_exempt = True  # 爬虫访问测试，无需登录
+
     def get(self, request, id=None, *args, **kwargs):
         print(f'爬虫访问测试 ==> {id}')
         return JsonResponse({
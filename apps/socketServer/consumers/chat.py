@@ -4,6 +4,7 @@ from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
 from django.contrib.auth import get_user_model
 from django.utils import timezone
+from utils import fastjson
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
@@ -106,7 +107,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
         - typing: 输入状态
         """
         try:
-            data = json.loads(text_data)
+            data = fastjson.loads(text_data)
             message_type = data.get('type')
 
             if message_type == 'chat_message':
@@ -209,7 +210,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
         )
 
         # 发送回执给发送者
-        await self.send(text_data=json.dumps({
+        await self.send(text_data=fastjson.dumps_str({
             "type": "chat_message",
             "data": {**message_data, "is_self": True}
         }))
@@ -262,16 +263,34 @@ class ChatConsumer(AsyncWebsocketConsumer):
 
     # ========== 消息类型处理方法 ==========
 
+    async def broadcast_message(self, message_data):
+        """
+        广播群组消息
+        消息在发送方编码一次随事件下发，房间内每个连接直接发送，不再各自编码
+        """
+        await self.channel_layer.group_send(
+            self.room_group_name,
+            {
+                "type": "chat_message",
+                "data": message_data,
+                "text": fastjson.dumps_str({
+                    "type": "chat_message",
+                    "data": message_data
+                })
+            }
+        )
+
     async def chat_message(self, event):
         """发送聊天消息给客户端"""
-        await self.send(text_data=json.dumps({
+        text = event.get("text") or fastjson.dumps_str({
             "type": "chat_message",
             "data": event["data"]
-        }))
+        })
+        await self.send(text_data=text)
 
     async def system_message(self, event):
         """发送系统消息给客户端"""
-        await self.send(text_data=json.dumps({
+        await self.send(text_data=fastjson.dumps_str({
             "type": "system_message",
             "message": event["message"],
             "username": event["username"],
@@ -280,7 +299,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
 
     async def typing_indicator(self, event):
         """发送输入状态指示给客户端"""
-        await self.send(text_data=json.dumps({
+        await self.send(text_data=fastjson.dumps_str({
             "type": "typing",
             "user_id": event["user_id"],
             "username": event["username"],
@@ -290,7 +309,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
 
     async def private_message(self, event):
         """发送私聊消息给客户端"""
-        await self.send(text_data=json.dumps({
+        await self.send(text_data=fastjson.dumps_str({
             "type": "private_message",
             "data": event["data"]
         }))
@@ -305,7 +324,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
         if code:
             error_data["code"] = code
 
-        await self.send(text_data=json.dumps(error_data))
+        await self.send(text_data=fastjson.dumps_str(error_data))
 
     # ========== 数据库操作方法 ==========
 
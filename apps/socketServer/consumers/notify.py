@@ -4,6 +4,7 @@ from channels.generic.websocket import AsyncJsonWebsocketConsumer
 from channels.db import database_sync_to_async
 from django.utils import timezone
 from utils.token import verify_token
+from utils import fastjson
 from ..models import Notification, ChatMessage, UserPresence
 
 logger = logging.getLogger(__name__)
@@ -12,6 +13,15 @@ logger = logging.getLogger(__name__)
 class NotificationConsumer(AsyncJsonWebsocketConsumer):
     """处理所有通知相关的WebSocket通信"""
 
+    @classmethod
+    async def decode_json(cls, text_data):
+        return fastjson.loads(text_data)
+
+    @classmethod
+    async def encode_json(cls, content):
+        # 通知列表包含datetime，统一使用fastjson编码
+        return fastjson.dumps_str(content)
+
     async def connect(self):
         """处理WebSocket连接"""
         try:
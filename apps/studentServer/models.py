@@ -15,7 +15,8 @@ from apps.academicManagement.models import Course
 #   remark        VARCHAR(255) NULL,
 #   created_at    DATETIME     NOT NULL DEFAULT CURRENT_TIMESTAMP,
 #   INDEX idx_stu (student_id),
-#   INDEX idx_course (course_id)
+#   INDEX idx_course (course_id),
+#   INDEX idx_date (check_date)
 # ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 #
 # DROP TABLE IF EXISTS st_grade;
@@ -57,6 +58,9 @@ class Attendance(BaseModel):
         db_table = 'st_attendance'
         verbose_name = '学生考勤表'
         verbose_name_plural = verbose_name
+        indexes = [
+            models.Index(fields=['check_date']),
+        ]
 
 
 class Grade(BaseModel):
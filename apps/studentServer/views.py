@@ -1,4 +1,5 @@
 from Base.ViewSet import APIViewSet
+from Base.Pagination import KeysetPagination
 from apps.studentServer.models import Activity, Grade, Attendance
 from apps.studentServer.serializers import ActivitySerializer, GradeSerializer, AttendanceSerializer
 
@@ -13,9 +14,12 @@ class GradeViewSet(APIViewSet):
     """成绩管理"""
     queryset = Grade.objects.all()
     serializer_class = GradeSerializer
+    allow_export = True  # 支持按学期等条件导出成绩
 
 
 class AttendanceViewSet(APIViewSet):
     """考勤管理"""
     queryset = Attendance.objects.all()
     serializer_class = AttendanceSerializer
+    pagination_class = KeysetPagination  # 考勤记录数据量大，使用游标分页
+    filter_spec = {'check_date': ['exact', 'gte', 'lte'], 'student': ['exact', 'in'], 'course': ['exact', 'in']}  # 按签到日期范围/学生/课程过滤
@@ -43,6 +43,7 @@ from Base.Model import BaseModel
 #   login_time    DATETIME     NOT NULL DEFAULT CURRENT_TIMESTAMP,
 #   last_active   DATETIME     NOT NULL DEFAULT CURRENT_TIMESTAMP,
 #   INDEX idx_user (user_id),
+#   INDEX idx_time (login_time),
 #   UNIQUE uk_token (token)
 # ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 #
@@ -75,6 +76,10 @@ class LoginLog(BaseModel):
         db_table = "sm_login_log"
         verbose_name = "登陆日志表"
         verbose_name_plural = verbose_name
+        indexes = [
+            models.Index(fields=['user_id', 'username']),
+            models.Index(fields=['login_time']),
+        ]
 
 
 class OperationLog(BaseModel):
@@ -91,6 +96,11 @@ class OperationLog(BaseModel):
         db_table = "sm_operation_log"
         verbose_name = "操作日志表"
         verbose_name_plural = verbose_name
+        indexes = [
+            models.Index(fields=['user_id']),
+            models.Index(fields=['module']),
+            models.Index(fields=['create_time']),
+        ]
 
 
 class OnlineUser(BaseModel):
@@ -106,6 +116,10 @@ class OnlineUser(BaseModel):
         db_table = "sm_online_user"
         verbose_name = "在线用户表"
         verbose_name_plural = verbose_name
+        indexes = [
+            models.Index(fields=['user_id']),
+            models.Index(fields=['login_time']),
+        ]
 
 
 class ServerMetric(BaseModel):
@@ -123,3 +137,6 @@ class ServerMetric(BaseModel):
         db_table = "sm_server_metric"
         verbose_name = "服务器指标表"
         verbose_name_plural = verbose_name
+        indexes = [
+            models.Index(fields=['collect_time']),
+        ]
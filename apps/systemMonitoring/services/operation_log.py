@@ -0,0 +1,122 @@
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from django.conf import settings
+from django.db import close_old_connections
+from Base.Cache import bump_model_version
+
+logger = logging.getLogger(__name__)
+
+
+class OperationLogWriter:
+    """
+    操作日志异步批量写入
+    请求线程只把记录放入有界队列(不阻塞)，后台线程每隔flush_interval毫秒或攒够batch_size条时bulk_create一次；
+    队列已满时丢弃记录并计数，日志写入永远不会拖慢请求
+    """
+
+    def __init__(self, queue_size=10000, batch_size=200, flush_interval=1000):
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval / 1000
+        self.dropped = 0  # 队列满丢弃的条数
+        self.written = 0  # 已写入的条数
+        self.failed = 0  # 写入数据库失败的条数
+        self._reported_dropped = 0
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    @classmethod
+    def from_settings(cls):
+        return cls(
+            queue_size=getattr(settings, 'OPERATION_LOG_QUEUE_SIZE', 10000),
+            batch_size=getattr(settings, 'OPERATION_LOG_BATCH_SIZE', 200),
+            flush_interval=getattr(settings, 'OPERATION_LOG_FLUSH_INTERVAL', 1000),
+        )
+
+    def record(self, **fields):
+        """记录一条操作日志(OperationLog的字段)，队列已满时直接丢弃"""
+        self.ensure_started()
+        try:
+            self.queue.put_nowait(fields)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+    def ensure_started(self):
+        """首次记录时启动后台线程；多进程部署时每个worker进程fork后各自启动"""
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='operation-log-writer', daemon=True)
+            self._thread.start()
+            atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch:
+                self._write(batch)
+            self._report_dropped()
+
+    def _collect(self):
+        """取出一批记录：攒够batch_size条或距离本批第一条超过flush_interval即返回"""
+        batch = [self.queue.get()]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch):
+        from apps.systemMonitoring.models import OperationLog
+        # 后台线程有独立的数据库连接，写入前清理失效连接
+        close_old_connections()
+        try:
+            OperationLog.objects.bulk_create([OperationLog(**fields) for fields in batch],
+                                             batch_size=self.batch_size)
+            bump_model_version(OperationLog)
+            self.written += len(batch)
+        except Exception as e:
+            self.failed += len(batch)
+            logger.error(f"操作日志写入失败({len(batch)}条)：{str(e)}")
+
+    def _report_dropped(self):
+        dropped = self.dropped
+        if dropped > self._reported_dropped:
+            logger.warning(f"操作日志队列已满，累计丢弃{dropped}条")
+            self._reported_dropped = dropped
+
+    def flush(self):
+        """把队列中剩余的记录立即写入(进程退出时调用)"""
+        batch = []
+        while True:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        if batch:
+            self._write(batch)
+
+    def stats(self):
+        return {
+            'queued': self.queue.qsize(),
+            'written': self.written,
+            'dropped': self.dropped,
+            'failed': self.failed,
+        }
+
+
+operation_log_writer = OperationLogWriter.from_settings()
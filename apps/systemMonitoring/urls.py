@@ -1,5 +1,7 @@
+from django.urls import path
 from rest_framework import routers
-from apps.systemMonitoring.views import LoginLogViewSet, OperationLogViewSet, OnlineUserViewSet, ServerMetricViewSet
+from apps.systemMonitoring.views import LoginLogViewSet, OperationLogViewSet, OnlineUserViewSet, ServerMetricViewSet, \
+    RuntimeStatsView
 
 route = routers.DefaultRouter()
 
@@ -8,4 +10,6 @@ route.register(r'operationLog', OperationLogViewSet)  # 操作日志
 route.register(r'onlineUser', OnlineUserViewSet)  # 在线用户
 route.register(r'serverMetric', ServerMetricViewSet)  # 服务器指标
 
-urlpatterns = route.urls
+urlpatterns = route.urls + [
+    path('runtime', RuntimeStatsView.as_view(), name='runtime'),  # 运行时统计
+]
@@ -1,4 +1,15 @@
+from rest_framework import status
+from rest_framework.views import APIView
 from Base.ViewSet import APIViewSet
+from Base.Pagination import KeysetPagination
+from Base.Response import APIResponse
+from Base.Throttle import limiter
+from apps.systemMonitoring.services.operation_log import operation_log_writer
+from apps.oauth.services.activity import activity_tracker
+from apps.oauth.services.permission import is_admin, permission_registry
+from apps.oauth.services.session import session_registry
+from apps.oauth.services.sms import sms_dispatcher
+from utils.token import token_cache
 from apps.systemMonitoring.models import LoginLog, OperationLog, OnlineUser, ServerMetric
 from apps.systemMonitoring.serializers import LoginLogSerializer, OperationLogSerializer, OnlineUserSerializer, \
     ServerMetricSerializer
@@ -8,21 +19,47 @@ class LoginLogViewSet(APIViewSet):
     """登录日志"""
     queryset = LoginLog.objects.all()
     serializer_class = LoginLogSerializer
+    pagination_class = KeysetPagination  # 日志表数据量大，使用游标分页
+    filter_spec = {'login_time': ['gte', 'lte'], 'user_id': ['exact']}  # 按登录时间范围/用户过滤
+    allow_export = True  # 支持按时间范围导出登录日志
 
 
 class OperationLogViewSet(APIViewSet):
     """操作日志"""
     queryset = OperationLog.objects.all()
     serializer_class = OperationLogSerializer
+    pagination_class = KeysetPagination  # 日志表数据量大，使用游标分页
+    filter_spec = {'create_time': ['gte', 'lte'], 'user_id': ['exact'], 'module': ['exact', 'in']}  # 按操作时间范围/用户/模块过滤
 
 
 class OnlineUserViewSet(APIViewSet):
     """在线用户"""
     queryset = OnlineUser.objects.all()
     serializer_class = OnlineUserSerializer
+    filter_spec = {'login_time': ['gte', 'lte'], 'user_id': ['exact']}  # 按登录时间范围/用户过滤
+    ordering_fields = ['login_time', 'id']  # 支持 ?ordering=-login_time
 
 
 class ServerMetricViewSet(APIViewSet):
     """服务器指标"""
     queryset = ServerMetric.objects.all()
     serializer_class = ServerMetricSerializer
+    filter_spec = {'collect_time': ['gte', 'lte']}  # 按采集时间范围过滤
+    ordering_fields = ['collect_time', 'id']  # 支持 ?ordering=-collect_time
+
+
+class RuntimeStatsView(APIView):
+    """运行时统计(当前进程的Token缓存、会话表、操作日志队列等)，仅管理员可查看"""
+
+    def get(self, request):
+        if not is_admin(request):
+            return APIResponse(message='非管理员无权查看', status=status.HTTP_403_FORBIDDEN)
+        return APIResponse({
+            'token_cache': token_cache.stats(),
+            'session_registry': session_registry.stats(),
+            'permission_registry': permission_registry.stats(),
+            'activity_tracker': activity_tracker.stats(),
+            'throttle': limiter.stats(),
+            'sms': sms_dispatcher.stats(),
+            'operation_log': operation_log_writer.stats(),
+        })
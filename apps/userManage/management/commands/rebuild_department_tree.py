@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from apps.userManage.models import DepartmentModel
+
+
+class Command(BaseCommand):
+    help = '按parent重建部门的物化路径(path/depth)'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            changed = DepartmentModel.rebuild_tree()
+        self.stdout.write(self.style.SUCCESS(f'部门树重建完成，修正{changed}个部门'))
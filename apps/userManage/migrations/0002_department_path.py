@@ -0,0 +1,45 @@
+from django.db import migrations, models
+
+
+def build_paths(apps, schema_editor):
+    """按parent计算已有部门的path/depth，成环的部门断开为顶级部门"""
+    DepartmentModel = apps.get_model('userManage', 'DepartmentModel')
+    parents = dict(DepartmentModel.objects.values_list('id', 'parent_id'))
+    paths = {}
+
+    def resolve(dept_id, visiting):
+        if dept_id not in paths:
+            parent_id = parents[dept_id]
+            if parent_id not in parents or parent_id in visiting:
+                paths[dept_id] = (f'/{dept_id}/', 0)
+            else:
+                parent_path, parent_depth = resolve(parent_id, visiting | {dept_id})
+                paths[dept_id] = (f'{parent_path}{dept_id}/', parent_depth + 1)
+        return paths[dept_id]
+
+    departments = []
+    for dept_id in parents:
+        path, depth = resolve(dept_id, frozenset())
+        departments.append(DepartmentModel(id=dept_id, path=path, depth=depth))
+    DepartmentModel.objects.bulk_update(departments, ['path', 'depth'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('userManage', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='departmentmodel',
+            name='path',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=255, verbose_name='路径'),
+        ),
+        migrations.AddField(
+            model_name='departmentmodel',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='层级'),
+        ),
+        migrations.RunPython(build_paths, migrations.RunPython.noop),
+    ]
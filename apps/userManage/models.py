@@ -1,11 +1,21 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Concat, Substr
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from Base.Cache import bump_model_version, track_model_versions
 from Base.Model import BaseModel
 from apps.oauth.models import UserModel
 from django.core.exceptions import ValidationError
 
 
 class DepartmentModel(BaseModel):
-    """部门模型（使用MPTT优化树形结构）"""
+    """
+    部门模型（物化路径维护树形结构）
+    path 为根到本部门的ID路径，如 /1/5/12/，depth 为层级(顶级为0)，保存/移动/删除时自动维护：
+    祖先、后代、子树数量、完整路径都是一次走索引的查询；数据不一致时执行 manage.py rebuild_department_tree 重建
+    前缀匹配使用istartswith：MySQL下startswith生成LIKE BINARY，用不上path列的索引(路径只含数字与/，不区分大小写等价)
+    """
 
     class Meta:
         db_table = 'department'
@@ -33,10 +43,87 @@ class DepartmentModel(BaseModel):
     status = models.BooleanField('状态', default=True)
     description = models.TextField('描述', blank=True, null=True)
     updated_time = models.DateTimeField('更新时间', auto_now=True)
+    path = models.CharField('路径', max_length=255, default='', editable=False, db_index=True)
+    depth = models.PositiveSmallIntegerField('层级', default=0, editable=False)
 
     def __str__(self):
         return f"{self.code} - {self.name}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # 记录加载时的上级部门，保存时据此判断是否移动
+        instance._loaded_parent_id = instance.__dict__.get('parent_id')
+        return instance
+
+    def would_create_cycle(self, parent):
+        """把parent设为上级是否会形成环(parent是自己或自己的后代)"""
+        if parent is None or self.pk is None:
+            return False
+        if parent.pk == self.pk:
+            return True
+        return f'/{self.pk}/' in (parent.path or '')
+
+    def is_moved(self, update_fields=None):
+        """本次保存是否需要(重新)计算路径：新建、路径缺失或上级变化；指定update_fields且不含parent时不算移动"""
+        if update_fields is not None and not {'parent', 'parent_id'} & set(update_fields):
+            return False
+        return self.pk is None or not self.path or self.parent_id != getattr(self, '_loaded_parent_id', None)
+
+    def save(self, *args, **kwargs):
+        if not self.is_moved(kwargs.get('update_fields')):
+            super().save(*args, **kwargs)
+            return
+        parent = self.parent
+        if self.would_create_cycle(parent):
+            raise ValidationError({'parent': '不能将部门移动到自身或其下级部门下'})
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+            old_path, old_depth = self.path, self.depth
+            self.path = f'{parent.path if parent else "/"}{self.pk}/'
+            self.depth = parent.depth + 1 if parent else 0
+            if old_path and old_path != self.path:
+                # 本部门及所有后代的路径前缀一次UPDATE替换
+                DepartmentModel.objects.filter(path__istartswith=old_path).update(
+                    path=Concat(Value(self.path), Substr('path', len(old_path) + 1)),
+                    depth=F('depth') + (self.depth - old_depth),
+                )
+            else:
+                DepartmentModel.objects.filter(pk=self.pk).update(path=self.path, depth=self.depth)
+        # 路径的UPDATE与保存在同一事务中，版本号由post_save信号在提交后自增
+        self._loaded_parent_id = self.parent_id
+
+    @classmethod
+    def rebuild_tree(cls):
+        """按parent重建全部path/depth，返回修正的部门数；成环的部门断开为顶级部门"""
+        rows = {row['id']: row for row in cls.objects.values('id', 'parent_id', 'path', 'depth')}
+        paths = {}
+
+        def resolve(dept_id, visiting):
+            if dept_id in paths:
+                return paths[dept_id]
+            parent_id = rows[dept_id]['parent_id']
+            if parent_id not in rows or parent_id in visiting:
+                paths[dept_id] = (f'/{dept_id}/', 0)
+            else:
+                parent_path, parent_depth = resolve(parent_id, visiting | {dept_id})
+                paths[dept_id] = (f'{parent_path}{dept_id}/', parent_depth + 1)
+            return paths[dept_id]
+
+        changed = []
+        for dept_id, row in rows.items():
+            path, depth = resolve(dept_id, frozenset())
+            if (path, depth) != (row['path'], row['depth']):
+                changed.append(cls(id=dept_id, path=path, depth=depth))
+        cls.objects.bulk_update(changed, ['path', 'depth'], batch_size=500)
+        if changed:
+            bump_model_version(cls)
+        return len(changed)
+
+    @property
+    def path_ids(self):
+        return [int(dept_id) for dept_id in self.path.strip('/').split('/') if dept_id]
+
     # def clean(self):
     #     """自定义验证逻辑"""
     #     super().clean()
@@ -61,31 +148,46 @@ class DepartmentModel(BaseModel):
     #     super().save(*args, **kwargs)
 
     def get_ancestors(self):
-        """获取所有祖先部门"""
-        ancestors = []
-        parent = self.parent
-        while parent is not None:
-            ancestors.append(parent)
-            parent = parent.parent
-        return ancestors[::-1]
+        """获取所有祖先部门(从顶级开始)"""
+        ancestor_ids = self.path_ids[:-1]
+        if not ancestor_ids:
+            return []
+        return list(DepartmentModel.objects.filter(pk__in=ancestor_ids).order_by('depth'))
 
     def get_descendants(self, include_self=False):
-        """获取所有后代部门"""
-        descendants = []
-        if include_self:
-            descendants.append(self)
-        children = DepartmentModel.objects.filter(parent=self)
-        for child in children:
-            descendants.extend(child.get_descendants(include_self=True))
-        return descendants
+        """获取所有后代部门(按层级排序)"""
+        queryset = DepartmentModel.objects.filter(path__istartswith=self.path).order_by('depth', 'order', 'id')
+        if not include_self:
+            queryset = queryset.exclude(pk=self.pk)
+        return list(queryset)
+
+    def get_descendant_count(self, include_self=False):
+        """子树中的部门数量"""
+        return DepartmentModel.objects.filter(path__istartswith=self.path).count() - (0 if include_self else 1)
 
     def get_full_path(self):
         """获取部门完整路径"""
-        ancestors = self.get_ancestors()
-        path_parts = [dept.name for dept in ancestors] + [self.name]
+        ancestor_ids = self.path_ids[:-1]
+        names = dict(DepartmentModel.objects.filter(pk__in=ancestor_ids).values_list('id', 'name')) if ancestor_ids else {}
+        path_parts = [names[dept_id] for dept_id in ancestor_ids if dept_id in names] + [self.name]
         return " / ".join(path_parts)
 
 
+@receiver(post_delete, sender=DepartmentModel, dispatch_uid='department_path_rebase')
+def rebase_department_children(sender, instance, **kwargs):
+    """删除部门后下级部门的parent被置空(成为顶级部门)，一次UPDATE去掉其后代路径中被删部门及以上的前缀"""
+    if not instance.path:
+        return
+    DepartmentModel.objects.filter(path__istartswith=instance.path).update(
+        path=Concat(Value('/'), Substr('path', len(instance.path) + 1)),
+        depth=F('depth') - (instance.depth + 1),
+    )
+
+
+# 保存/删除时自增版本号，路径的UPDATE在同一事务中一并生效；不依赖部门视图是否已加载
+track_model_versions(DepartmentModel)
+
+
 class UserDepartmentModel(BaseModel):
     """用户-部门关联模型"""
 
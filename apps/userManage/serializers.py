@@ -1,4 +1,7 @@
 import os
+from functools import reduce
+from operator import or_
+from django.db.models import Q
 from rest_framework import serializers
 from rest_framework.validators import UniqueValidator
 from django.core.validators import RegexValidator
@@ -52,7 +55,7 @@ class RoleSerializer(serializers.ModelSerializer):
         """hook获取data前的操作"""
         ret = super().to_representation(instance)
         # 将avatar转为完整的url
-        if ret['status']:
+        if ret.get('status'):
             ret['status'] = 1 if ret['status'] else 0
         return ret
 
@@ -80,18 +83,49 @@ class DepartmentSerializer(serializers.ModelSerializer):
         }
 
     def get_children(self, obj):
-        """递归获取子部门（优化查询）"""
-        children = obj.children.all().order_by('order')
-        if children.exists():
-            return DepartmentSerializer(children, many=True).data
+        """递归获取子部门：按部门路径一次查询出本页部门的全部后代，在内存中组装，不再逐级查询"""
+        children = self.get_children_map(obj)['children'].get(obj.pk)
+        if children:
+            return DepartmentSerializer(children, many=True, context=self.context).data
         return []
 
+    def get_children_map(self, obj):
+        """
+        上级部门ID -> 子部门列表，缓存在context中供嵌套的子部门序列化器共用
+        obj不在已加载的子树中时，按路径前缀加载本页(列表序列化时为整页)部门的后代
+        """
+        tree = self.context.setdefault('department_tree', {'loaded': set(), 'children': {}})
+        if obj.pk in tree['loaded']:
+            return tree
+        roots = self.parent.instance if isinstance(self.parent, serializers.ListSerializer) else [obj]
+        roots = {dept.pk: dept for dept in roots if dept.pk not in tree['loaded']}
+        roots[obj.pk] = obj
+        descendants = DepartmentModel.objects.filter(
+            reduce(or_, [Q(path__istartswith=dept.path) for dept in roots.values()])
+        ).select_related('parent')
+        touched = set()
+        for dept in descendants:
+            if dept.pk in tree['loaded']:
+                continue
+            tree['loaded'].add(dept.pk)
+            tree['children'].setdefault(dept.parent_id, []).append(dept)
+            touched.add(dept.parent_id)
+        for parent_id in touched:
+            tree['children'][parent_id].sort(key=lambda dept: (dept.order, dept.pk))
+        return tree
+
     def validate(self, data):
         """验证业务规则"""
         instance = getattr(self, 'instance', None)
         parent = data.get('parent', instance.parent if instance else None)
         name = data.get('name', instance.name if instance else None)
 
+        # 不能移动到自身或其下级部门下
+        if instance and instance.would_create_cycle(parent):
+            raise serializers.ValidationError({
+                'parent': '不能将部门移动到自身或其下级部门下'
+            })
+
         # 验证同级部门名称唯一性
         if name and parent:
             qs = DepartmentModel.objects.filter(parent=parent, name=name)
@@ -116,7 +150,7 @@ class DepartmentSerializer(serializers.ModelSerializer):
         """hook获取data前的操作"""
         ret = super().to_representation(instance)
         # 将avatar转为完整的url
-        if ret['status']:
+        if ret.get('status'):
             ret['status'] = 1 if ret['status'] else 0
         return ret
 
@@ -178,10 +212,14 @@ class UserSerializer(serializers.ModelSerializer):
     def get_department(self, obj):
         try:
             user_dept = UserDepartmentModel.objects.get(user=obj)
+            # 列表中同一部门的完整路径只查询一次
+            full_paths = self.context.setdefault('department_full_paths', {})
+            if user_dept.department_id not in full_paths:
+                full_paths[user_dept.department_id] = user_dept.department.get_full_path()
             return {
                 'id': user_dept.department.id,
                 'name': user_dept.department.name,
-                'full_path': user_dept.department.get_full_path()
+                'full_path': full_paths[user_dept.department_id]
             }
         except UserDepartmentModel.DoesNotExist:
             return None
@@ -247,10 +285,11 @@ class UserSerializer(serializers.ModelSerializer):
         # 将avatar转为完整的url
         # if ret.get('avatar'):
         # ret['avatar'] = self.context['request'].build_absolute_uri(ret['avatar'])
-        ret['avatar'] = {
-            'showAvatar': self.context['request'].build_absolute_uri(ret.get('avatar')) or None,
-            'fillAvatar': self.context['request'].build_absolute_uri(ret.get('avatar')) or None
-        }
+        if 'avatar' in ret:
+            ret['avatar'] = {
+                'showAvatar': self.context['request'].build_absolute_uri(ret.get('avatar')) or None,
+                'fillAvatar': self.context['request'].build_absolute_uri(ret.get('avatar')) or None
+            }
         if ret.get('status'):
             ret['status'] = 1 if ret['status'] else 0
         return ret
@@ -272,8 +311,10 @@ class UserSerializer(serializers.ModelSerializer):
             })
         try:
             # 修改角色
+            # 逐条保存以触发post_save信号，更新版本号并刷新权限缓存
             user_role = UserRoleModel.objects.get(user=user)
-            UserRoleModel.objects.filter(user=user).update(role=role)
+            user_role.role = role
+            user_role.save()
         except UserRoleModel.DoesNotExist:
             # 如果原始没有分配，创建
             UserRoleModel.objects.create(user=user, role=role)
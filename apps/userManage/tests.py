@@ -1,3 +1,87 @@
+from django.core.cache import cache
 from django.test import TestCase
+from rest_framework.test import APIClient
+from apps.oauth.models import PermissionModel, RoleModel, RolePermissionModel, UserModel, UserRoleModel
+from apps.oauth.services.permission import ADMIN_ROLE_ID, permission_registry
+from utils.testing import assert_view_queries, token_client
+from utils.token import generate_token
+from .models import DepartmentModel
 
-# Create your tests here.
+
+class DepartmentQueryCountTests(TestCase):
+    """部门列表的查询次数与部门数量无关"""
+
+    @classmethod
+    def setUpTestData(cls):
+        role = RoleModel.objects.create(name='管理员', code='admin', description='')
+        cls.user = UserModel.objects.create(
+            account='sc-admin', username='admin', password='', nickname='admin', phone='13800000000',
+            email='admin@example.com', description='', signature=''
+        )
+        UserRoleModel.objects.create(user=cls.user, role=role)
+        cls.role = role
+        cls.root = DepartmentModel.objects.create(name='学校', code='root')
+        DepartmentModel.objects.create(name='计算机学院', code='cs', parent=cls.root)
+
+    def setUp(self):
+        # TestCase内不会提交事务，版本号不变，清空缓存避免用例之间互相影响
+        cache.clear()
+        token = generate_token({'user_id': self.user.id, 'username': self.user.username,
+                                'role_id': self.role.id, 'token_type': 'access'}, 7200)
+        cache.set(f'refresh_token:{self.user.id}', token, 7200)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_department_tree(self):
+        response = assert_view_queries(self.client, '/api/as/department/', max_queries=3)
+        self.assertEqual(response.status_code, 200)
+        for i in range(3):
+            college = DepartmentModel.objects.create(name=f'学院{i}', code=f'college{i}', parent=self.root)
+            for j in range(3):
+                DepartmentModel.objects.create(name=f'专业{i}{j}', code=f'major{i}{j}', parent=college)
+        cache.clear()
+        response = assert_view_queries(self.client, '/api/as/department/', max_queries=3)
+        self.assertEqual(response.status_code, 200)
+
+
+class UserExportTests(TestCase):
+    """用户导出需要system:user:export权限"""
+
+    @classmethod
+    def setUpTestData(cls):
+        admin = RoleModel.objects.create(id=ADMIN_ROLE_ID, name='管理员', code='admin', description='')
+        cls.role = RoleModel.objects.create(name='运维', code='ops', description='')
+        cls.admin = UserModel.objects.create(
+            account='admin', username='admin', password='secret', nickname='admin', phone='13800000000',
+            email='admin@example.com', description='', signature=''
+        )
+        cls.user = UserModel.objects.create(
+            account='ops', username='ops', password='secret', nickname='ops', phone='13800000001',
+            email='ops@example.com', description='', signature=''
+        )
+        UserRoleModel.objects.create(user=cls.admin, role=admin)
+        UserRoleModel.objects.create(user=cls.user, role=cls.role)
+
+    def setUp(self):
+        # TestCase内版本号不变，清空缓存与进程内的权限表
+        cache.clear()
+        permission_registry.invalidate()
+
+    def test_requires_permission(self):
+        response = token_client(self.user.id).get('/api/as/user/export/')
+        self.assertEqual(response.status_code, 401)
+
+    def test_granted_permission(self):
+        permission = PermissionModel.objects.create(code='system:user:export', name='导出用户', description='')
+        RolePermissionModel.objects.create(role=self.role, permission=permission)
+        response = token_client(self.user.id).get('/api/as/user/export/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_admin_export(self):
+        response = token_client(self.admin.id).get('/api/as/user/export/?export_format=csv')
+        self.assertEqual(response.status_code, 200)
+        content = b''.join(response.streaming_content).decode('utf-8-sig')
+        self.assertIn('ops@example.com', content)
+        # 密码为write_only，不导出
+        self.assertNotIn('password', content.splitlines()[0])
+        self.assertNotIn('secret', content)
@@ -2,6 +2,7 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from apps.oauth.models import RoleModel, UserModel
+from apps.oauth.services.permission import ADMIN_ROLE_ID, has_permission, is_admin
 from .models import DepartmentModel
 from Base.Response import APIResponse
 from Base.ViewSet import APIViewSet
@@ -14,13 +15,14 @@ class RoleViewSet(APIViewSet):
     """
     queryset = RoleModel.objects.all()
     serializer_class = RoleSerializer
+    allow_bulk = False  # 管理员角色有单独的保护逻辑，不开放批量接口
 
     def update(self, request, pk=None, **kwargs):
         """对应 PUT /role/:id - 更新角色信息"""
         try:
             role = RoleModel.objects.get(pk=pk)
             # 非管理员不能修改管理员
-            if request.role_id != 1 and role.id == 1:
+            if role.id == ADMIN_ROLE_ID and not is_admin(request):
                 return APIResponse(message="无权限修改管理员", status=status.HTTP_403_FORBIDDEN)
         except RoleModel.DoesNotExist as e:
             return APIResponse(message="角色不存在", status=status.HTTP_404_NOT_FOUND)
@@ -36,9 +38,9 @@ class RoleViewSet(APIViewSet):
         except RoleModel.DoesNotExist:
             return APIResponse(message="角色不存在", status=status.HTTP_404_NOT_FOUND)
         # 非管理员不能修改管理员
-        if request.role_id != 1 and role.id == 1:
+        if role.id == ADMIN_ROLE_ID and not is_admin(request):
             return APIResponse(message="无权限修改管理员", status=status.HTTP_403_FORBIDDEN)
-        if role.id == 1:
+        if role.id == ADMIN_ROLE_ID:
             return APIResponse(message="管理员不能禁用", status=status.HTTP_403_FORBIDDEN)
         # 只更新状态字段
         # partial=True 将所有反序列化字段设置为False
@@ -57,9 +59,9 @@ class RoleViewSet(APIViewSet):
         except RoleModel.DoesNotExist:
             return APIResponse(message="角色不存在", status=status.HTTP_404_NOT_FOUND)
         # 判断当前登陆的用户权限，非管理员不能删除超级管理员
-        if request.role_id != 1 and role.id == 1:
+        if role.id == ADMIN_ROLE_ID and not is_admin(request):
             return APIResponse(message="非管理员不能删除超级管理员", status=status.HTTP_403_FORBIDDEN)
-        if role.id == 1:
+        if role.id == ADMIN_ROLE_ID:
             return APIResponse(message="超级管理员不能删除", status=status.HTTP_403_FORBIDDEN)
         # 删除角色
         role.delete()
@@ -72,6 +74,7 @@ class DepartmentViewSet(APIViewSet):
     """
     queryset = DepartmentModel.objects.all()
     serializer_class = DepartmentSerializer
+    allow_bulk = False  # 批量写入不经过save()，无法维护部门路径，不开放批量接口
 
     def partial_update(self, request, pk=None, **kwargs):
         """对应 PATCH /department/:id - 更新部门状态"""
@@ -99,6 +102,8 @@ class UserViewSet(APIViewSet):
     parser_classes = [MultiPartParser, FormParser, JSONParser]
     queryset = UserModel.objects.all()
     serializer_class = UserSerializer
+    allow_bulk = False  # 用户创建/修改有权限校验与角色部门处理，不开放批量接口
+    allow_export = True  # 导出需要system:user:export权限，密码为write_only不导出
 
     search_fields = ['username', 'phone']
     exact_fields = ['department']
@@ -108,7 +113,7 @@ class UserViewSet(APIViewSet):
 
     def create(self, request, **kwargs):
         """对应 POST /user - 添加新用户"""
-        if request.role_id != 1:
+        if not has_permission(request, 'system:user:add'):
             return APIResponse(message='非管理员无权创建用户', status=status.HTTP_401_UNAUTHORIZED)
 
         return super().create(request, **kwargs)
@@ -118,13 +123,20 @@ class UserViewSet(APIViewSet):
         获取单个用户详情
         GET /user/:id
         """
-        if request.role_id != 1:
+        if not has_permission(request, 'system:user:query'):
             return APIResponse(message='非管理员无权查询用户', status=status.HTTP_401_UNAUTHORIZED)
         return super().retrieve(request, **kwargs)
 
+    @action(detail=False, methods=['get'], url_path='export')
+    def export(self, request, *args, **kwargs):
+        """对应 GET /user/export/ - 导出用户"""
+        if not has_permission(request, 'system:user:export'):
+            return APIResponse(message='非管理员无权导出用户', status=status.HTTP_401_UNAUTHORIZED)
+        return super().export(request, *args, **kwargs)
+
     def update(self, request, **kwargs):
         """对应 PUT /user/:id - 更新用户信息,包括角色与部门"""
-        if request.role_id != 1:
+        if not has_permission(request, 'system:user:edit'):
             return APIResponse(message='非管理员无权修改用户', status=status.HTTP_401_UNAUTHORIZED)
         return super().update(request, **kwargs)
 
@@ -140,7 +152,7 @@ class UserViewSet(APIViewSet):
         except UserModel.DoesNotExist:
             return APIResponse(message="用户不存在", status=status.HTTP_404_NOT_FOUND)
         # 非管理员不能修改管理员
-        if request.role_id != 1:
+        if not has_permission(request, 'system:user:edit'):
             return APIResponse(message="无权限修改管理员", status=status.HTTP_403_FORBIDDEN)
         # 只更新状态字段
         # partial=True 将所有反序列化字段设置为False
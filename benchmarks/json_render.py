@@ -0,0 +1,100 @@
+"""
+JSON渲染基准测试
+    python benchmarks/json_render.py
+
+- 列表接口：20行课程数据的分页响应，对比DRF JSONRenderer与FastJSONRenderer
+- 聊天扇出：一条群聊消息发给房间内N个连接，原先每个连接的consumer各自json.dumps一次，
+  现在发送方用fastjson编码一次随事件下发(ChatConsumer.broadcast_message)
+"""
+import datetime
+import json
+import os
+import sys
+import timeit
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import django  # noqa: E402
+from django.conf import settings  # noqa: E402
+
+if not settings.configured:
+    settings.configure(USE_TZ=False, INSTALLED_APPS=['rest_framework'])
+    django.setup()
+
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+from Base.Renderer import FastJSONRenderer  # noqa: E402
+from utils import fastjson  # noqa: E402
+
+ROWS = 20
+FAN_OUT = 500
+NUMBER = 2000
+
+
+def build_list_response():
+    now = datetime.datetime(2025, 3, 1, 8, 30, 15, 123456)
+    rows = [{
+        'id': i,
+        'create_time': now,
+        'code': f'CS{i:03d}',
+        'name': f'课程{i} 数据结构与算法',
+        'credit': Decimal('3.5'),
+        'hours': 48,
+        'course_type': 'compulsory',
+        'department': 2,
+        'description': '面向计算机专业本科生的专业基础课，' * 3,
+        'update_time': now,
+    } for i in range(ROWS)]
+    return {'code': 200, 'message': 'success',
+            'data': {'total': 450, 'page_num': 1, 'page_size': ROWS, 'list': rows}}
+
+
+def build_chat_message():
+    return {
+        'type': 'chat_message',
+        'data': {
+            'id': '10086',
+            'user_id': '12',
+            'username': 'zhangsan',
+            'avatar': '/media/avatars/2025/03/01/a.png',
+            'message': '今天下午三点在图书馆三楼讨论课程设计，记得带电脑',
+            'timestamp': datetime.datetime(2025, 3, 1, 8, 30, 15).isoformat(),
+            'type': 'group',
+            'room_name': 'cs2025',
+        }
+    }
+
+
+def bench(name, func, number):
+    seconds = timeit.timeit(func, number=number)
+    print(f'{name:<28}{number / seconds:>12,.0f} 次/秒')
+    return seconds
+
+
+def main():
+    print(f'JSON后端: {"orjson" if fastjson.orjson else "json"}')
+
+    data = build_list_response()
+    drf, fast = JSONRenderer(), FastJSONRenderer()
+    assert drf.render(data) == fast.render(data), '输出不一致'
+    print(f'\n列表响应 ({ROWS}行, {len(fast.render(data))}字节)')
+    base = bench('JSONRenderer', lambda: drf.render(data), NUMBER)
+    new = bench('FastJSONRenderer', lambda: fast.render(data), NUMBER)
+    print(f'{"提升":<28}{base / new:>12.1f} 倍')
+
+    message = build_chat_message()
+    print(f'\n聊天扇出 (每条消息{FAN_OUT}个接收者)')
+    base = bench('每个接收者json.dumps', lambda: [json.dumps(message) for _ in range(FAN_OUT)], NUMBER // 20)
+    new = bench('每个接收者fastjson', lambda: [fastjson.dumps_str(message) for _ in range(FAN_OUT)], NUMBER // 20)
+    print(f'{"提升":<28}{base / new:>12.1f} 倍')
+
+    def encode_once():
+        event = {'text': fastjson.dumps_str(message)}
+        return [event.get('text') for _ in range(FAN_OUT)]
+
+    new = bench('发送方fastjson编码一次', encode_once, NUMBER // 20)
+    print(f'{"提升":<28}{base / new:>12.1f} 倍')
+
+
+if __name__ == '__main__':
+    main()
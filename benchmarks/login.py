@@ -0,0 +1,128 @@
+"""
+账号登录基准测试
+    python benchmarks/login.py
+    REDIS_URL=redis://127.0.0.1:6379/15 python benchmarks/login.py  # 使用真实Redis
+
+数据库为临时文件中的SQLite(活动时间由后台线程写入，内存库不能跨线程共享)，缓存默认使用fakeredis模拟Redis(未安装时退回本地内存缓存)，对比：
+- 原流程：OR查询用户、AES解密、同步UPDATE last_login_time、查询角色、逐条查询权限编码、SET refresh_token + PUBLISH
+- 新流程：一次关联查询用户与角色、权限编码读角色权限表、活动时间延迟批量写入、SET + PUBLISH 一次pipeline往返
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import django  # noqa: E402
+from django.conf import settings  # noqa: E402
+
+PERMISSIONS = 30
+NUMBER = 2000
+
+
+def get_cache_config():
+    url = os.environ.get('REDIS_URL')
+    if url:
+        return {'BACKEND': 'django_redis.cache.RedisCache', 'LOCATION': url}, url
+    try:
+        import fakeredis
+    except ImportError:
+        return {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}, 'locmem'
+    return {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': 'redis://fakeredis:6379/0',
+        'OPTIONS': {'CONNECTION_POOL_KWARGS': {'connection_class': fakeredis.FakeConnection}},
+    }, 'fakeredis'
+
+
+CACHE, CACHE_NAME = get_cache_config()
+
+if not settings.configured:
+    settings.configure(
+        USE_TZ=False,
+        SECRET_KEY='benchmark',
+        INSTALLED_APPS=['django.contrib.contenttypes', 'django.contrib.auth', 'rest_framework', 'apps.oauth'],
+        DATABASES={'default': {'ENGINE': 'django.db.backends.sqlite3',
+                               'NAME': os.path.join(tempfile.mkdtemp(), 'login.sqlite3')}},
+        CACHES={'default': CACHE},
+        AUTHENTICATION_BACKENDS=['apps.oauth.backends.CustomAuthBackend'],
+        ACTIVITY_FLUSH_INTERVAL=1000,
+    )
+    django.setup()
+
+from django.core.cache import cache  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.db.models import Q  # noqa: E402
+from django.utils import timezone  # noqa: E402
+from apps.oauth.controller.auth_controller import AuthController  # noqa: E402
+from apps.oauth.models import (PermissionModel, RoleModel, RolePermissionModel, UserModel,  # noqa: E402
+                               UserRoleModel)
+from apps.oauth.services.activity import activity_tracker  # noqa: E402
+from apps.oauth.services.session import session_registry  # noqa: E402
+from utils import fastjson  # noqa: E402
+from utils.encrypt import AESHelper  # noqa: E402
+from utils.token import generate_token  # noqa: E402
+
+
+def seed():
+    call_command('migrate', run_syncdb=True, verbosity=0)
+    role = RoleModel.objects.create(name='教师', code='teacher', description='')
+    user = UserModel.objects.create(account='t001', username='teacher', password=AESHelper().aes_encrypt('pass123'),
+                                    nickname='t', phone='13800000000', email='t@t.com', description='', signature='')
+    UserRoleModel.objects.create(user=user, role=role)
+    for i in range(PERMISSIONS):
+        permission = PermissionModel.objects.create(code=f'system:perm:{i}', name=f'p{i}', description='')
+        RolePermissionModel.objects.create(role=role, permission=permission)
+
+
+def legacy_login(username, password):
+    """改造前的登录流程"""
+    user = UserModel.objects.get(Q(username=username) | Q(account=username))
+    assert user.check_password(password)
+    user.last_login_time = timezone.now()
+    user.save(update_fields=['last_login_time'])
+    role = UserRoleModel.objects.get(user=user.id).role
+    permissions = [rp.permission.code for rp in RolePermissionModel.objects.filter(role=role.id)]
+    access_token = generate_token({
+        'user_id': user.id,
+        'username': user.username,
+        'role_id': role.id,
+        'last_login': user.last_login_time.isoformat(),
+        'token_type': 'access'
+    }, expire=timedelta(hours=2))
+    refresh_token = generate_token({'user_id': user.id, 'token_type': 'refresh'}, expire=timedelta(days=7))
+    cache.set(f'refresh_token:{user.id}', refresh_token, timeout=7 * 24 * 3600)
+    connection = session_registry.get_connection()
+    if connection is not None:
+        connection.publish(session_registry.channel, fastjson.dumps({'op': 'login', 'user_id': str(user.id)}))
+    return permissions, access_token, refresh_token
+
+
+def bench(name, func, number):
+    func()  # 预热(角色权限表等缓存)
+    start = time.perf_counter()
+    for _ in range(number):
+        func()
+    seconds = time.perf_counter() - start
+    print(f'{name:<16}{number / seconds:>12,.0f} 次/秒{seconds / number * 1e6:>12,.0f} us/次')
+    return seconds
+
+
+def main():
+    seed()
+    print(f'缓存: {CACHE_NAME}，角色权限数: {PERMISSIONS}')
+    controller = AuthController()
+    data = {'username': 'teacher', 'password': 'pass123'}
+    assert sorted(legacy_login('teacher', 'pass123')[0]) == controller.login(data)['user']['permissions']
+
+    base = bench('原流程', lambda: legacy_login('teacher', 'pass123'), NUMBER)
+    new = bench('新流程', lambda: controller.login(data), NUMBER)
+    print(f'{"提升":<16}{base / new:>12.1f} 倍')
+    activity_tracker.flush()
+    print(f'活动时间写入: {activity_tracker.stats()}')
+
+
+if __name__ == '__main__':
+    main()
@@ -18,3 +18,10 @@ class TokenInvalid(APIError):
 
     def __init__(self, message='Token无效'):
         super().__init__(message, code=401)
+
+
+class QueryInvalid(APIError):
+    """查询参数不合法(过滤/排序字段未开放或会导致全表扫描)"""
+
+    def __init__(self, message='查询参数不合法'):
+        super().__init__(message, code=400)
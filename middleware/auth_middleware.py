@@ -1,37 +1,61 @@
+from django.conf import settings
 from django.utils.deprecation import MiddlewareMixin
-from django.http import JsonResponse, HttpRequest
-from django.core.cache import cache
+from django.http import HttpRequest
 from rest_framework import status
+from apps.oauth.services.session import session_registry
 from utils.token import verify_token
-
-WHITE_LIST = ['/auth/login', '/auth/register', '/auth/send_code', '/auth/refresh', '/media', '/swagger', '/redoc',
-              '/test']
+from utils.fastjson import json_response
+from utils.route_trie import RouteTrie
 
 
 class TokenAuthMiddleware(MiddlewareMixin):
-    """token认证中间件"""
+    """
+    token认证中间件
+    同时支持同步(WSGI)与异步(ASGI)调用；登录状态从进程内会话表(SessionRegistry)读取，不再逐请求访问Redis
+    免认证路由：AUTH_WHITE_LIST 中的路径前缀，以及声明了 auth_exempt = True 的视图
+    """
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        # 免认证路由前缀树，启动加载中间件时由AUTH_WHITE_LIST与URL配置构建
+        self.whitelist = RouteTrie.build(getattr(settings, 'AUTH_WHITE_LIST', []))
 
     def process_request(self, request: HttpRequest):
-        for i in WHITE_LIST:
-            if request.path.find(i) != -1:
-                return None
+        response, payload = self.authenticate(request)
+        if response is not None or payload is None:
+            return response
+        return self.check_login(request, payload, session_registry.is_active(payload.get('user_id')))
+
+    async def __acall__(self, request: HttpRequest):
+        response, payload = self.authenticate(request)
+        if response is None and payload is not None:
+            active = await session_registry.ais_active(payload.get('user_id'))
+            response = self.check_login(request, payload, active)
+        return response or await self.get_response(request)
+
+    def authenticate(self, request: HttpRequest):
+        """校验Token，返回(错误响应, payload)，免认证路由两者均为None"""
+        if self.whitelist.match(request.path_info):
+            return None, None
 
         auth_header = request.META.get('HTTP_AUTHORIZATION', '')
         if not auth_header.startswith('Bearer '):
-            return JsonResponse({
+            return json_response({
                 'code': 401,
                 'message': '未提供认证Token'
-            }, status=status.HTTP_401_UNAUTHORIZED)
+            }, status=status.HTTP_401_UNAUTHORIZED), None
         payload = verify_token(auth_header)
         if not payload:
-            return JsonResponse({
+            return json_response({
                 'code': 401,
                 'message': 'Token无效或已过期'
-            }, status=status.HTTP_401_UNAUTHORIZED)
+            }, status=status.HTTP_401_UNAUTHORIZED), None
+        return None, payload
 
-        user_id = payload.get('user_id')
-        if not cache.get(f'refresh_token:{user_id}'):
-            return JsonResponse({
+    @staticmethod
+    def check_login(request: HttpRequest, payload, active):
+        """会话不存在(refresh_token已删除或过期)说明已退出登录"""
+        if not active:
+            return json_response({
                 'code': 401,
                 'message': '请先登陆'
             })
@@ -0,0 +1,68 @@
+import time
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from apps.systemMonitoring.services.operation_log import operation_log_writer
+
+
+class OperationLogMiddleware:
+    """
+    操作日志中间件
+    记录每个请求的模块、动作、状态与耗时，交给OperationLogWriter异步批量写入OperationLog
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, 'OPERATION_LOG_ENABLED', True)
+        self.exclude = tuple(getattr(settings, 'OPERATION_LOG_EXCLUDE', []))
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not self.should_log(request):
+            return self.get_response(request)
+
+        start = time.perf_counter()
+        response = self.get_response(request)
+        self.record(request, response, int((time.perf_counter() - start) * 1000))
+        return response
+
+    async def __acall__(self, request):
+        if not self.should_log(request):
+            return await self.get_response(request)
+
+        start = time.perf_counter()
+        response = await self.get_response(request)
+        # 只是放入队列，不阻塞事件循环
+        self.record(request, response, int((time.perf_counter() - start) * 1000))
+        return response
+
+    def should_log(self, request):
+        return self.enabled and request.method not in ('OPTIONS', 'HEAD') and not request.path.startswith(self.exclude)
+
+    def record(self, request, response, cost_ms):
+        # user_id等由TokenAuthMiddleware写入request
+        payload = getattr(request, 'payload', None) or {}
+        match = getattr(request, 'resolver_match', None)
+        operation_log_writer.record(
+            user_id=getattr(request, 'user_id', None),
+            username=payload.get('username'),
+            module=self.get_module(request),
+            action=f"{request.method} {match.url_name if match and match.url_name else request.path}"[:64],
+            status=1 if response.status_code < 400 else 0,
+            message=f"{request.method} {request.get_full_path()} {response.status_code}"[:255],
+            cost_ms=cost_ms,
+        )
+
+    @staticmethod
+    def get_module(request):
+        """取 /api/<模块>/... 中的模块名"""
+        parts = [p for p in request.path.split('/') if p]
+        if len(parts) > 1 and parts[0] == 'api':
+            return parts[1][:64]
+        return (parts[0] if parts else '/')[:64]
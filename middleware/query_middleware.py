@@ -0,0 +1,116 @@
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+# IN (%s, %s, ...) 参数个数不同视为同一类SQL
+IN_PARAMS = re.compile(r'\((?:%s, )+%s\)')
+
+
+class QueryCollector:
+    """通过 connection.execute_wrapper 统计请求内的SQL"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = Counter()  # SQL形状 -> 执行次数
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.shapes[IN_PARAMS.sub('(...)', sql)] += 1
+
+    @property
+    def duplicates(self):
+        """重复执行的次数(同一形状除第一次外的执行次数)，N+1查询会使该值随数据量增长"""
+        return sum(n - 1 for n in self.shapes.values() if n > 1)
+
+    def most_repeated(self):
+        return self.shapes.most_common(1)[0] if self.shapes else (None, 0)
+
+
+class QueryBudgetMiddleware:
+    """
+    SQL查询预算中间件
+    统计每个请求的查询次数、数据库耗时与重复SQL，调试模式下通过响应头输出：
+        X-Query-Count / X-Query-Time(毫秒) / X-Query-Duplicates
+    查询次数超过预算(视图的query_budget，未设置时使用QUERY_BUDGET)或同一SQL重复次数达到
+    QUERY_DUPLICATE_THRESHOLD(疑似N+1)时记录警告日志
+
+    数据库连接按线程隔离，异步请求中的SQL都在sync_to_async的线程中执行(ASGI下同一请求使用同一线程)，
+    因此异步模式下统计钩子安装在该线程的连接上
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        collector = QueryCollector()
+        with self.install(collector):
+            response = self.get_response(request)
+        return self.finish(request, response, collector)
+
+    async def __acall__(self, request):
+        collector = QueryCollector()
+        stack = await sync_to_async(self.install)(collector)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        return self.finish(request, response, collector)
+
+    @staticmethod
+    def install(collector):
+        """在当前线程的所有数据库连接上安装统计钩子"""
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(collector))
+            return stack.pop_all()
+
+    def finish(self, request, response, collector):
+        if settings.DEBUG:
+            response['X-Query-Count'] = collector.count
+            response['X-Query-Time'] = f'{collector.duration * 1000:.1f}'
+            response['X-Query-Duplicates'] = collector.duplicates
+        self.check_budget(request, collector)
+        return response
+
+    def get_budget(self, request):
+        """视图类的query_budget优先"""
+        match = getattr(request, 'resolver_match', None)
+        view = getattr(match.func, 'cls', None) if match else None
+        budget = getattr(view, 'query_budget', None)
+        if budget is None:
+            budget = getattr(settings, 'QUERY_BUDGET', 30)
+        return budget, view.__name__ if view else (match.view_name if match else request.path)
+
+    def check_budget(self, request, collector):
+        if not collector.count:
+            return
+        budget, view_name = self.get_budget(request)
+        shape, repeated = collector.most_repeated()
+        over_budget = collector.count > budget
+        n_plus_one = repeated >= getattr(settings, 'QUERY_DUPLICATE_THRESHOLD', 5)
+        if over_budget or n_plus_one:
+            logger.warning(
+                f"SQL查询{'超出预算' if over_budget else '疑似N+1'}：{request.method} {request.path} ({view_name}) "
+                f"查询{collector.count}次/预算{budget}次，耗时{collector.duration * 1000:.1f}ms，"
+                f"重复最多的SQL执行{repeated}次：{shape[:300]}"
+            )
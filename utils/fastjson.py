@@ -0,0 +1,79 @@
+"""
+JSON编解码
+HTTP接口(DRF渲染器)、中间件错误响应与WebSocket消息统一使用，通过 JSON_BACKEND 配置：
+
+- auto: 安装了orjson时使用orjson，否则使用标准库json
+- orjson / json: 指定后端
+
+两种后端输出一致且与DRF的JSONRenderer相同：紧凑格式、不转义中文、datetime/date/time为ISO格式(UTC输出Z)，
+Decimal、UUID、惰性翻译字符串等类型交给DRF的JSONEncoder处理
+
+例外：NaN/Infinity浮点数，json后端与JSONRenderer一样抛出ValueError，orjson后端输出为null；
+逐个检查浮点数会让序列化耗时增加数倍，而这类值不会从数据库读出，因此不做检查
+"""
+import json
+from django.conf import settings
+from django.http import HttpResponse
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+_encoder = JSONEncoder()
+_ORJSON_OPTIONS = (orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
+
+_backend = None
+
+
+def _use_orjson():
+    """首次调用时按配置确定后端"""
+    global _backend
+    if _backend is None:
+        backend = getattr(settings, 'JSON_BACKEND', 'auto')
+        if backend == 'orjson' and orjson is None:
+            raise ImportError('JSON_BACKEND = "orjson" 需要安装orjson')
+        _backend = 'orjson' if backend != 'json' and orjson is not None else 'json'
+    return _backend == 'orjson'
+
+
+def _escape(data: bytes) -> bytes:
+    """与DRF一致，转义JavaScript中非法的行分隔符"""
+    if b'\xe2\x80\xa8' in data or b'\xe2\x80\xa9' in data:
+        data = data.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+    return data
+
+
+def _dumps_stdlib(data) -> bytes:
+    return json.dumps(data, cls=JSONEncoder, ensure_ascii=False, separators=(',', ':'),
+                      allow_nan=False).encode('utf-8')
+
+
+def dumps(data) -> bytes:
+    """序列化为UTF-8字节串"""
+    if _use_orjson():
+        try:
+            return _escape(orjson.dumps(data, default=_encoder.default, option=_ORJSON_OPTIONS))
+        except orjson.JSONEncodeError:
+            # 超过64位的整数等orjson不支持的数据，退回标准库
+            pass
+    return _escape(_dumps_stdlib(data))
+
+
+def dumps_str(data) -> str:
+    """序列化为字符串(WebSocket文本帧)"""
+    return dumps(data).decode('utf-8')
+
+
+def loads(data):
+    """反序列化，支持str与bytes"""
+    if _use_orjson():
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def json_response(data, status=200, **kwargs):
+    """JsonResponse的替代，用于中间件等DRF之外的响应"""
+    return HttpResponse(dumps(data), content_type='application/json', status=status, **kwargs)
@@ -0,0 +1,133 @@
+"""
+路由前缀树
+按路径段匹配免认证路由，匹配开销与路径段数成正比，且只匹配完整的路径段：
+
+- 配置项 AUTH_WHITE_LIST 中的前缀，如 '/media/' 匹配 /media 下的所有路径
+- 视图声明 auth_exempt = True(类视图) 或使用 @auth_exempt(函数视图) 的路由，按URL配置精确匹配，
+  路由参数(<int:id>等)按转换器的正则匹配对应的路径段；含path转换器的路由可跨路径段，按整条路由的正则匹配
+"""
+import re
+from django.urls import URLPattern, URLResolver, get_resolver
+from django.urls.converters import get_converter
+from django.urls.resolvers import RoutePattern
+
+PARAM = re.compile(r'<(?:(?P<converter>[^>:]+):)?(?P<name>[^>]+)>')
+
+
+def auth_exempt(view):
+    """标记函数视图无需登录"""
+    view.auth_exempt = True
+    return view
+
+
+def is_auth_exempt(callback):
+    if getattr(callback, 'auth_exempt', False):
+        return True
+    view_class = getattr(callback, 'cls', None) or getattr(callback, 'view_class', None)
+    return bool(getattr(view_class, 'auth_exempt', False))
+
+
+def _strip_anchors(regex):
+    if regex.startswith('^'):
+        regex = regex[1:]
+    if regex.endswith(r'\Z'):
+        regex = regex[:-2]
+    elif regex.endswith('$'):
+        regex = regex[:-1]
+    return regex
+
+
+def _segments(path):
+    return [segment for segment in path.strip('/').split('/') if segment]
+
+
+class _Node:
+    __slots__ = ('children', 'patterns', 'terminal', 'subtree')
+
+    def __init__(self):
+        self.children = {}  # 路径段 -> 子节点
+        self.patterns = []  # (路径段正则, 子节点)，带路由参数的路径段
+        self.terminal = False  # 路由在此结束
+        self.subtree = False  # 此节点下的所有路径都匹配
+
+
+class RouteTrie:
+    """免认证路由前缀树"""
+
+    def __init__(self):
+        self.root = _Node()
+        self.regexes = []  # 无法按路径段拆分的路由(re_path)，整体正则匹配
+
+    @classmethod
+    def build(cls, prefixes=(), urlconf=None):
+        """由前缀列表与URL配置中免认证的视图构建"""
+        trie = cls()
+        for prefix in prefixes:
+            trie.add_prefix(prefix)
+        trie.add_resolver(get_resolver(urlconf), [], [])
+        return trie
+
+    def add_prefix(self, prefix):
+        node = self.root
+        for segment in _segments(prefix):
+            node = node.children.setdefault(segment, _Node())
+        node.subtree = True
+
+    def add_resolver(self, resolver, routes, regexes):
+        for entry in resolver.url_patterns:
+            if isinstance(entry, URLResolver):
+                self.add_resolver(entry, routes + [entry.pattern], regexes + [entry.pattern.regex.pattern])
+            elif isinstance(entry, URLPattern) and is_auth_exempt(entry.callback):
+                self.add_route(routes + [entry.pattern], regexes + [entry.pattern.regex.pattern])
+
+    def add_route(self, patterns, regexes):
+        route = ''.join(str(pattern) for pattern in patterns)
+        if not all(isinstance(pattern, RoutePattern) for pattern in patterns) or '<path:' in route:
+            # 正则路由、path转换器(可以匹配多个路径段)拼接为整体正则，只放行路由本身
+            self.regexes.append(re.compile('^/' + ''.join(_strip_anchors(r) for r in regexes) + r'\Z'))
+            return
+        node = self.root
+        for segment in _segments(route):
+            if '<' not in segment:
+                node = node.children.setdefault(segment, _Node())
+                continue
+            regex = re.compile(self.segment_regex(segment))
+            for pattern, child in node.patterns:
+                if pattern.pattern == regex.pattern:
+                    node = child
+                    break
+            else:
+                child = _Node()
+                node.patterns.append((regex, child))
+                node = child
+        node.terminal = True
+
+    @staticmethod
+    def segment_regex(segment):
+        parts = []
+        position = 0
+        for match in PARAM.finditer(segment):
+            parts.append(re.escape(segment[position:match.start()]))
+            parts.append(f"(?:{get_converter(match['converter'] or 'str').regex})")
+            position = match.end()
+        parts.append(re.escape(segment[position:]))
+        return ''.join(parts)
+
+    def match(self, path):
+        if self._match(self.root, _segments(path), 0):
+            return True
+        return any(regex.match(path) for regex in self.regexes)
+
+    def _match(self, node, segments, index):
+        if node.subtree:
+            return True
+        if index == len(segments):
+            return node.terminal
+        segment = segments[index]
+        child = node.children.get(segment)
+        if child is not None and self._match(child, segments, index + 1):
+            return True
+        for pattern, child in node.patterns:
+            if pattern.fullmatch(segment) and self._match(child, segments, index + 1):
+                return True
+        return False
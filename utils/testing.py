@@ -0,0 +1,99 @@
+"""
+测试辅助
+    from utils.testing import assert_max_queries, assert_view_queries
+
+    with assert_max_queries(3):
+        client.get('/api/academic/course/')
+
+    # 使用视图的query_budget(未设置时为QUERY_BUDGET)作为上限
+    assert_view_queries(client, '/api/academic/course/')
+
+    # 业务应用没有迁移文件，用到这些表的测试类需要先建表
+    class CourseTests(MissingTablesMixin, TestCase):
+        ...
+"""
+import re
+from contextlib import contextmanager
+from django.apps import apps
+from django.conf import settings
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+
+# 捕获到的SQL已代入参数，把字面量替换为占位符后再归类
+LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+IN_LIST = re.compile(r'\((?:\?, )+\?\)')
+
+
+def _describe(queries):
+    """按SQL形状汇总，重复最多的排在前面"""
+    shapes = {}
+    for query in queries:
+        shape = IN_LIST.sub('(...)', LITERALS.sub('?', query['sql']))
+        shapes[shape] = shapes.get(shape, 0) + 1
+    lines = sorted(shapes.items(), key=lambda item: item[1], reverse=True)
+    return '\n'.join(f'  {count} x {sql}' for sql, count in lines)
+
+
+@contextmanager
+def assert_max_queries(max_queries, using='default'):
+    """代码块内的查询次数不超过max_queries，超出时列出执行过的SQL"""
+    with CaptureQueriesContext(connections[using]) as context:
+        yield context
+    executed = len(context.captured_queries)
+    if executed > max_queries:
+        raise AssertionError(
+            f'执行了{executed}次查询，超过上限{max_queries}次：\n{_describe(context.captured_queries)}'
+        )
+
+
+def assert_view_queries(client, url, max_queries=None, method='get', **kwargs):
+    """请求接口并断言查询次数，max_queries为None时使用视图的query_budget"""
+    if max_queries is None:
+        view = getattr(resolve(url.split('?')[0]).func, 'cls', None)
+        max_queries = getattr(view, 'query_budget', None)
+        if max_queries is None:
+            max_queries = getattr(settings, 'QUERY_BUDGET', 30)
+    with assert_max_queries(max_queries):
+        response = getattr(client, method)(url, **kwargs)
+    return response
+
+
+def token_client(user_id, role_id=None):
+    """已登录的APIClient：签发access_token并登记会话(TokenAuthMiddleware要求会话存在)"""
+    from rest_framework.test import APIClient
+    from apps.oauth.services.session import session_registry
+    from utils.token import generate_token
+
+    payload = {'user_id': user_id, 'username': str(user_id), 'role_id': role_id, 'token_type': 'access'}
+    token = generate_token(payload, 3600)
+    session_registry.login(user_id, token, 3600)
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    return client
+
+
+def create_missing_tables(using='default'):
+    """
+    为测试数据库中不存在的模型建表
+    academicManagement等业务应用的migrations目录为空，migrate不会为其建表；建好的表保留到测试数据库销毁
+    需要在事务之外调用(SQLite在事务中不能修改表结构)
+    """
+    connection = connections[using]
+    existing = set(connection.introspection.table_names())
+    models = [model for model in apps.get_models()
+              if model._meta.managed and not model._meta.proxy and model._meta.db_table not in existing]
+    if not models:
+        return
+    with connection.schema_editor() as editor:
+        for model in models:
+            editor.create_model(model)
+
+
+class MissingTablesMixin:
+    """测试类开启事务前先为没有迁移文件的模型建表"""
+
+    @classmethod
+    def setUpClass(cls):
+        create_missing_tables()
+        super().setUpClass()
@@ -1,5 +1,10 @@
+import hashlib
+import threading
+import time
 import jwt
+from collections import OrderedDict
 from datetime import datetime, timedelta
+from django.conf import settings
 from .generate import generate_random_str
 from typing import Optional
 
@@ -20,17 +25,21 @@ def generate_token(data: dict, expire=EXPIRE_TIME) -> str:
     return token
 
 
-def decode_token(token: str) -> dict:
-    """解析token"""
+def decode_claims(token: str) -> dict:
+    """解析token，返回完整声明(含exp)"""
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=['HS256'])
-        return payload['data']
+        return jwt.decode(token, SECRET_KEY, algorithms=['HS256'])
     except jwt.ExpiredSignatureError:
         raise Exception('Token已过期')
     except jwt.InvalidTokenError:
         raise Exception('无效的Token')
 
 
+def decode_token(token: str) -> dict:
+    """解析token"""
+    return decode_claims(token)['data']
+
+
 def format_token(token: str) -> str:
     """格式化token"""
     if token.startswith('Bearer '):
@@ -45,10 +54,78 @@ def parsing_token(token: str) -> str:
     return token[7:]
 
 
+class TokenCache:
+    """
+    已验证Token的进程内缓存
+    同一个access_token在有效期内会被反复校验，缓存校验通过的payload，命中时跳过JWT签名校验与解析；
+    以Token的sha256摘要为键(不在内存中保留原始Token)，条目在Token自身的exp到期，超过max_size时淘汰最久未使用的
+    """
+
+    def __init__(self, max_size=10000):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # 摘要 -> (过期时间戳, payload)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls):
+        return cls(max_size=getattr(settings, 'TOKEN_CACHE_SIZE', 10000))
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode('utf-8')).digest()
+
+    def get(self, token: str) -> Optional[dict]:
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.time():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return dict(entry[1])
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+        return None
+
+    def set(self, token: str, payload: dict, exp):
+        if self.max_size <= 0 or not exp:
+            return
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (exp, dict(payload))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+token_cache = TokenCache.from_settings()
+
+
 def verify_token(token) -> Optional[dict]:
+    """校验token，返回payload，无效或过期返回None；校验结果缓存到token过期"""
     token = parsing_token(token)
-    try:
-        payload = decode_token(token)
+    payload = token_cache.get(token)
+    if payload is not None:
         return payload
+    try:
+        claims = decode_claims(token)
     except:
         return None
+    token_cache.set(token, claims['data'], claims.get('exp'))
+    return claims['data']